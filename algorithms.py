@@ -1,7 +1,17 @@
 # algorithms.py
 import time
 import heapq
+from array import array
 from collections import deque
+from grid import Grid, as_grid, changed_cells, DOWN, UP, RIGHT, LEFT
+from open_list import make as make_open
+
+try:
+    import numpy as np
+except ImportError:  # không có NumPy: bảng nhảy của JPS được tính dần khi cần
+    np = None
+
+INF = float('inf')
 
 # --- Helpers ---
 def in_bounds(r, c, rows, cols):
@@ -9,6 +19,10 @@ def in_bounds(r, c, rows, cols):
 
 def neighbors(pos, tile, rows, cols):
     r, c = pos
+    if isinstance(tile, Grid):
+        for v in tile.neighbors(r * cols + c):
+            yield divmod(v, cols)
+        return
     for dr, dc in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
         nr, nc = r + dr, c + dc
         if in_bounds(nr, nc, rows, cols) and tile[nr][nc] != 1:
@@ -18,195 +32,959 @@ def manhattan(a, b):
     if a is None or b is None: return 99999
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def reconstruct_path(parent, start, goal, weight):
-    if goal not in parent: return [], 0
-    path = []
-    cur = goal
+# Truy vết parent (ô -> ô trước, gốc trỏ về None) trên chỉ số ô nguyên, trả về đường đi dạng (r, c)
+# và chi phí = tổng weight các ô bước vào (không tính ô xuất phát)
+def _trace(parent, s, g, grid):
+    if g not in parent: return [], 0
+    cols, w = grid.cols, grid.weight
+    ids = []
+    cur = g
     while cur is not None:
-        path.append(cur)
-        cur = parent.get(cur)
-    path.reverse()
+        ids.append(cur)
+        cur = parent[cur]
+    ids.reverse()
     total_cost = 0
-    if len(path) > 1:
-        for p in path[1:]:
-            total_cost += weight[p[0]][p[1]]
-    return path, total_cost
+    for i in ids[1:]:
+        total_cost += w[i]
+    return [divmod(i, cols) for i in ids], total_cost
+
+def _cells(ids, cols):
+    return [divmod(i, cols) for i in ids]
+
+# Mảng phẳng cấp phát một lần cho cả bản đồ thay cho dict parent/dist/visited: -1 là chưa có.
+# Ô gốc có parent trỏ về chính nó để phân biệt với ô chưa thăm.
+def _flat(n, typecode='i'):
+    return array(typecode, [-1]) * n
+
+def _trace_flat(parent, s, g, grid):
+    if parent[g] < 0: return [], 0
+    ids = [g]
+    cur = g
+    while cur != s:
+        cur = parent[cur]
+        ids.append(cur)
+    ids.reverse()
+    w = grid.weight
+    return _cells(ids, grid.cols), sum(w[i] for i in ids[1:])
+
+# Trường khoảng cách Dijkstra toàn bản đồ từ một ô gốc: dist[i] (-1 nếu không tới được), parent[i].
+# reverse=True: dist[i] là chi phí đi từ i tới gốc, parent[i] trỏ về phía gốc.
+def dijkstra_field(grid, source, reverse=False):
+    n = len(grid)
+    mask, steps = grid.adjacency()
+    wt = grid.weight
+    dist = array('i', [-1]) * n
+    parent = array('i', [-1]) * n
+    best = {source: 0}
+    pq = [(0, source)]
+    while pq:
+        d, u = heapq.heappop(pq)
+        if dist[u] >= 0: continue
+        dist[u] = d
+        for dd in steps[mask[u]]:
+            v = u + dd
+            if dist[v] >= 0: continue
+            nd = d + (wt[u] if reverse else wt[v])
+            if nd < best.get(v, nd + 1):
+                best[v] = nd
+                parent[v] = u
+                heapq.heappush(pq, (nd, v))
+    return dist, parent
 
 # --- Search Algorithms ---
-def bfs_search(start, goal, tile, weight, rows, cols):
-    if not start or not goal: return [], [], 0, 0, 0
+# Các hàm *_steps là generator: mỗi lần next() chạy tới khi có thêm `batch` ô được duyệt và sinh ra
+# danh sách các ô (r, c) đó theo đúng thứ tự duyệt; khi xong trả về (path, cost, visited_count)
+# qua StopIteration.value. *_search chạy hết generator một lần (batch vô hạn) và giữ bộ kết quả cũ.
+# record=False (mọi hàm trong SEARCHERS): không ghi danh sách ô đã duyệt, visited_list trả về rỗng,
+# visited_count vẫn đúng — cho người gọi chỉ cần đường đi và chi phí.
+def _drain(steps_fn, start, goal, tile, weight, rows, cols, **kwargs):
     t0 = time.perf_counter()
-    q = deque([start])
-    parent = {start: None}
-    visited = {start}
-    visited_list = [start]
+    gen = steps_fn(start, goal, tile, weight, rows, cols, batch=INF, **kwargs)
+    visited_list = []
+    while True:
+        try:
+            visited_list.extend(next(gen))
+        except StopIteration as stop:
+            path, cost, count = stop.value
+            break
+    t = time.perf_counter() - t0
+    return path, visited_list, count, t, cost
+
+# Chạy một generator *_steps theo ngân sách thời gian: vòng lặp UI gọi advance() mỗi khung hình,
+# vẽ các ô trả về và lấy kết quả khi done. elapsed chỉ tính thời gian tìm kiếm thật sự.
+class SearchStepper:
+    def __init__(self, steps_fn, start, goal, tile, weight, rows, cols, batch=64, **kwargs):
+        self.gen = steps_fn(start, goal, tile, weight, rows, cols, batch=batch, **kwargs)
+        self.done = False
+        self.result = ([], 0, 0)
+        self.elapsed = 0.0
+
+    def advance(self, budget=0.008, limit=None):
+        out = []
+        if self.done: return out
+        t0 = time.perf_counter()
+        try:
+            while limit is None or len(out) < limit:
+                out.extend(next(self.gen))
+                if time.perf_counter() - t0 >= budget: break
+        except StopIteration as stop:
+            self.done = True
+            self.result = stop.value
+        self.elapsed += time.perf_counter() - t0
+        return out
+
+    def close(self):
+        self.gen.close()
+        self.done = True
+
+def bfs_steps(start, goal, tile, weight, rows, cols, batch=64, record=True):
+    if not start or not goal: return [], 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    s, g = grid.idx(*start), grid.idx(*goal)
+    mask, steps = grid.adjacency()
+    q = deque([s])
+    parent = _flat(len(grid))
+    parent[s] = s
+    fresh = [s] if record else []
+    count = 1
     while q:
         node = q.popleft()
-        if node == goal: break
-        for nb in neighbors(node, tile, rows, cols):
-            if nb not in parent:
+        if node == g: break
+        for d in steps[mask[node]]:
+            nb = node + d
+            if parent[nb] < 0:
                 parent[nb] = node
-                visited.add(nb)
-                visited_list.append(nb)
+                count += 1
+                if record: fresh.append(nb)
                 q.append(nb)
-    path, cost = reconstruct_path(parent, start, goal, weight)
-    t = time.perf_counter() - t0
-    return path, visited_list, len(visited), t, cost
+        if len(fresh) >= batch:
+            yield _cells(fresh, cols)
+            fresh = []
+    if fresh: yield _cells(fresh, cols)
+    path, cost = _trace_flat(parent, s, g, grid)
+    return path, cost, count
 
-def dfs_search(start, goal, tile, weight, rows, cols):
-    if not start or not goal: return [], [], 0, 0, 0
-    t0 = time.perf_counter()
-    stack = [start]
-    parent = {start: None}
-    visited = {start}
-    visited_list = [start]
+def dfs_steps(start, goal, tile, weight, rows, cols, batch=64, record=True):
+    if not start or not goal: return [], 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    s, g = grid.idx(*start), grid.idx(*goal)
+    mask, steps = grid.adjacency()
+    stack = [s]
+    parent = _flat(len(grid))
+    parent[s] = s
+    fresh = [s] if record else []
+    count = 1
     while stack:
         node = stack.pop()
-        if node == goal: break
-        for nb in neighbors(node, tile, rows, cols):
-            if nb not in parent:
+        if node == g: break
+        for d in steps[mask[node]]:
+            nb = node + d
+            if parent[nb] < 0:
                 parent[nb] = node
-                visited.add(nb)
-                visited_list.append(nb)
+                count += 1
+                if record: fresh.append(nb)
                 stack.append(nb)
-    path, cost = reconstruct_path(parent, start, goal, weight)
+        if len(fresh) >= batch:
+            yield _cells(fresh, cols)
+            fresh = []
+    if fresh: yield _cells(fresh, cols)
+    path, cost = _trace_flat(parent, s, g, grid)
+    return path, cost, count
+
+# open_list: "heap" (heapq, mục trùng), "indexed" (giảm khoá tại chỗ) hoặc "bucket" — xem open_list.py.
+# Với bản có giảm khoá, closed[u] không bao giờ gặp lại nhưng vẫn giữ để dùng chung một vòng lặp;
+# vòng lặp dừng khi pop() báo rỗng (IndexError) thay vì hỏi len() mỗi lần.
+def ucs_steps(start, goal, tile, weight, rows, cols, batch=64, record=True, open_list="heap"):
+    if not start or not goal: return [], 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    s, g = grid.idx(*start), grid.idx(*goal)
+    mask, steps = grid.adjacency()
+    wt = grid.weight
+    pq = make_open(open_list, len(grid))
+    push, pop = pq.push, pq.pop
+    push((0, s))
+    parent = _flat(len(grid))
+    parent[s] = s
+    dist = _flat(len(grid), 'q')
+    dist[s] = 0
+    closed = bytearray(len(grid))
+    count = 0
+    fresh = []
+    while True:
+        try:
+            cost_u, u = pop()
+        except IndexError:
+            break
+        if closed[u]: continue
+        closed[u] = 1
+        count += 1
+        if record: fresh.append(u)
+        if u == g: break
+        for d in steps[mask[u]]:
+            v = u + d
+            newg = cost_u + wt[v]
+            dv = dist[v]
+            if dv < 0 or newg < dv:
+                dist[v] = newg
+                parent[v] = u
+                push((newg, v))
+        if len(fresh) >= batch:
+            yield _cells(fresh, cols)
+            fresh = []
+    if fresh: yield _cells(fresh, cols)
+    path, cost = _trace_flat(parent, s, g, grid)
+    return path, cost, count
+
+def astar_steps(start, goal, tile, weight, rows, cols, batch=64, record=True, open_list="heap"):
+    if not start or not goal: return [], 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    s, g = grid.idx(*start), grid.idx(*goal)
+    gr, gc = goal
+    mask, steps = grid.adjacency()
+    wt = grid.weight
+    dist = _flat(len(grid), 'q')
+    dist[s] = 0
+    parent = _flat(len(grid))
+    parent[s] = s
+    pq = make_open(open_list, len(grid))
+    push, pop = pq.push, pq.pop
+    push((manhattan(start, goal), s))
+    closed = bytearray(len(grid))
+    count = 0
+    fresh = []
+    while True:
+        try:
+            _, u = pop()
+        except IndexError:
+            break
+        if closed[u]: continue
+        closed[u] = 1
+        count += 1
+        if record: fresh.append(u)
+        if u == g: break
+        gu = dist[u]
+        for d in steps[mask[u]]:
+            v = u + d
+            newg = gu + wt[v]
+            dv = dist[v]
+            if dv < 0 or newg < dv:
+                dist[v] = newg
+                parent[v] = u
+                vr, vc = divmod(v, cols)
+                push((newg + abs(vr - gr) + abs(vc - gc), v))
+        if len(fresh) >= batch:
+            yield _cells(fresh, cols)
+            fresh = []
+    if fresh: yield _cells(fresh, cols)
+    path, cost = _trace_flat(parent, s, g, grid)
+    return path, cost, count
+
+def greedy_steps(start, goal, tile, weight, rows, cols, batch=64, record=True):
+    if not start or not goal: return [], 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    s, g = grid.idx(*start), grid.idx(*goal)
+    gr, gc = goal
+    mask, steps = grid.adjacency()
+    pq = [(manhattan(start, goal), s)]
+    parent = _flat(len(grid))
+    parent[s] = s
+    closed = bytearray(len(grid))
+    count = 0
+    fresh = []
+    while pq:
+        _, u = heapq.heappop(pq)
+        if closed[u]: continue
+        closed[u] = 1
+        count += 1
+        if record: fresh.append(u)
+        if u == g: break
+        for d in steps[mask[u]]:
+            v = u + d
+            if parent[v] < 0:
+                parent[v] = u
+                vr, vc = divmod(v, cols)
+                heapq.heappush(pq, (abs(vr - gr) + abs(vc - gc), v))
+        if len(fresh) >= batch:
+            yield _cells(fresh, cols)
+            fresh = []
+    if fresh: yield _cells(fresh, cols)
+    path, cost = _trace_flat(parent, s, g, grid)
+    return path, cost, count
+
+def bfs_search(start, goal, tile, weight, rows, cols, record=True):
+    if not start or not goal: return [], [], 0, 0, 0
+    return _drain(bfs_steps, start, goal, tile, weight, rows, cols, record=record)
+
+def dfs_search(start, goal, tile, weight, rows, cols, record=True):
+    if not start or not goal: return [], [], 0, 0, 0
+    return _drain(dfs_steps, start, goal, tile, weight, rows, cols, record=record)
+
+def ucs_search(start, goal, tile, weight, rows, cols, record=True, open_list="heap"):
+    if not start or not goal: return [], [], 0, 0, 0
+    return _drain(ucs_steps, start, goal, tile, weight, rows, cols, record=record, open_list=open_list)
+
+def astar_search(start, goal, tile, weight, rows, cols, record=True, open_list="heap"):
+    if not start or not goal: return [], [], 0, 0, 0
+    return _drain(astar_steps, start, goal, tile, weight, rows, cols, record=record, open_list=open_list)
+
+def greedy_search(start, goal, tile, weight, rows, cols, record=True):
+    if not start or not goal: return [], [], 0, 0, 0
+    return _drain(greedy_steps, start, goal, tile, weight, rows, cols, record=record)
+
+# --- Beam Search ---
+# Duyệt theo lớp, mỗi lớp chỉ giữ beam_width ô có f = g + h nhỏ nhất. Mỗi ô được giữ có tối đa 4 ô kề
+# nên một lớp có không quá 4 * beam_width ứng viên (đã bỏ trùng): sort của C nhanh hơn heapq.nsmallest
+# (vòng lặp Python) ở cỡ này, và chỉ sắp xếp khi lớp vượt beam_width.
+# Chỉ ô được giữ mới ghi vào best/parent (mảng phẳng): ô bị cắt ở một lớp vẫn có thể vào lại ở lớp
+# sau, ô đã giữ chỉ vào lại khi tới được với chi phí nhỏ hơn. Sau khi gặp goal chỉ mở rộng tiếp các
+# ô còn có thể cho đường rẻ hơn (f < chi phí tốt nhất).
+# anytime=True: không tìm thấy đường mà có ô bị cắt thì nhân đôi beam_width và tìm lại; không ô nào
+# bị cắt nghĩa là đã duyệt hết vùng tới được (không có đường).
+BEAM_WIDTH = 8
+_NO_COST = 1 << 62
+
+def _beam(grid, s, g, beam_width, record):
+    cols, weight = grid.cols, grid.weight
+    gr, gc = divmod(g, cols)
+    mask, steps = grid.adjacency()
+    best = array('q', [_NO_COST]) * len(grid)
+    best[s] = 0
+    parent = _flat(len(grid))
+    parent[s] = s
+    visited = [s] if record else []
+    frontier = [] if s == g else [s]
+    goal_cost = 0 if s == g else INF
+    count = 0
+    pruned = False
+    depth = 0
+    while frontier and depth < len(grid):
+        # layer[v] = (f, g, v, u): cách tốt nhất vào v từ lớp hiện tại
+        layer = {}
+        get = layer.get
+        for u in frontier:
+            count += 1
+            gu = best[u]
+            for d in steps[mask[u]]:
+                v = u + d
+                nv = gu + weight[v]
+                if nv >= best[v]: continue
+                prev = get(v)
+                if prev is None or nv < prev[1]:
+                    vr, vc = divmod(v, cols)
+                    layer[v] = (nv + abs(vr - gr) + abs(vc - gc), nv, v, u)
+        items = layer.values()
+        if goal_cost < INF:
+            items = [item for item in items if item[0] < goal_cost]
+        if len(items) > beam_width:
+            pruned = True
+            items = sorted(items)[:beam_width]
+        frontier = []
+        for _, nv, v, u in items:
+            best[v] = nv
+            parent[v] = u
+            if record: visited.append(v)
+            if v == g: goal_cost = nv
+            else: frontier.append(v)
+        depth += 1
+    return parent, visited, count, goal_cost < INF, pruned
+
+def beam_search(start, goal, tile, weight, rows, cols, beam_width=BEAM_WIDTH, anytime=False, record=True):
+    if not start or not goal: return [], [], 0, 0, 0
+    if beam_width < 1: raise ValueError(f"beam_width phải >= 1: {beam_width!r}")
+    grid = as_grid(tile, weight, rows, cols)
+    t0 = time.perf_counter()
+    s, g = grid.idx(*start), grid.idx(*goal)
+    visited_list, count = [], 0
+    while True:
+        parent, visited, n, found, pruned = _beam(grid, s, g, beam_width, record)
+        visited_list += visited
+        count += n
+        if found or not pruned or not anytime: break
+        beam_width *= 2
+    path, cost = _trace_flat(parent, s, g, grid)
     t = time.perf_counter() - t0
-    return path, visited_list, len(visited), t, cost
+    return path, _cells(visited_list, cols), count, t, cost
 
-def ucs_search(start, goal, tile, weight, rows, cols):
+# --- Iterative Deepening ---
+# Độ sâu bắt đầu từ manhattan(start, goal) (cận dưới số bước) và dừng khi một lượt không còn ô nào
+# bị cắt bởi giới hạn (đã duyệt hết vùng tới được). DFS không đệ quy giữ đường đi hiện tại; như IDA*,
+# bảng chuyển vị (ô -> độ sâu nhỏ nhất trong lượt) có tối đa table_size ô nên bộ nhớ không tăng theo
+# bản đồ: ô nằm trong bảng thì chỉ đi tiếp khi tới được ở độ sâu nhỏ hơn (đường tìm được có số bước
+# ít nhất), ô ngoài bảng khi bảng đầy thì duyệt lại. visited_count là tổng số lần mở rộng;
+# ghi lại tối đa record_limit ô cho animation.
+def ids_search(start, goal, tile, weight, rows, cols, max_depth=None, table_size=1 << 18, record_limit=100_000,
+               record=True):
+    if max_depth is None:
+        max_depth = rows * cols
     if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
     t0 = time.perf_counter()
-    pq = [(0, start)]
-    parent = {start: None}
-    g = {start: 0}
-    visited = set()
-    visited_list = []
-    while pq:
-        cost_u, u = heapq.heappop(pq)
-        if u in visited: continue
-        visited.add(u)
-        visited_list.append(u)
-        if u == goal: break
-        for v in neighbors(u, tile, rows, cols):
-            w = weight[v[0]][v[1]]
-            newg = g[u] + w
-            if v not in g or newg < g[v]:
-                g[v] = newg
-                parent[v] = u
-                heapq.heappush(pq, (newg, v))
-    path, cost = reconstruct_path(parent, start, goal, weight)
+    s, g = grid.idx(*start), grid.idx(*goal)
+    mask, steps = grid.adjacency()
+
+    recorded = {s}
+    visited_list = [s]
+    expanded = 0
+    if not record: record_limit = 0
+    found = [s] if s == g else None
+
+    depth_limit = manhattan(start, goal)
+    while found is None and depth_limit < max_depth:
+        table = {s: 0}
+        path = [s]
+        on_path = {s}
+        stack = [iter(steps[mask[s]])]
+        cut = False
+        while stack:
+            d = next(stack[-1], None)
+            if d is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+            v = path[-1] + d
+            nd = len(path)
+            if v in on_path or table.get(v, nd + 1) <= nd: continue
+            if nd > depth_limit:
+                cut = True
+                continue
+            if v in table or len(table) < table_size:
+                table[v] = nd
+            expanded += 1
+            if len(visited_list) < record_limit and v not in recorded:
+                recorded.add(v)
+                visited_list.append(v)
+            if v == g:
+                found = path + [v]
+                break
+            path.append(v)
+            on_path.add(v)
+            stack.append(iter(steps[mask[v]]))
+        if not cut: break
+        depth_limit += 1
+
+    path, cost = [], 0
+    if found is not None:
+        cost = sum(grid.weight[i] for i in found[1:])
+        path = _cells(found, cols)
     t = time.perf_counter() - t0
-    return path, visited_list, len(visited), t, cost
+    return path, _cells(visited_list, cols) if record else [], expanded, t, cost
 
-def astar_search(start, goal, tile, weight, rows, cols):
+# IDA*: DFS theo ngưỡng f = g + manhattan, tăng ngưỡng lên f nhỏ nhất bị cắt.
+# Bộ nhớ chỉ gồm đường đi hiện tại và bảng chuyển vị (ô -> g tốt nhất trong lượt) giới hạn table_size,
+# nên chạy được cả khi open list của A* không vừa bộ nhớ. visited_count là tổng số lần mở rộng.
+def idastar_search(start, goal, tile, weight, rows, cols, table_size=1 << 18, record_limit=100_000, record=True):
     if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
     t0 = time.perf_counter()
-    pq = []
-    g = {start: 0}
-    f = {start: manhattan(start, goal)}
-    parent = {start: None}
-    heapq.heappush(pq, (f[start], start))
-    visited = set()
+    s, g = grid.idx(*start), grid.idx(*goal)
+    if s == g:
+        path = _cells([s], cols)
+        return path, path if record else [], 0, time.perf_counter() - t0, 0
+    gr, gc = goal
+    mask, steps = grid.adjacency()
+    wt = grid.weight
+
+    def children(u, gu):
+        out = []
+        for d in steps[mask[u]]:
+            v = u + d
+            gv = gu + wt[v]
+            vr, vc = divmod(v, cols)
+            out.append((gv + abs(vr - gr) + abs(vc - gc), gv, v))
+        out.sort()
+        return out
+
+    recorded = set()
     visited_list = []
-    while pq:
-        _, u = heapq.heappop(pq)
-        if u in visited: continue
-        visited.add(u)
-        visited_list.append(u)
-        if u == goal: break
-        for v in neighbors(u, tile, rows, cols):
-            w = weight[v[0]][v[1]]
-            newg = g[u] + w
-            if v not in g or newg < g[v]:
-                g[v] = newg
-                parent[v] = u
-                f[v] = newg + manhattan(v, goal)
-                heapq.heappush(pq, (f[v], v))
-    path, cost = reconstruct_path(parent, start, goal, weight)
+    expanded = 0
+    if not record: record_limit = 0
+    threshold = manhattan(start, goal)
+    found = None
+    while found is None and threshold < INF:
+        table = {s: 0}
+        on_path = {s}
+        stack = [(s, 0, children(s, 0), 0)]
+        next_threshold = INF
+        while stack:
+            u, gu, kids, k = stack[-1]
+            if k == len(kids):
+                stack.pop()
+                on_path.discard(u)
+                continue
+            stack[-1] = (u, gu, kids, k + 1)
+            f, gv, v = kids[k]
+            if f > threshold:
+                if f < next_threshold: next_threshold = f
+                continue
+            if v in on_path or table.get(v, INF) <= gv: continue
+            if v in table or len(table) < table_size:
+                table[v] = gv
+            expanded += 1
+            if len(visited_list) < record_limit and v not in recorded:
+                recorded.add(v)
+                visited_list.append(v)
+            if v == g:
+                found = [frame[0] for frame in stack] + [v]
+                break
+            on_path.add(v)
+            stack.append((v, gv, children(v, gv), 0))
+        threshold = next_threshold
+
+    path, cost = [], 0
+    if found is not None:
+        cost = sum(wt[i] for i in found[1:])
+        path = _cells(found, cols)
     t = time.perf_counter() - t0
-    return path, visited_list, len(visited), t, cost
+    return path, _cells(visited_list, cols), expanded, t, cost
 
-def greedy_search(start, goal, tile, weight, rows, cols):
+# --- Jump Point Search ---
+# JPS cho lưới 4 hướng: trong vùng nước đồng nhất (weight == 1) chỉ đưa các điểm nhảy vào heap.
+# Ô bão (weight > 1) và ô kề ô bão là điểm dừng bắt buộc, nên chi phí vẫn tối ưu như A*.
+JPS_NUMPY_MIN = 1 << 14     # dưới số ô này bảng tính dần rẻ hơn chi phí cố định của NumPy
+
+# Kết quả nhảy không phụ thuộc goal, nhớ theo (ô, hướng) tới khi grid.version đổi:
+# end[d][u] là ô cuối của lần nhảy từ u theo hướng d (điểm dừng, hoặc ô cuối trước tường; -1: chưa tính),
+# stop[d][u] = 1 nếu ô cuối là điểm dừng. Mọi ô đi qua trong một lần nhảy có cùng kết quả nên được ghi
+# luôn => mỗi ô chỉ đi qua một lần cho mỗi hướng, kể cả các lần nhảy ngang mà nhảy dọc cần xét.
+class JumpTable:
+    def __init__(self, grid):
+        self.grid = grid
+        self.version = grid.version
+        n, cols = len(grid), grid.cols
+        self.bits = {cols: DOWN, -cols: UP, 1: RIGHT, -1: LEFT}
+        if np is not None and n >= JPS_NUMPY_MIN:
+            self._fill()
+        else:
+            self.end = {d: array('i', [-1]) * n for d in self.bits}
+            self.stop = {d: bytearray(n) for d in self.bits}
+
+    # Có NumPy: tính cả bảng một lượt. flag[x] = x là điểm dừng khi bước vào từ x - d (cùng điều kiện
+    # với jump); ô cuối của lần nhảy từ x là ô đầu tiên sau x (trên cùng hàng/cột) là điểm dừng hoặc
+    # hết đường, lấy bằng minimum/maximum.accumulate.
+    def _fill(self):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        m = np.frombuffer(grid.adjacency()[0], np.uint8)
+        plain = np.frombuffer(grid.weight, np.uint16) == 1
+        idx = np.arange(rows * cols, dtype=np.int32)
+        at = lambda a, d: np.roll(a, -d)        # at(a, d)[x] == a[x + d] (chỉ dùng khi ô x + d mở)
+        has = lambda a, bit: (a & bit) != 0
+        self.end, self.stop = {}, {}
+        for d in (1, -1, cols, -cols):
+            bit = self.bits[d]
+            horizontal = d == 1 or d == -1
+            sa, sb, ba, bb = (-cols, cols, UP, DOWN) if horizontal else (-1, 1, LEFT, RIGHT)
+            mp, pp = at(m, -d), at(plain, -d)
+            flag = ~plain | ~pp | (has(m, bit) & ~at(plain, d))
+            flag |= has(m, ba) & (~at(plain, sa) | ~(has(mp, ba) & at(pp, sa)))
+            flag |= has(m, bb) & (~at(plain, sb) | ~(has(mp, bb) & at(pp, sb)))
+            if not horizontal:
+                flag |= np.frombuffer(self.stop[1], bool) | np.frombuffer(self.stop[-1], bool)
+            big = rows * cols if d > 0 else -1
+            cand = np.where(flag | ~has(m, bit), idx, big).reshape(rows, cols)
+            axis = 1 if horizontal else 0
+            if d > 0:
+                nxt = np.minimum.accumulate(np.flip(cand, axis), axis=axis)
+                nxt = np.flip(nxt, axis)
+            else:
+                nxt = np.maximum.accumulate(cand, axis=axis)
+            # Ô đầu tiên sau x: dịch kết quả đi một ô theo hướng d
+            shifted = np.full_like(nxt, big)
+            if axis == 1 and d > 0: shifted[:, :-1] = nxt[:, 1:]
+            elif axis == 1: shifted[:, 1:] = nxt[:, :-1]
+            elif d > 0: shifted[:-1] = nxt[1:]
+            else: shifted[1:] = nxt[:-1]
+            moves = has(m, bit)
+            end = np.where(moves, shifted.ravel(), idx).astype(np.int32)
+            stop = moves & flag[np.where(moves, end, 0)]
+            self.end[d] = array('i', end.tobytes())
+            self.stop[d] = bytearray(stop.view(np.uint8).tobytes())
+
+    # Ô x (vừa bước vào từ p theo hướng d) là điểm dừng khi: x là bão hoặc kề ô bão, hoặc có hàng xóm
+    # bắt buộc (ô kề vuông góc mở ở x nhưng ở p là tường/bão); nhảy dọc còn dừng ở ô mà nhảy ngang dừng.
+    # Kiểm tra viết thẳng trong vòng lặp: đây là phần nóng nhất của JPS.
+    def jump(self, u, d):
+        end, stop = self.end[d], self.stop[d]
+        if end[u] >= 0: return end[u], stop[u]
+        grid = self.grid
+        mask, wt, cols = grid.adjacency()[0], grid.weight, grid.cols
+        bit = self.bits[d]
+        horizontal = d == 1 or d == -1
+        if horizontal: sa, sb, ba, bb = -cols, cols, UP, DOWN
+        else: sa, sb, ba, bb = -1, 1, LEFT, RIGHT
+        end_r, stop_r, end_l, stop_l = self.end[1], self.stop[1], self.end[-1], self.stop[-1]
+        walked = [u]
+        x, hit = u, 0
+        while mask[x] & bit:
+            p = x
+            x += d
+            m = mask[x]
+            if wt[x] != 1 or wt[p] != 1 or (m & bit and wt[x + d] != 1): hit = 1
+            elif m & ba and (wt[x + sa] != 1 or not (mask[p] & ba and wt[p + sa] == 1)): hit = 1
+            elif m & bb and (wt[x + sb] != 1 or not (mask[p] & bb and wt[p + sb] == 1)): hit = 1
+            elif not horizontal:
+                if end_r[x] < 0: self.jump(x, 1)
+                if end_l[x] < 0: self.jump(x, -1)
+                hit = stop_r[x] or stop_l[x]
+            if hit: break
+            if end[x] >= 0:
+                x, hit = end[x], stop[x]
+                break
+            walked.append(x)
+        for w in walked:
+            end[w] = x
+            stop[w] = hit
+        return x, hit
+
+_jps = None
+
+def jps_search(start, goal, tile, weight, rows, cols, record=True):
+    global _jps
     if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
     t0 = time.perf_counter()
-    pq = []
-    parent = {start: None}
-    visited = set()
+    s, g = grid.idx(*start), grid.idx(*goal)
+    gr, gc = goal
+    mask, steps = grid.adjacency()
+    wt = grid.weight
+    if _jps is None or _jps.grid is not grid or _jps.version != grid.version:
+        _jps = JumpTable(grid)
+    jump, ends, stops = _jps.jump, _jps.end, _jps.stop
+    end_r, end_l = ends[1], ends[-1]
+    g_row = gr * cols
+
+    # goal chỉ chặn được lần nhảy ngang trên hàng gr: dừng ở goal nếu nó nằm trong đoạn đã nhảy
+    def jump_h(u, d):
+        e = ends[d][u]
+        if e < 0: e, hit = jump(u, d)
+        else: hit = stops[d][u]
+        if g_row <= u < g_row + cols and (u < g <= e if d > 0 else e <= g < u): return g
+        return e if hit else -1
+
+    # Nhảy dọc dừng ở ô c trên hàng gr nếu c là goal hoặc từ c nhảy ngang tới được goal
+    def jump_v(u, d):
+        e = ends[d][u]
+        if e < 0: e, hit = jump(u, d)
+        else: hit = stops[d][u]
+        c = g_row + u % cols
+        if u < c <= e if d > 0 else e <= c < u:
+            if end_r[c] < 0: jump(c, 1)
+            if end_l[c] < 0: jump(c, -1)
+            if c == g or c < g <= end_r[c] or end_l[c] <= g < c: return c
+        return e if hit else -1
+
+    n = len(grid)
+    dist = _flat(n, 'q')
+    parent = _flat(n)
+    came = array('i', [0]) * n
+    dist[s], parent[s] = 0, s
+    pq = [(manhattan(start, goal), s)]
+    closed = bytearray(n)
+    count = 0
     visited_list = []
-    heapq.heappush(pq, (manhattan(start, goal), start))
     while pq:
         _, u = heapq.heappop(pq)
-        if u in visited: continue
-        visited.add(u)
-        visited_list.append(u)
-        if u == goal: break
-        for v in neighbors(u, tile, rows, cols):
-            if v not in visited and v not in parent:
+        if closed[u]: continue
+        closed[u] = 1
+        count += 1
+        if record: visited_list.append(u)
+        if u == g: break
+        d_in = came[u]
+        gu = dist[u]
+        for d in steps[mask[u]]:
+            if d_in and d == -d_in: continue
+            v = jump_h(u, d) if d == 1 or d == -1 else jump_v(u, d)
+            if v < 0 or closed[v]: continue
+            newg = gu + (v - u) // d - 1 + wt[v]
+            dv = dist[v]
+            if dv < 0 or newg < dv:
+                dist[v] = newg
                 parent[v] = u
-                heapq.heappush(pq, (manhattan(v, goal), v))
-    path, cost = reconstruct_path(parent, start, goal, weight)
+                came[v] = d
+                vr, vc = divmod(v, cols)
+                heapq.heappush(pq, (newg + abs(vr - gr) + abs(vc - gc), v))
+
+    # Nối lại các đoạn thẳng giữa các điểm nhảy
+    path, cost = [], 0
+    if parent[g] >= 0:
+        ids = [g]
+        cur = g
+        while cur != s:
+            p = parent[cur]
+            d = came[cur]
+            cur_cell = cur
+            while cur_cell != p:
+                cur_cell -= d
+                ids.append(cur_cell)
+            cur = p
+        ids.reverse()
+        cost = sum(wt[i] for i in ids[1:])
+        path = _cells(ids, cols)
     t = time.perf_counter() - t0
-    return path, visited_list, len(visited), t, cost
+    return path, _cells(visited_list, cols), count, t, cost
+
+# --- Incremental Search (D* Lite) ---
+# Tìm ngược từ goal; giữ g/rhs giữa các lần gọi. Khi địa hình/chi phí đổi hoặc robot di chuyển,
+# chỉ sửa phần cây tìm kiếm bị ảnh hưởng thay vì tìm lại từ đầu.
+# Chi phí cạnh u->v là weight[v] (giống _trace), vô cực nếu v là tường.
+
+class DStarLite:
+    def __init__(self, grid, goal):
+        self.grid = grid
+        self.goal = goal
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.open = {}          # ô -> khoá hiện tại (các mục khác trong heap là cũ)
+        self.heap = []
+        self.km = 0
+        self.last = None
+        self.version = grid.version
+        self.tile = array('B', grid.tile)
+        self.weight = array('H', grid.weight)
+        self.expanded = []
+
+    def _h(self, a, b):
+        cols = self.grid.cols
+        return abs(a // cols - b // cols) + abs(a % cols - b % cols)
 
-def beam_search(start, goal, tile, weight, rows, cols, beam_width=6):
+    def _key(self, u):
+        m = min(self.g.get(u, INF), self.rhs.get(u, INF))
+        return (m + self._h(self.start, u) + self.km, m)
+
+    def _update(self, u):
+        if u != self.goal:
+            mask, steps = self.grid.adjacency()
+            wt, g = self.grid.weight, self.g
+            best = INF
+            for d in steps[mask[u]]:
+                v = u + d
+                c = wt[v] + g.get(v, INF)
+                if c < best: best = c
+            self.rhs[u] = best
+        if self.g.get(u, INF) != self.rhs.get(u, INF):
+            k = self._key(u)
+            self.open[u] = k
+            heapq.heappush(self.heap, (k, u))
+        else:
+            self.open.pop(u, None)
+
+    def _top(self):
+        heap, open_ = self.heap, self.open
+        while heap and open_.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0] if heap else ((INF, INF), None)
+
+    def _compute(self):
+        mask, steps = self.grid.adjacency()
+        g, rhs, s = self.g, self.rhs, self.start
+        while True:
+            k_old, u = self._top()
+            if u is None: break
+            if k_old >= self._key(s) and rhs.get(s, INF) == g.get(s, INF): break
+            k_new = self._key(u)
+            if k_old < k_new:
+                self.open[u] = k_new
+                heapq.heapreplace(self.heap, (k_new, u))
+                continue
+            heapq.heappop(self.heap)
+            del self.open[u]
+            self.expanded.append(u)
+            if g.get(u, INF) > rhs.get(u, INF):
+                g[u] = rhs[u]
+            else:
+                g[u] = INF
+                self._update(u)
+            for d in steps[mask[u]]:
+                self._update(u + d)
+
+    # Áp dụng các ô đã đổi kể từ lần gọi trước: cạnh đi vào ô đó đổi chi phí
+    def _apply_changes(self):
+        grid = self.grid
+        changed = set(changed_cells(self.tile, grid.tile)) | set(changed_cells(self.weight, grid.weight))
+        rows, cols = grid.rows, grid.cols
+        for v in changed:
+            self.tile[v], self.weight[v] = grid.tile[v], grid.weight[v]
+            r, c = divmod(v, cols)
+            self._update(v)
+            if r > 0: self._update(v - cols)
+            if r + 1 < rows: self._update(v + cols)
+            if c > 0: self._update(v - 1)
+            if c + 1 < cols: self._update(v + 1)
+        self.version = grid.version
+
+    def plan(self, start):
+        self.expanded = []
+        if self.last is None:
+            self.start = self.last = start
+            k = self._key(self.goal)
+            self.open[self.goal] = k
+            heapq.heappush(self.heap, (k, self.goal))
+        elif start != self.last:
+            self.km += self._h(self.last, start)
+            self.start = self.last = start
+        if self.version != self.grid.version:
+            self._apply_changes()
+        self._compute()
+        if self.g.get(start, INF) == INF: return []
+        # Đi theo hướng giảm weight + g từ start tới goal
+        mask, steps = self.grid.adjacency()
+        wt, g = self.grid.weight, self.g
+        ids = [start]
+        u = start
+        limit = len(self.grid)
+        while u != self.goal and len(ids) <= limit:
+            u = min((u + d for d in steps[mask[u]]), key=lambda v: wt[v] + g.get(v, INF))
+            ids.append(u)
+        return ids if u == self.goal else []
+
+_dstar = None
+
+# Bỏ trạng thái giữ giữa các lần gọi (benchmark cần mỗi lần chạy là tìm từ đầu)
+def reset_planners():
+    global _dstar, _jps
+    _dstar = _jps = None
+
+def dstar_lite_search(start, goal, tile, weight, rows, cols, record=True):
+    global _dstar
     if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
     t0 = time.perf_counter()
-    frontier = [start]
-    parent = {start: None}
-    visited = {start}
-    visited_list = [start]
-    found = False
-    depth = 0
-    while frontier and not found and depth < rows*cols:
-        candidates = []
-        for u in frontier:
-            if u == goal: found = True; break
-            for v in neighbors(u, tile, rows, cols):
-                if v not in parent:
-                    parent[v] = u
-                    visited.add(v)
-                    visited_list.append(v)
-                    candidates.append(v)
-        if found: break
-        candidates.sort(key=lambda x: manhattan(x, goal))
-        frontier = candidates[:beam_width]
-        depth += 1
-    path, cost = reconstruct_path(parent, start, goal, weight)
+    s, g = grid.idx(*start), grid.idx(*goal)
+    if _dstar is None or _dstar.grid is not grid or _dstar.goal != g:
+        _dstar = DStarLite(grid, g)
+    ids = _dstar.plan(s)
+    wt = grid.weight
+    cost = sum(wt[i] for i in ids[1:])
+    visited_list = _cells(_dstar.expanded, cols) if record else []
     t = time.perf_counter() - t0
-    return path, visited_list, len(visited), t, cost
+    return _cells(ids, cols), visited_list, len(_dstar.expanded), t, cost
 
-def ids_search(start, goal, tile, weight, rows, cols, max_depth=None):
-    if max_depth is None:
-        max_depth = rows * cols
+# --- Bidirectional Search ---
+# Hai frontier: xuôi từ start và ngược từ goal. Chiều ngược đi cạnh v->u với chi phí weight[u]
+# (chi phí luôn tính theo ô bước vào). visited_list trộn cả hai chiều theo thứ tự duyệt.
+# parent mỗi chiều là mảng phẳng, gốc trỏ về chính nó.
+def _join(parent_f, parent_b, meet, grid):
+    ids = [meet]
+    cur = meet
+    while parent_f[cur] != cur:
+        cur = parent_f[cur]
+        ids.append(cur)
+    ids.reverse()
+    cur = meet
+    while parent_b[cur] != cur:
+        cur = parent_b[cur]
+        ids.append(cur)
+    wt = grid.weight
+    return _cells(ids, grid.cols), sum(wt[i] for i in ids[1:])
+
+def bidirectional_bfs_search(start, goal, tile, weight, rows, cols, record=True):
     if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
     t0 = time.perf_counter()
-    
-    visited_for_animation = []
-    
-    for depth_limit in range(max_depth):
-        stack = [(start, 0)]
-        parent = {start: None}
-        visited_in_this_dls = {start}
+    s, g = grid.idx(*start), grid.idx(*goal)
+    mask, steps = grid.adjacency()
+    n = len(grid)
+    parents = (_flat(n), _flat(n))
+    depths = (_flat(n), _flat(n))
+    parents[0][s], parents[1][g] = s, g
+    depths[0][s] = depths[1][g] = 0
+    fronts = [[s], [g]]
+    visited_list = [s, g] if s != g else [s]
+    count = len(visited_list)
+    if not record: visited_list = []
+    meet = s if s == g else None
+    while fronts[0] and fronts[1] and meet is None:
+        # Mở rộng trọn một lớp của frontier nhỏ hơn, chọn điểm gặp có tổng độ sâu nhỏ nhất
+        side = 0 if len(fronts[0]) <= len(fronts[1]) else 1
+        parent, depth = parents[side], depths[side]
+        other = depths[1 - side]
+        best = INF
+        nxt = []
+        for u in fronts[side]:
+            du = depth[u] + 1
+            for d in steps[mask[u]]:
+                v = u + d
+                if parent[v] >= 0: continue
+                parent[v] = u
+                depth[v] = du
+                count += 1
+                if record: visited_list.append(v)
+                nxt.append(v)
+                if other[v] >= 0 and du + other[v] < best:
+                    best, meet = du + other[v], v
+        fronts[side] = nxt
+    path, cost = _join(parents[0], parents[1], meet, grid) if meet is not None else ([], 0)
+    t = time.perf_counter() - t0
+    return path, _cells(visited_list, cols), count, t, cost
 
-        while stack:
-            node, current_depth = stack.pop()
+# Dijkstra hai chiều trên đồ thị rút gọn theo thế vị p(v) (p = 0 là Dijkstra thường).
+# Khoá được nhân đôi để giữ số nguyên: xuôi 2*d + p(v), ngược 2*d - p(v);
+# dừng khi tổng hai khoá nhỏ nhất >= 2 * chi phí tốt nhất đã gặp.
+def _bidirectional(grid, s, g, pot, record=True):
+    mask, steps = grid.adjacency()
+    wt = grid.weight
+    n = len(grid)
+    dist = (_flat(n, 'q'), _flat(n, 'q'))
+    parents = (_flat(n), _flat(n))
+    dist[0][s] = dist[1][g] = 0
+    parents[0][s], parents[1][g] = s, g
+    done = (bytearray(n), bytearray(n))
+    heaps = ([(pot(s), s)], [(-pot(g), g)])
+    best, meet = (0, s) if s == g else (INF, None)
+    visited_list = []
+    count = 0
+    while heaps[0] and heaps[1]:
+        for side in (0, 1):
+            h, closed = heaps[side], done[side]
+            while h and closed[h[0][1]]:
+                heapq.heappop(h)
+        if not heaps[0] or not heaps[1]: break
+        if heaps[0][0][0] + heaps[1][0][0] >= 2 * best: break
+        side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        sign = 1 if side == 0 else -1
+        _, u = heapq.heappop(heaps[side])
+        done[side][u] = 1
+        count += 1
+        if record: visited_list.append(u)
+        mine, other = dist[side], dist[1 - side]
+        parent = parents[side]
+        du = mine[u]
+        for d in steps[mask[u]]:
+            v = u + d
+            nd = du + (wt[v] if side == 0 else wt[u])
+            dv = mine[v]
+            if dv < 0 or nd < dv:
+                mine[v] = dv = nd
+                parent[v] = u
+                heapq.heappush(heaps[side], (2 * nd + sign * pot(v), v))
+            if other[v] >= 0 and dv + other[v] < best:
+                best, meet = dv + other[v], v
+    return parents, meet, visited_list, count
 
-            if node not in visited_for_animation:
-                visited_for_animation.append(node)
+def bidirectional_ucs_search(start, goal, tile, weight, rows, cols, record=True):
+    if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    t0 = time.perf_counter()
+    s, g = grid.idx(*start), grid.idx(*goal)
+    parents, meet, visited_list, count = _bidirectional(grid, s, g, lambda v: 0, record)
+    path, cost = _join(parents[0], parents[1], meet, grid) if meet is not None else ([], 0)
+    t = time.perf_counter() - t0
+    return path, _cells(visited_list, cols), count, t, cost
 
-            if node == goal:
-                path, cost = reconstruct_path(parent, start, goal, weight)
-                t = time.perf_counter() - t0
-                visited_count = len(set(visited_for_animation))
-                return path, visited_for_animation, visited_count, t, cost
+# Thế vị trung bình (Ikeda): p = h_xuôi - h_ngược, nhất quán cho cả hai chiều vì mọi weight >= 1
+def bidirectional_astar_search(start, goal, tile, weight, rows, cols, record=True):
+    if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    t0 = time.perf_counter()
+    s, g = grid.idx(*start), grid.idx(*goal)
+    sr, sc = start
+    gr, gc = goal
 
-            if current_depth < depth_limit:
-                for nb in neighbors(node, tile, rows, cols):
-                    if nb not in visited_in_this_dls:
-                        visited_in_this_dls.add(nb)
-                        parent[nb] = node
-                        stack.append((nb, current_depth + 1))
+    def pot(v):
+        r, c = divmod(v, cols)
+        return abs(r - gr) + abs(c - gc) - abs(r - sr) - abs(c - sc)
 
+    parents, meet, visited_list, count = _bidirectional(grid, s, g, pot, record)
+    path, cost = _join(parents[0], parents[1], meet, grid) if meet is not None else ([], 0)
     t = time.perf_counter() - t0
-    visited_count = len(set(visited_for_animation))
-    return [], visited_for_animation, visited_count, t, 0
\ No newline at end of file
+    return path, _cells(visited_list, cols), count, t, cost
@@ -0,0 +1,216 @@
+# benchmark.py
+# Đo hiệu năng các thuật toán không cần pygame:
+#   python benchmark.py --sizes 25x35,100x100 --walls 0.2 --storms 0.1 --repeat 5 --format csv
+#   python benchmark.py --map-files a.gmap,b.txt   (bản đồ đã lưu bằng map_io: dữ liệu cố định giữa các lần chạy)
+#   python benchmark.py --algos UCS,A* --storms 0.6 --open-list heap,indexed,bucket   (so sánh open list)
+#   python benchmark.py --algos A*,Beam --beam-width 1,4,16,64 [--anytime]   (thời gian / chất lượng theo width)
+#   python benchmark.py --startup 5      (thời gian import các module và khởi động giao diện)
+import argparse
+import csv
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import algorithms as algo
+import hpa
+import instrument
+import map_gen
+import map_io
+import open_list
+import reachability
+from searchers import SEARCHERS
+
+FIELDS = ["algo", "open_list", "beam_width", "rows", "cols", "wall", "storm", "runs", "found", "median_s", "p95_s",
+          "expansions", "peak_kb", "cost", "steps", "pushes", "pops", "stale", "neighbors", "peak_open"]
+
+def percentile(values, q):
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(q * (len(values) - 1))))
+    return values[k]
+
+# Mỗi lần chạy là một truy vấn nguội: bỏ các bộ đệm theo grid (D* Lite, đồ thị HPA*, chỉ mục liên
+# thông), nếu không lần đầu gồm cả dựng bộ đệm còn các lần sau chỉ là truy vấn trên bộ đệm
+def reset_caches():
+    algo.reset_planners()
+    hpa.reset()
+    reachability.reset()
+
+def run_once(func, grid, start, goal, kwargs):
+    reset_caches()
+    return func(start, goal, grid, grid.weight, grid.rows, grid.cols, **kwargs)
+
+# Bộ đếm và bộ nhớ đỉnh đo ở một lần chạy riêng vì instrument/tracemalloc làm chậm chương trình
+def measured(func, grid, start, goal, kwargs, profile=False):
+    reset_caches()
+    return instrument.measure(func, start, goal, grid, kwargs, profile=profile)[1]
+
+# Các nhóm (rows, cols, wall, storm, [(grid, start, goal), ...]): sinh ngẫu nhiên theo seed, hoặc
+# mỗi file bản đồ một nhóm (wall/storm là tỷ lệ thực trên bản đồ)
+def cases(sizes, walls, storms, maps, seed, files=(), layout=None):
+    for path in files:
+        grid, start, goal = map_io.read_map(path)
+        tiles = bytes(grid.tile)
+        n = len(grid)
+        yield grid.rows, grid.cols, round(tiles.count(1) / n, 3), round(tiles.count(3) / n, 3), [(grid, start, goal)]
+    if files: return
+    for rows, cols in sizes:
+        for wall in walls:
+            for storm in storms:
+                if layout is None:
+                    group = [map_gen.random_map(rows, cols, wall, storm, seed=seed + k) for k in range(maps)]
+                else:
+                    params = {"wall": wall} if layout == "noise" else {}
+                    group = [map_gen.generate(rows, cols, layout, seed + k, storm, **params) for k in range(maps)]
+                yield rows, cols, wall, storm, group
+
+# Thuật toán nhận tham số open_list: mỗi loại open list trong --open-list là một dòng kết quả riêng
+OPEN_LIST_ALGOS = ("UCS", "A*")
+
+# Beam: mỗi width trong --beam-width là một dòng; cost/steps so với A* cho thấy chất lượng đường đi
+def bench(names, sizes, walls, storms, maps, repeat, seed, beam_widths=(8,), memory=True, record=True, files=(),
+          layout=None, profile=False, open_lists=("heap",), anytime=False):
+    rows_out = []
+    variants = [(name, kind, None) for name in names if name != "Beam"
+                for kind in (open_lists if name in OPEN_LIST_ALGOS else [None])]
+    variants += [("Beam", None, w) for w in (beam_widths if "Beam" in names else [])]
+    for rows, cols, wall, storm, group in cases(sizes, walls, storms, maps, seed, files, layout):
+        for name, kind, width in variants:
+            func = SEARCHERS[name]
+            kwargs = {"beam_width": width, "anytime": anytime} if width else {}
+            if kind: kwargs["open_list"] = kind
+            kwargs["record"] = record
+            times, expansions, costs, steps, counters, found = [], [], [], [], [], 0
+            for grid, start, goal in group:
+                grid.adjacency()
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    path, _, visited_c, _, cost = run_once(func, grid, start, goal, kwargs)
+                    times.append(time.perf_counter() - t0)
+                expansions.append(visited_c)
+                found += bool(path)
+                costs.append(cost)
+                steps.append(len(path))
+                if memory:
+                    counters.append(measured(func, grid, start, goal, kwargs, profile and not counters))
+            rows_out.append({
+                "algo": name, "open_list": kind, "beam_width": width, "rows": rows, "cols": cols, "wall": wall, "storm": storm,
+                "runs": len(times), "found": found,
+                "median_s": statistics.median(times), "p95_s": percentile(times, 0.95),
+                "expansions": statistics.median(expansions),
+                "peak_kb": max(c.peak_kb for c in counters) if counters else None,
+                "cost": statistics.mean(costs), "steps": statistics.mean(steps),
+            })
+            for field in ("pushes", "pops", "stale", "neighbors", "peak_open"):
+                values = [c.as_dict()[field] for c in counters]
+                rows_out[-1][field] = statistics.median(values) if values and None not in values else None
+            if counters and counters[0].profile:
+                rows_out[-1]["profile"] = counters[0].profile
+            print(f"{name:12s} {kind or (width and f'w={width}') or '':8s}{rows}x{cols} wall={wall} storm={storm} "
+                  f"median={rows_out[-1]['median_s']:.4f}s", file=sys.stderr)
+    return rows_out
+
+# ----------------- Thời gian khởi động -----------------
+# Mỗi lần đo là một tiến trình Python mới (như tiến trình con spawn). "import main" là phần tiến trình
+# con của CompareRunner phải trả khi spawn; "main.py --startup" mở cửa sổ (driver dummy), vẽ khung hình đầu.
+STARTUP_CASES = [
+    ("python", "pass"), ("import config", "import config"), ("import algorithms", "import algorithms"),
+    ("import searchers", "import searchers"), ("import main", "import main"),
+]
+
+def startup_times(repeat=5):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    here = os.path.dirname(os.path.abspath(__file__))
+    rows = []
+    for name, code in STARTUP_CASES:
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=here, env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append(time.perf_counter() - t0)
+        rows.append({"what": name, "median_ms": round(1000 * statistics.median(times), 1),
+                     "min_ms": round(1000 * min(times), 1)})
+    phases = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "main.py", "--startup"], cwd=here, env=env, check=True,
+                             capture_output=True, text=True).stdout
+        phases.append(json.loads(out.strip().splitlines()[-1]))
+    for key in phases[0]:
+        values = [p[key] for p in phases]
+        rows.append({"what": f"gui {key[:-3]}", "median_ms": statistics.median(values), "min_ms": min(values)})
+    return rows
+
+def parse_sizes(text):
+    sizes = []
+    for part in text.split(","):
+        r, _, c = part.lower().partition("x")
+        sizes.append((int(r), int(c or r)))
+    return sizes
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark các thuật toán tìm đường (không cần pygame)")
+    ap.add_argument("--sizes", default="25x35,60x80", help="danh sách RxC, ví dụ 25x35,200x200")
+    ap.add_argument("--walls", default="0.2", help="mật độ tường, phân tách bằng dấu phẩy")
+    ap.add_argument("--storms", default="0.1", help="mật độ bão, phân tách bằng dấu phẩy")
+    ap.add_argument("--maps", type=int, default=3, help="số bản đồ cho mỗi cấu hình")
+    ap.add_argument("--repeat", type=int, default=5, help="số lần chạy trên mỗi bản đồ")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--layout", choices=list(map_gen.LAYOUTS),
+                    help="bố cục của map_gen.generate (--walls chỉ dùng cho noise); mặc định random_map cũ")
+    ap.add_argument("--map-files", default="", help="bản đồ đã lưu (.gmap/.txt), phân tách bằng dấu phẩy; bỏ qua --sizes/--walls/--storms")
+    ap.add_argument("--algos", default=",".join(SEARCHERS), help="tên thuật toán, phân tách bằng dấu phẩy")
+    ap.add_argument("--beam-width", default=str(algo.BEAM_WIDTH), help="beam width của Beam, phân tách bằng dấu phẩy")
+    ap.add_argument("--anytime", action="store_true", help="Beam nới rộng beam tới khi tìm được đường")
+    ap.add_argument("--open-list", default="heap",
+                    help=f"open list cho {'/'.join(OPEN_LIST_ALGOS)}, phân tách bằng dấu phẩy: {','.join(open_list.KINDS)}")
+    ap.add_argument("--no-memory", action="store_true", help="bỏ lần chạy đo chi tiết (bộ đếm instrument, tracemalloc)")
+    ap.add_argument("--profile", action="store_true", help="chạy cProfile ở bản đồ đầu mỗi nhóm (chỉ có trong --format json)")
+    ap.add_argument("--no-record", action="store_true", help="chạy record=False (không ghi danh sách ô đã duyệt)")
+    ap.add_argument("--format", choices=["csv", "json"], default="csv")
+    ap.add_argument("--out", help="ghi ra file thay vì stdout")
+    ap.add_argument("--startup", type=int, metavar="N", help="chỉ đo thời gian khởi động (N lần mỗi mục)")
+    args = ap.parse_args(argv)
+
+    if args.startup:
+        results, fields = startup_times(args.startup), ["what", "median_ms", "min_ms"]
+    else:
+        results, fields = run_bench(ap, args), FIELDS
+
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(results, out, indent=2)
+            out.write("\n")
+        else:
+            writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+    finally:
+        if args.out: out.close()
+
+def run_bench(ap, args):
+    names = [n.strip() for n in args.algos.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SEARCHERS]
+    if unknown:
+        ap.error(f"không có thuật toán: {', '.join(unknown)}")
+    open_lists = [k.strip() for k in args.open_list.split(",") if k.strip()]
+    unknown = [k for k in open_lists if k not in open_list.KINDS]
+    if unknown or not open_lists:
+        ap.error(f"open list không hợp lệ: {', '.join(unknown)} (chọn {', '.join(open_list.KINDS)})")
+    try:
+        widths = [int(w) for w in args.beam_width.split(",") if w.strip()]
+    except ValueError:
+        widths = []
+    if not widths or min(widths) < 1:
+        ap.error(f"beam width không hợp lệ: {args.beam_width}")
+    return bench(names, parse_sizes(args.sizes),
+                 [float(x) for x in args.walls.split(",")], [float(x) for x in args.storms.split(",")],
+                 args.maps, args.repeat, args.seed, widths,
+                 memory=not args.no_memory, record=not args.no_record,
+                 files=[f for f in args.map_files.split(",") if f], layout=args.layout, profile=args.profile,
+                 open_lists=open_lists, anytime=args.anytime)
+
+if __name__ == "__main__":
+    main()
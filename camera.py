@@ -0,0 +1,89 @@
+# camera.py
+import math
+
+# Các mức zoom (pixel trên mỗi ô); < 1 nghĩa là một pixel gộp nhiều ô
+ZOOM_LEVELS = [1/16, 1/8, 1/4, 1/2, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48]
+
+# ----------------- Camera -----------------
+# (x, y): toạ độ pixel (ở mức zoom hiện tại) của góc trên trái khung nhìn trên bản đồ.
+# view: vùng màn hình dành cho lưới (x, y, w, h).
+class Camera:
+    def __init__(self, view, rows, cols, scale=None):
+        self.view = view
+        self.rows = rows
+        self.cols = cols
+        self.x = self.y = 0.0
+        self.level = 0
+        if scale is None:
+            self.fit()
+        else:
+            self.level = min(range(len(ZOOM_LEVELS)), key=lambda k: abs(ZOOM_LEVELS[k] - scale))
+            self.clamp()
+
+    @property
+    def scale(self):
+        return ZOOM_LEVELS[self.level]
+
+    # Mức zoom lớn nhất mà toàn bộ bản đồ vẫn nằm trong khung nhìn
+    def fit(self):
+        vw, vh = self.view[2], self.view[3]
+        best = 0
+        for k, s in enumerate(ZOOM_LEVELS):
+            if self.cols * s <= vw and self.rows * s <= vh:
+                best = k
+        self.level = best
+        self.clamp()
+
+    def clamp(self):
+        s = self.scale
+        vw, vh = self.view[2], self.view[3]
+        mw, mh = self.cols * s, self.rows * s
+        self.x = (mw - vw) / 2 if mw <= vw else min(max(self.x, 0), mw - vw)
+        self.y = (mh - vh) / 2 if mh <= vh else min(max(self.y, 0), mh - vh)
+
+    # --- Biến đổi toạ độ ---
+    def cell_to_screen(self, r, c):
+        s = self.scale
+        return self.view[0] + c * s - self.x, self.view[1] + r * s - self.y
+
+    def cell_center(self, r, c):
+        x, y = self.cell_to_screen(r, c)
+        half = self.scale / 2
+        return x + half, y + half
+
+    def screen_to_cell(self, mx, my):
+        s = self.scale
+        return math.floor((my - self.view[1] + self.y) / s), math.floor((mx - self.view[0] + self.x) / s)
+
+    def contains(self, mx, my):
+        vx, vy, vw, vh = self.view
+        return vx <= mx < vx + vw and vy <= my < vy + vh
+
+    # Dải ô nhìn thấy: (r0, r1, c0, c1), nửa mở
+    def visible_cells(self):
+        s = self.scale
+        r0 = max(0, math.floor(self.y / s))
+        c0 = max(0, math.floor(self.x / s))
+        r1 = min(self.rows, math.ceil((self.y + self.view[3]) / s))
+        c1 = min(self.cols, math.ceil((self.x + self.view[2]) / s))
+        return r0, r1, c0, c1
+
+    # --- Điều khiển ---
+    def pan(self, dx, dy):
+        self.x += dx
+        self.y += dy
+        self.clamp()
+
+    # Đổi mức zoom, giữ nguyên ô nằm dưới con trỏ
+    def zoom(self, steps, mx=None, my=None):
+        level = min(max(self.level + steps, 0), len(ZOOM_LEVELS) - 1)
+        if level == self.level: return False
+        if mx is None:
+            mx, my = self.view[0] + self.view[2] / 2, self.view[1] + self.view[3] / 2
+        old = self.scale
+        wx, wy = (mx - self.view[0] + self.x) / old, (my - self.view[1] + self.y) / old
+        self.level = level
+        self.x = wx * self.scale - (mx - self.view[0])
+        self.y = wy * self.scale - (my - self.view[1])
+        self.clamp()
+        return True
@@ -0,0 +1,227 @@
+# compare_runner.py
+import os
+import queue
+import signal
+import time
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from grid import Grid
+import algorithms as algo
+import hpa
+import instrument
+import reachability
+
+# ----------------- Bản đồ trong vùng nhớ chung -----------------
+# Mỗi tiến trình con gắn vào vùng nhớ chung chứa bản đồ (tile | weight) thay vì nhận bản sao qua pickle.
+# Người tạo (share_grid) chịu trách nhiệm close() + unlink() khi xong.
+def share_grid(grid):
+    n = len(grid)
+    shm = shared_memory.SharedMemory(create=True, size=3 * n)
+    shm.buf[:n] = memoryview(grid.tile).cast('B')
+    shm.buf[n:3 * n] = memoryview(grid.weight).cast('B')
+    return shm
+
+# Tiến trình con được tạo dần khi có việc; nếu fork lúc đó chúng giữ bản sao những gì tiến trình chính
+# đang mở (vùng nhớ chung của lượt chạy đầu, socket...) => tạo qua forkserver / spawn
+def mp_context():
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+_attached = {}      # tên vùng nhớ -> (grid, shm, các memoryview trên shm.buf)
+_stale = []         # vùng nhớ cũ chưa đóng được vì bộ đệm còn được dùng, thử lại lần sau
+
+# Đóng vùng nhớ chỉ được khi không còn memoryview nào trên shm.buf: bỏ các cache theo grid
+# (D* Lite, HPA*, chỉ mục liên thông) rồi release() các view của Grid trước shm.close()
+def _release(entry):
+    grid, shm, views = entry
+    algo.reset_planners()
+    hpa.reset()
+    reachability.reset()
+    try:
+        for view in views:
+            view.release()
+        shm.close()
+    except BufferError:
+        _stale.append(entry)
+        return False
+    return True
+
+def attach_grid(shm_name, rows, cols):
+    entry = _attached.get(shm_name)
+    if entry is None:
+        stale = _stale[:] + [_attached.pop(old) for old in list(_attached)]
+        _stale.clear()
+        for old in stale:
+            _release(old)
+        shm = shared_memory.SharedMemory(name=shm_name)
+        n = rows * cols
+        raw = shm.buf[n:3 * n]
+        views = [shm.buf[:n], raw.cast('H'), raw]
+        grid = Grid(rows, cols, views[0], views[1])
+        grid.version = -1
+        entry = _attached[shm_name] = (grid, shm, views)
+    return entry[0]
+
+# Bảng so sánh chỉ cần số ô đã duyệt: chạy record=False, không gửi danh sách ô về tiến trình chính.
+# metrics: None, "count" (bộ đếm + bộ nhớ đỉnh của instrument) hoặc "profile" (thêm cProfile)
+def _call(func, grid, start, goal, kwargs, metrics=None):
+    kwargs = dict(kwargs, record=False)
+    if metrics:
+        (path, _, visited_c, t, cost), c = instrument.measure(func, start, goal, grid, kwargs,
+                                                              profile=metrics == "profile")
+        return {"path": path, "visited": visited_c, "time": t, "cost": cost, "metrics": c.as_dict()}
+    path, _, visited_c, t, cost = func(start, goal, grid, grid.weight, grid.rows, grid.cols, **kwargs)
+    return {"path": path, "visited": visited_c, "time": t, "cost": cost}
+
+# Tiến trình con báo về tiến trình chính qua hàng đợi sự kiện: ("pid", pid) khi khởi động,
+# ("start", task, thời điểm) khi một tác vụ bắt đầu chạy thật sự (time.monotonic dùng chung giữa các tiến trình)
+_events = None
+
+def _init_worker(events):
+    global _events
+    _events = events
+    events.put(("pid", os.getpid()))
+
+def _run(func, shm_name, rows, cols, start, goal, kwargs, metrics=None, task=None):
+    if _events is not None and task is not None:
+        _events.put(("start", task, time.monotonic()))
+    return _call(func, attach_grid(shm_name, rows, cols), start, goal, kwargs, metrics)
+
+def _picklable(func):
+    try:
+        pickle.dumps(func)
+        return getattr(func, "__self__", None) is None
+    except Exception:
+        return False
+
+# ----------------- Runner -----------------
+# Chạy tất cả thuật toán song song trên ProcessPoolExecutor; vòng lặp UI gọi poll() mỗi khung hình
+# để lấy kết quả đã xong và đánh dấu thuật toán chạy quá timeout.
+class CompareRunner:
+    def __init__(self, max_workers=None, timeout=10.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.pool = None
+        self.events = None      # hàng đợi sự kiện của pool hiện tại (xem _init_worker)
+        self.pids = set()       # pid các tiến trình con của pool hiện tại
+        self.run_id = 0
+        self.shm = None
+        self.pending = {}       # tên -> future
+        self.started = {}       # tên -> thời điểm bắt đầu chạy thật sự
+        self.inline = []        # thuật toán không gửi sang tiến trình con được (có trạng thái riêng)
+        self.timed_out = []     # future quá hạn, có thể vẫn đang chiếm một worker
+        self.total = 0
+        self.metrics = None
+
+    @property
+    def running(self):
+        return bool(self.pending or self.inline)
+
+    def start(self, grid, start, goal, searchers, kwargs=None, metrics=None):
+        self.cancel()
+        kwargs = kwargs or {}
+        self.metrics = metrics
+        if self.pool is None:
+            ctx = mp_context()
+            self.events = ctx.Queue()
+            self.pids = set()
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx,
+                                            initializer=_init_worker, initargs=(self.events,))
+        self.shm = share_grid(grid)
+        self.grid, self.query = grid, (start, goal)
+        self.total = len(searchers)
+        self.run_id += 1
+        for name, func in searchers.items():
+            if _picklable(func):
+                self.pending[name] = self.pool.submit(_run, func, self.shm.name, grid.rows, grid.cols,
+                                                      start, goal, kwargs.get(name, {}), metrics,
+                                                      (self.run_id, name))
+            else:
+                self.inline.append((name, func, kwargs.get(name, {})))
+
+    # Nhận pid và thời điểm bắt đầu tác vụ từ tiến trình con (bỏ sự kiện của lượt chạy cũ)
+    def _drain_events(self):
+        while self.events is not None:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "pid":
+                self.pids.add(event[1])
+            elif event[1][0] == self.run_id:
+                self.started[event[1][1]] = event[2]
+
+    def poll(self):
+        done = []
+        self._drain_events()
+        now = time.monotonic()
+        for name, fut in list(self.pending.items()):
+            if fut.done():
+                del self.pending[name]
+                try:
+                    done.append((name, fut.result()))
+                except Exception as e:
+                    done.append((name, {"path": [], "visited": 0, "time": 0.0, "cost": 0, "status": f"lỗi: {e}"}))
+            elif name in self.started:
+                # Tính từ lúc tiến trình con thật sự bắt đầu tác vụ, không tính thời gian chờ trong hàng
+                t0 = self.started[name]
+                if now - t0 > self.timeout:
+                    del self.pending[name]
+                    self.timed_out.append(fut)
+                    done.append((name, {"path": [], "visited": 0, "time": now - t0, "cost": 0, "status": "timeout"}))
+        # Thuật toán chạy tại chỗ: mỗi lần poll chạy một cái để không chặn khung hình quá lâu
+        if self.inline:
+            name, func, kw = self.inline.pop(0)
+            start, goal = self.query
+            done.append((name, _call(func, self.grid, start, goal, kw, self.metrics)))
+        if not self.running:
+            self._finish()
+        return done
+
+    def _finish(self):
+        if any(fut.running() for fut in self.timed_out):
+            self._kill_pool()
+        self.timed_out.clear()
+        self.started.clear()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def cancel(self):
+        for fut in self.pending.values():
+            fut.cancel()
+        self.timed_out.extend(self.pending.values())
+        self.pending.clear()
+        self.inline.clear()
+        self._finish()
+
+    # Không có cách dừng một tác vụ đang chạy trong ProcessPoolExecutor: bỏ cả pool (dừng các tiến trình
+    # con theo pid đã báo về), tạo lại lần sau
+    def _kill_pool(self):
+        if self.pool is None: return
+        self._drain_events()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        for pid in self.pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        self.pool = None
+        self._close_events()
+
+    def _close_events(self):
+        if self.events is not None:
+            self.events.close()
+            self.events.cancel_join_thread()
+            self.events = None
+        self.pids = set()
+
+    def close(self):
+        self.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        self._close_events()
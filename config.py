@@ -1,14 +1,25 @@
 # config.py
-import pygame
+# Chỉ hằng số (không import pygame): module tìm đường, tiến trình con, benchmark import nhanh.
+# Font và ảnh được tạo khi dùng lần đầu trong resources.py.
 
 # ----------------- Cấu hình -----------------
-ROWS, COLS = 25, 35 # Kích thước lưới
+ROWS, COLS = 25, 35 # Kích thước khung nhìn (ô)
 CELL = 24           # Kích thước ô
+MAP_SIZES = ((25, 35), (100, 140), (250, 350), (1000, 1400)) # Kích thước bản đồ của menu "Kích thước map"
+MAP_ROWS, MAP_COLS = MAP_SIZES[1]  # Bản đồ lúc khởi động, lớn hơn khung nhìn (zoom/kéo để xem)
 PANEL_W = 280       # Chiều rộng Panel
 WIDTH, HEIGHT = PANEL_W + COLS*CELL, ROWS*CELL
 
 FPS = 60
 MOVE_SPEED = 0.05   # Tốc độ di chuyển
+STEP_BUDGET = 0.008 # Thời gian tìm kiếm tối đa mỗi khung hình khi vẽ dần (giây)
+ANIM_CELLS = 5      # Số ô duyệt tối thiểu hiện thêm mỗi khung hình
+FLEET_SIZE = 10     # Số robot khi chạy nhiều robot (gồm cả robot chính nếu có start/goal)
+MAP_FILE = "map.gmap" # File lưu/tải bản đồ trong UI (.gmap nhị phân hoặc .txt văn bản, xem map_io.py)
+METRICS_FILE = "metrics.json" # File xuất số liệu đo chi tiết (instrument.export_json)
+OPEN_LIST = "heap"   # Open list của UCS/A* lúc khởi động: "heap", "indexed" hoặc "bucket" (open_list.py)
+BEAM_WIDTH = 8      # Beam width lúc khởi động (đổi bằng menu "9.")
+BEAM_SWEEP = (1, 2, 4, 8, 16, 32, 64, 128) # Các beam width của menu "9." và "Quét beam width"
 BASE_X = PANEL_W    # Toạ độ X bắt đầu của lưới
 
 # Màu
@@ -31,15 +42,28 @@ TABLE_BORDER = (100, 100, 100)
 PATH_COLORS = {
     "BFS": (255, 230, 0), "DFS": (255, 100, 100), "UCS": (0, 255, 0),
     "A*": (255, 165, 0), "Greedy": (0, 255, 255), "Beam": (255, 0, 255),
-    "IDS": (100, 100, 255)
+    "IDS": (100, 100, 255), "BFS (NumPy)": (255, 250, 160), "UCS (NumPy)": (150, 255, 150),
+    "UCS (Cache)": (120, 220, 120), "D* Lite": (255, 140, 200), "HPA*": (220, 90, 255),
+    "JPS": (255, 200, 120), "Bi-BFS": (200, 180, 0), "Bi-UCS": (0, 180, 0),
+    "Bi-A*": (200, 120, 0), "IDA*": (160, 160, 255)
 }
 
+# Màu cho từng robot trong đội
+FLEET_COLORS = [
+    (255, 165, 0), (0, 255, 255), (255, 0, 255), (255, 230, 0), (0, 255, 0),
+    (255, 100, 100), (100, 100, 255), (255, 255, 255), (255, 140, 200), (150, 255, 150)
+]
+
 # Thay đổi kích thước nút
 BTN_H = 40 # Chiều cao nút
 PADDING = 4
 
-# Khởi tạo font chữ (cần pygame.init() trước)
-pygame.init()
-font = pygame.font.SysFont("Verdana", 14)
-bigfont = pygame.font.SysFont("Arial", 20, bold=True)
-headerfont = pygame.font.SysFont("Arial", 16, bold=True)
\ No newline at end of file
+# Font chữ: tên -> (font hệ thống, cỡ, đậm), tạo trong resources.py
+FONTS = {
+    "font": ("Verdana", 14, False),
+    "bigfont": ("Arial", 20, True),
+    "headerfont": ("Arial", 16, True),
+}
+
+# Ảnh ô: tên -> file (thiếu file thì vẽ bằng màu)
+IMAGES = {"wall": "tuong.png", "road": "duongdi.png", "robot": "robot.png", "customer": "khachhang.png"}
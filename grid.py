@@ -0,0 +1,148 @@
+# grid.py
+from array import array
+
+# Mã địa hình (giống main.py)
+WATER, WALL, STORM = 0, 1, 3
+WALL_WEIGHT = 999
+
+# Bit hướng mở của mỗi ô (theo thứ tự duyệt của neighbors(): xuống, lên, phải, trái)
+DOWN, UP, RIGHT, LEFT = 1, 2, 4, 8
+
+# ----------------- Lưới phẳng -----------------
+# Ô (r, c) được đánh số nguyên i = r*cols + c.
+# tile: array('B') (1 byte/ô), weight: array('H') (2 byte/ô).
+class Grid:
+    __slots__ = ("rows", "cols", "tile", "weight", "version", "_mask", "_steps")
+
+    def __init__(self, rows, cols, tile=None, weight=None):
+        n = rows * cols
+        self.rows = rows
+        self.cols = cols
+        self.tile = tile if tile is not None else array('B', bytes(n))
+        self.weight = weight if weight is not None else array('H', [1]) * n
+        self.version = 0    # tăng mỗi khi địa hình/chi phí thay đổi (dùng để huỷ cache)
+        self._mask = None
+        self._steps = [tuple(d for bit, d in ((DOWN, cols), (UP, -cols), (RIGHT, 1), (LEFT, -1)) if m & bit)
+                       for m in range(16)]
+
+    @classmethod
+    def from_lists(cls, tile, weight, rows, cols):
+        t = array('B', bytes(rows * cols))
+        w = array('H', [1]) * (rows * cols)
+        for r in range(rows):
+            base = r * cols
+            t[base:base + cols] = array('B', tile[r][:cols])
+            w[base:base + cols] = array('H', weight[r][:cols])
+        return cls(rows, cols, t, w)
+
+    def to_lists(self):
+        cols = self.cols
+        tile = [list(self.tile[r*cols:(r+1)*cols]) for r in range(self.rows)]
+        weight = [list(self.weight[r*cols:(r+1)*cols]) for r in range(self.rows)]
+        return tile, weight
+
+    def copy(self):
+        return Grid(self.rows, self.cols, array('B', self.tile), array('H', self.weight))
+
+    def __len__(self):
+        return self.rows * self.cols
+
+    # --- Chuyển đổi toạ độ ---
+    def idx(self, r, c):
+        return r * self.cols + c
+
+    def pos(self, i):
+        return divmod(i, self.cols)
+
+    def in_bounds(self, r, c):
+        return 0 <= r < self.rows and 0 <= c < self.cols
+
+    # --- Đọc / ghi ô ---
+    def tile_at(self, r, c):
+        return self.tile[r * self.cols + c]
+
+    def weight_at(self, r, c):
+        return self.weight[r * self.cols + c]
+
+    def set_cell(self, r, c, t, w):
+        i = r * self.cols + c
+        if self.tile[i] == t and self.weight[i] == w: return
+        self.version += 1
+        if self._mask is not None and (self.tile[i] == WALL) != (t == WALL):
+            self._update_adjacency(r, c, t != WALL)
+        self.tile[i] = t
+        self.weight[i] = w
+
+    def fill(self, t, w):
+        n = self.rows * self.cols
+        self.tile[:] = array('B', [t]) * n
+        self.weight[:] = array('H', [w]) * n
+        self.invalidate()
+
+    # Gọi sau khi ghi thẳng vào tile/weight (không qua set_cell)
+    def invalidate(self):
+        self.version += 1
+        self._mask = None
+
+    # --- Chỉ mục kề ---
+    # _mask[i] là bitmask các hướng đi được từ ô i (ô kề nằm trong lưới và không phải tường),
+    # _steps[mask] là bộ độ lệch chỉ số tương ứng => duyệt kề không cần kiểm tra biên.
+    def adjacency(self):
+        if self._mask is None:
+            self._build_adjacency()
+        return self._mask, self._steps
+
+    def _build_adjacency(self):
+        rows, cols, tile = self.rows, self.cols, self.tile
+        mask = array('B', bytes(rows * cols))
+        for r in range(rows):
+            base = r * cols
+            for c in range(cols):
+                i = base + c
+                m = 0
+                if r + 1 < rows and tile[i + cols] != WALL: m |= DOWN
+                if r > 0 and tile[i - cols] != WALL: m |= UP
+                if c + 1 < cols and tile[i + 1] != WALL: m |= RIGHT
+                if c > 0 and tile[i - 1] != WALL: m |= LEFT
+                mask[i] = m
+        self._mask = mask
+
+    # Ô (r, c) đổi giữa tường/không tường: chỉ 4 ô kề cần sửa bit hướng về (r, c)
+    def _update_adjacency(self, r, c, is_open):
+        cols, mask = self.cols, self._mask
+        i = r * cols + c
+        for ok, j, bit in ((r > 0, i - cols, DOWN), (r + 1 < self.rows, i + cols, UP),
+                           (c > 0, i - 1, RIGHT), (c + 1 < cols, i + 1, LEFT)):
+            if ok:
+                mask[j] = (mask[j] | bit) if is_open else (mask[j] & ~bit)
+
+    # tile bị ghi thẳng từ nơi khác (vd. tiến trình khác qua vùng nhớ chung): sửa chỉ mục kề theo các ô
+    # đổi giữa tường/không tường so với bản chụp old, không dựng lại toàn bộ như invalidate()
+    def refresh(self, old):
+        self.version += 1
+        if self._mask is None: return
+        tile, cols = self.tile, self.cols
+        for i in changed_cells(old, tile):
+            if (old[i] == WALL) != (tile[i] == WALL):
+                self._update_adjacency(i // cols, i % cols, tile[i] != WALL)
+
+    def neighbors(self, i):
+        mask, steps = self.adjacency()
+        for d in steps[mask[i]]:
+            yield i + d
+
+# Các ô khác nhau giữa hai bản chụp (so sánh từng khối trong C, chỉ duyệt khối khác nhau)
+def changed_cells(old, new, chunk=4096):
+    out = []
+    for i in range(0, len(new), chunk):
+        a, b = old[i:i + chunk], new[i:i + chunk]
+        if a != b:
+            out.extend(i + j for j, (x, y) in enumerate(zip(a, b)) if x != y)
+    return out
+
+# ----------------- Adapter -----------------
+# Các thuật toán nhận cả Grid lẫn dạng list-of-lists cũ (tile, weight).
+def as_grid(tile, weight, rows, cols):
+    if isinstance(tile, Grid):
+        return tile
+    return Grid.from_lists(tile, weight, rows, cols)
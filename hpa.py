@@ -0,0 +1,352 @@
+# hpa.py
+# Tìm đường phân cấp HPA* (Botea và cộng sự): chia lưới thành các cụm size x size ô,
+#   - cửa (entrance): mỗi đoạn biên liên tục mở ở cả hai phía giữa hai cụm kề nhau cho một cặp ô
+#     (ở giữa đoạn, hoặc hai cặp ở hai đầu nếu đoạn dài); hai ô của cặp là hai nút trừu tượng,
+#   - cạnh trong cụm: chi phí Dijkstra chỉ trong cụm giữa mọi cặp nút của cụm (kèm đoạn đường đi),
+#   - truy vấn: nối start/goal vào các nút của cụm chứa chúng bằng Dijkstra cục bộ, A* trên đồ thị
+#     trừu tượng rồi ghép các đoạn đã lưu => thời gian theo số cụm, không theo số ô.
+# Đường đi gần tối ưu (chỉ đi qua các cửa đã chọn). Chi phí bước là weight của ô đi vào.
+import argparse
+import heapq
+import random
+import time
+from array import array
+from grid import Grid, WALL, changed_cells, as_grid
+import algorithms as algo
+
+CLUSTER = 16        # cạnh một cụm (ô)
+SPLIT = 6           # đoạn biên dài từ SPLIT ô trở lên có hai cửa ở hai đầu
+FULL_REBUILD = 0.25 # đổi quá tỷ lệ này số ô: dựng lại toàn bộ
+
+START, GOAL = -2, -1    # nút ảo khi truy vấn
+
+# ----------------- Đồ thị trừu tượng -----------------
+# edges[a] = {b: (chi phí, đoạn ô sau a tới hết b)}; nodes[k] = tập nút của cụm k;
+# borders[(k, k2)] = các cặp (a, b) của biên giữa cụm k và cụm kề phải/dưới k2.
+# Khi địa hình đổi (so với bản chụp tile/weight) chỉ quét lại các biên chứa ô đổi và tính lại
+# cạnh trong các cụm chứa ô đổi hoặc có biên bị quét lại.
+class HPAStar:
+    def __init__(self, grid, size=CLUSTER):
+        self.grid = grid
+        self.size = size
+        self.krows = -(-grid.rows // size)
+        self.kcols = -(-grid.cols // size)
+        self.edges = {}
+        self.nodes = {}
+        self.borders = {}
+        self.version = None
+        self.tile = self.weight = None
+        self.rebuilt = 0        # số cụm tính lại ở lần cập nhật gần nhất
+        self.build_s = 0.0      # thời gian của lần cập nhật gần nhất
+        self.expanded = 0
+
+    def cluster(self, i):
+        cols, s = self.grid.cols, self.size
+        return (i // cols // s) * self.kcols + (i % cols) // s
+
+    def _bounds(self, k):
+        s = self.size
+        r0, c0 = (k // self.kcols) * s, (k % self.kcols) * s
+        return r0, min(self.grid.rows, r0 + s), c0, min(self.grid.cols, c0 + s)
+
+    def _neighbors(self, k):
+        kr, kc = divmod(k, self.kcols)
+        if kc + 1 < self.kcols: yield k, k + 1
+        if kr + 1 < self.krows: yield k, k + self.kcols
+        if kc > 0: yield k - 1, k
+        if kr > 0: yield k - self.kcols, k
+
+    # --- Dijkstra trong một cụm ---
+    # reverse=True: dist[v] là chi phí đi từ v tới src, parent[v] là ô kế tiếp về phía src.
+    # Dừng sớm khi mọi ô trong targets đã chốt.
+    def _local(self, k, src, targets=(), reverse=False):
+        grid = self.grid
+        cols, wt = grid.cols, grid.weight
+        mask, steps = grid.adjacency()
+        r0, r1, c0, c1 = self._bounds(k)
+        dist, parent = {}, {src: src}
+        left = len(targets)
+        best = {src: 0}
+        pq = [(0, src)]
+        while pq:
+            d, u = heapq.heappop(pq)
+            if u in dist: continue
+            dist[u] = d
+            if u in targets:
+                left -= 1
+                if left <= 0: break
+            for dd in steps[mask[u]]:
+                v = u + dd
+                if v in dist: continue
+                r, c = divmod(v, cols)
+                if not (r0 <= r < r1 and c0 <= c < c1): continue
+                nd = d + (wt[u] if reverse else wt[v])
+                if nd < best.get(v, nd + 1):
+                    best[v] = nd
+                    parent[v] = u
+                    heapq.heappush(pq, (nd, v))
+        return dist, parent
+
+    # --- Cửa trên một biên ---
+    def _scan(self, key):
+        k, k2 = key
+        grid = self.grid
+        cols, tile, wt = grid.cols, grid.tile, grid.weight
+        r0, r1, c0, c1 = self._bounds(k)
+        # Xét hướng theo hàng/cột cụm: khi chỉ có một cột cụm thì k + kcols cũng bằng k + 1
+        if k2 != k + self.kcols:    # biên dọc: cột c1 - 1 của k và cột c1 của k2
+            pairs = [((r * cols + c1 - 1), (r * cols + c1)) for r in range(r0, r1)]
+        else:                       # biên ngang: hàng r1 - 1 của k và hàng r1 của k2
+            pairs = [(((r1 - 1) * cols + c), (r1 * cols + c)) for c in range(c0, c1)]
+        edges = self.edges
+        out = []
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and tile[a] != WALL and tile[b] != WALL:
+                run.append((a, b))
+                continue
+            if run:
+                out.extend((run[0], run[-1]) if len(run) >= SPLIT else (run[len(run) // 2],))
+                run = []
+        for a, b in out:
+            edges.setdefault(a, {})[b] = (wt[b], (b,))
+            edges.setdefault(b, {})[a] = (wt[a], (a,))
+        self.borders[key] = out
+
+    def _unscan(self, key):
+        edges = self.edges
+        for a, b in self.borders.pop(key, ()):
+            edges.get(a, {}).pop(b, None)
+            edges.get(b, {}).pop(a, None)
+
+    # --- Cạnh trong cụm ---
+    def _connect(self, k):
+        old = self.nodes.get(k, set())
+        nodes = set()
+        for key in self._neighbors(k):
+            for pair in self.borders.get(key, ()):
+                nodes.update(x for x in pair if self.cluster(x) == k)
+        edges = self.edges
+        for a in old - nodes:
+            edges.pop(a, None)
+        for a in nodes:
+            out = edges.setdefault(a, {})
+            for b in [b for b in out if self.cluster(b) == k]:
+                del out[b]
+        for a in nodes:
+            dist, parent = self._local(k, a, nodes)
+            out = edges[a]
+            for b in nodes:
+                if b == a or b not in dist: continue
+                seg = [b]
+                while parent[seg[-1]] != a:
+                    seg.append(parent[seg[-1]])
+                seg.reverse()
+                out[b] = (dist[b], tuple(seg))
+        self.nodes[k] = nodes
+
+    # --- Đồng bộ với grid ---
+    def sync(self):
+        grid = self.grid
+        if grid.version == self.version: return
+        t0 = time.perf_counter()
+        if self.tile is None:
+            changed = None
+        else:
+            changed = set(changed_cells(self.tile, grid.tile)) | set(changed_cells(self.weight, grid.weight))
+            if len(changed) > FULL_REBUILD * len(grid): changed = None
+        if changed is None:
+            self.edges, self.nodes, self.borders = {}, {}, {}
+            clusters = range(self.krows * self.kcols)
+            borders = {key for k in clusters for key in self._neighbors(k)}
+        else:
+            s, kcols = self.size, self.kcols
+            clusters, borders = set(), set()
+            for i in changed:
+                r, c = divmod(i, grid.cols)
+                kr, kc = r // s, c // s
+                k = kr * kcols + kc
+                clusters.add(k)
+                # Ô nằm sát biên của cụm: cửa trên biên đó có thể đổi
+                if c % s == s - 1 and kc + 1 < kcols: borders.add((k, k + 1))
+                if c % s == 0 and kc > 0: borders.add((k - 1, k))
+                if r % s == s - 1 and kr + 1 < self.krows: borders.add((k, k + kcols))
+                if r % s == 0 and kr > 0: borders.add((k - kcols, k))
+            clusters |= {k for key in borders for k in key}
+        for key in borders:
+            self._unscan(key)
+            self._scan(key)
+        for k in clusters:
+            self._connect(k)
+        self.tile, self.weight = array('B', grid.tile), array('H', grid.weight)
+        self.version = grid.version
+        self.rebuilt = len(clusters)
+        self.build_s = time.perf_counter() - t0
+
+    # --- Truy vấn ---
+    # Trả về (danh sách id ô, chi phí, các ô đã duyệt); ([], 0, ...) nếu không tới được
+    def query(self, s, g, record=True):
+        self.sync()
+        if s == g: return [s], 0, [s]
+        cols = self.grid.cols
+        ks, kg = self.cluster(s), self.cluster(g)
+        ns, ng = self.nodes.get(ks, set()), self.nodes.get(kg, set())
+        fdist, fpar = self._local(ks, s, ns | {g} if ks == kg else ns)
+        rdist, rpar = self._local(kg, g, ng, reverse=True)
+        gr, gc = divmod(g, cols)
+        h = lambda u: abs(u // cols - gr) + abs(u % cols - gc)
+
+        best, parent = {}, {}
+        pq = []
+        if g in fdist:
+            best[GOAL], parent[GOAL] = fdist[g], START
+            pq.append((fdist[g], fdist[g], GOAL))
+        for a in ns:
+            if a in fdist:
+                best[a], parent[a] = fdist[a], START
+                pq.append((fdist[a] + h(a), fdist[a], a))
+        heapq.heapify(pq)
+        edges = self.edges
+        done = set()
+        order = []
+        while pq:
+            _, d, u = heapq.heappop(pq)
+            if u in done: continue
+            if u == GOAL: break
+            done.add(u)
+            if record: order.append(u)
+            if u in rdist:
+                nd = d + rdist[u]
+                if nd < best.get(GOAL, nd + 1):
+                    best[GOAL], parent[GOAL] = nd, u
+                    heapq.heappush(pq, (nd, nd, GOAL))
+            for v, (c, _) in edges.get(u, {}).items():
+                nd = d + c
+                if v not in done and nd < best.get(v, nd + 1):
+                    best[v], parent[v] = nd, u
+                    heapq.heappush(pq, (nd + h(v), nd, v))
+        self.expanded = len(done) + len(fdist) + len(rdist)
+        visited = list(dict.fromkeys([*fdist, *rdist, *order])) if record else []
+        if GOAL not in best: return [], 0, visited
+
+        chain = [GOAL]
+        while chain[-1] != START:
+            chain.append(parent[chain[-1]])
+        chain.reverse()
+        first = chain[1] if chain[1] != GOAL else g
+        ids = [first]
+        while ids[-1] != s:
+            ids.append(fpar[ids[-1]])
+        ids.reverse()
+        for a, b in zip(chain[1:-1], chain[2:-1]):
+            ids.extend(edges[a][b][1])
+        if chain[-2] != START:
+            u = chain[-2]
+            while u != g:
+                u = rpar[u]
+                ids.append(u)
+        return ids, best[GOAL], visited
+
+_hpa = None
+
+# Bỏ đồ thị đang giữ (vd. trước khi đóng vùng nhớ chung chứa grid của nó)
+def reset():
+    global _hpa
+    _hpa = None
+
+# Cùng chữ ký và bộ kết quả với các hàm trong SEARCHERS. Đồ thị trừu tượng giữ giữa các lần gọi
+# trên cùng grid; thời gian trả về chỉ tính truy vấn (cập nhật đồ thị ghi ở _hpa.build_s).
+def hpa_search(start, goal, tile, weight, rows, cols, record=True):
+    global _hpa
+    if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    if _hpa is None or _hpa.grid is not grid:
+        _hpa = HPAStar(grid)
+    _hpa.sync()
+    t0 = time.perf_counter()
+    ids, cost, visited = _hpa.query(grid.idx(*start), grid.idx(*goal), record)
+    t = time.perf_counter() - t0
+    return algo._cells(ids, cols), algo._cells(visited, cols), _hpa.expanded, t, cost
+
+# ----------------- Kiểm tra -----------------
+# HPA* phải tìm được đường khi UCS tìm được, kể cả khi lưới chỉ có một hàng/cột cụm
+# (vd. 40x9: cụm kề dưới k + kcols trùng k + 1). Trả về số truy vấn sai.
+CHECK_SHAPES = ((40, 9), (9, 40), (50, 16), (16, 50), (40, 17), (33, 33))
+
+def check(shapes=CHECK_SHAPES, walls=0.2, queries=30, seed=0):
+    rng = random.Random(seed)
+    bad = 0
+    for rows, cols in shapes:
+        grid = Grid(rows, cols)
+        for i in range(rows * cols):
+            if rng.random() < walls: grid.tile[i], grid.weight[i] = WALL, 999
+        grid.invalidate()
+        hpa = HPAStar(grid)
+        open_cells = [i for i in range(rows * cols) if grid.tile[i] != WALL]
+        for _ in range(queries):
+            s, g = rng.choice(open_cells), rng.choice(open_cells)
+            ids, _, _ = hpa.query(s, g, record=False)
+            path = algo.ucs_search(grid.pos(s), grid.pos(g), grid, grid.weight, rows, cols, record=False)[0]
+            if bool(ids) != bool(path):
+                bad += 1
+                print(f"{rows}x{cols}: {grid.pos(s)} -> {grid.pos(g)} HPA* {len(ids)} ô, UCS {len(path)} ô")
+    return bad
+
+# ----------------- Đo độ trễ -----------------
+#   python hpa.py --size 512 --walls 0.2 --queries 20 --edits 20
+#   python hpa.py --check
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="So sánh HPA* với A* trên các tuyến dài")
+    ap.add_argument("--size", type=int, default=256)
+    ap.add_argument("--cluster", type=int, default=CLUSTER)
+    ap.add_argument("--walls", type=float, default=0.2)
+    ap.add_argument("--queries", type=int, default=10)
+    ap.add_argument("--edits", type=int, default=10, help="số ô sửa ngẫu nhiên để đo cập nhật cục bộ")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--check", action="store_true", help="so khớp khả năng tới đích với UCS trên lưới hẹp/cao")
+    args = ap.parse_args(argv)
+    if args.check:
+        bad = check(seed=args.seed)
+        print("kiểm tra:", "ok" if not bad else f"{bad} truy vấn sai")
+        raise SystemExit(1 if bad else 0)
+
+    rng = random.Random(args.seed)
+    n = args.size
+    grid = Grid(n, n)
+    for i in range(n * n):
+        x = rng.random()
+        if x < args.walls: grid.tile[i], grid.weight[i] = WALL, 999
+        elif x < args.walls + 0.1: grid.tile[i], grid.weight[i] = 3, 3
+    grid.invalidate()
+    hpa = HPAStar(grid, args.cluster)
+    hpa.sync()
+    print(f"dựng: {hpa.build_s:.2f}s, {len(hpa.nodes)} cụm, {sum(map(len, hpa.nodes.values()))} nút")
+
+    open_cells = [i for i in range(n * n) if grid.tile[i] != WALL]
+    t_hpa = t_astar = 0.0
+    gap = []
+    for _ in range(args.queries):
+        s = rng.choice(open_cells[:n * 8])
+        g = rng.choice(open_cells[-n * 8:])
+        t0 = time.perf_counter()
+        _, cost, _ = hpa.query(s, g, record=False)
+        t_hpa += time.perf_counter() - t0
+        _, _, _, t, best = algo.astar_search(grid.pos(s), grid.pos(g), grid, grid.weight, n, n, record=False)
+        t_astar += t
+        if best: gap.append(cost / best - 1)
+    q = args.queries
+    print(f"truy vấn: HPA* {t_hpa / q * 1000:.2f}ms, A* {t_astar / q * 1000:.2f}ms, "
+          f"chênh chi phí TB {100 * sum(gap) / max(1, len(gap)):.2f}%")
+
+    rebuild = []
+    for _ in range(args.edits):
+        r, c = rng.randrange(n), rng.randrange(n)
+        grid.set_cell(r, c, *((0, 1) if grid.tile_at(r, c) == WALL else (WALL, 999)))
+        hpa.sync()
+        rebuild.append((hpa.build_s, hpa.rebuilt))
+    if rebuild:
+        print(f"sửa một ô: {sum(t for t, _ in rebuild) / len(rebuild) * 1000:.2f}ms, "
+              f"TB {sum(k for _, k in rebuild) / len(rebuild):.1f} cụm tính lại")
+
+if __name__ == "__main__":
+    main()
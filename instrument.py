@@ -0,0 +1,206 @@
+# instrument.py
+# Đo chi tiết một lần tìm đường (không phụ thuộc pygame, dùng được trong tiến trình con/benchmark):
+#   - push / pop trên open list (heapq, deque hoặc open_list.py), số pop bị bỏ qua vì mục cũ (stale),
+#   - số lần hỏi danh sách ô kề, kích thước open list lớn nhất,
+#   - bộ nhớ đỉnh (tracemalloc), tuỳ chọn cProfile (các hàm tốn thời gian nhất).
+# Chỉ khi đang đo mới thay `heapq` / `deque` / `make_open` (open_list.make) trong các module đã đăng ký
+# và bọc Grid.adjacency(), nên chạy thường không tốn thêm gì. Thời gian đo được khi bật đếm/cProfile chậm hơn chạy thường.
+import cProfile
+import heapq
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+import algorithms
+import hpa
+from grid import Grid
+
+FIELDS = ["pushes", "pops", "stale", "neighbors", "peak_open", "peak_kb"]
+
+# Các module được thay heapq/deque khi đo (thêm bằng register())
+_modules = [algorithms, hpa]
+
+def register(module):
+    if module not in _modules:
+        _modules.append(module)
+
+# ----------------- Bộ đếm -----------------
+# stale: pop không dẫn tới mở rộng ô nào — sau pop đó là một pop khác mà không có lần hỏi ô kề hay
+# push nào xen giữa (đúng với kiểu "if closed[u]: continue" của các thuật toán trong repo).
+class Counters:
+    def __init__(self):
+        self.pushes = 0
+        self.pops = 0
+        self.stale = 0
+        self.neighbors = 0
+        self.peak_open = 0
+        self.peak_kb = None
+        self.profile = None
+        self._pending = False
+
+    def _pop(self):
+        if self._pending: self.stale += 1
+        self.pops += 1
+        self._pending = True
+
+    def _push(self, size):
+        self.pushes += 1
+        self._pending = False
+        if size > self.peak_open: self.peak_open = size
+
+    def as_dict(self):
+        out = {name: getattr(self, name) for name in FIELDS}
+        if not self.pushes and not self.pops: out["peak_open"] = None    # không có open list (IDS, Bi-BFS, NumPy...)
+        if self.profile is not None: out["profile"] = self.profile
+        return out
+
+# Thay cho module heapq trong lúc đo
+class _CountingHeap:
+    def __init__(self, counters):
+        self.c = counters
+
+    def heappush(self, heap, item):
+        heapq.heappush(heap, item)
+        self.c._push(len(heap))
+
+    def heappop(self, heap):
+        self.c._pop()
+        return heapq.heappop(heap)
+
+    # Đổi khoá (pop + push trong một bước): không tính là mục cũ
+    def heapreplace(self, heap, item):
+        self.c.pops += 1
+        self.c._push(len(heap))
+        return heapq.heapreplace(heap, item)
+
+    def heappushpop(self, heap, item):
+        self.c.pushes += 1
+        self.c.pops += 1
+        return heapq.heappushpop(heap, item)
+
+    def heapify(self, heap):
+        heapq.heapify(heap)
+        self.c.pushes += len(heap)
+        self.c.peak_open = max(self.c.peak_open, len(heap))
+
+    def __getattr__(self, name):
+        return getattr(heapq, name)
+
+def _counting_deque(counters):
+    class CountingDeque(deque):
+        def append(self, x):
+            deque.append(self, x)
+            counters._push(len(self))
+
+        def appendleft(self, x):
+            deque.appendleft(self, x)
+            counters._push(len(self))
+
+        def pop(self):
+            counters._pop()
+            return deque.pop(self)
+
+        def popleft(self):
+            counters._pop()
+            return deque.popleft(self)
+    return CountingDeque
+
+# Bọc push/pop của open list (open_list.py) vừa tạo; len() là số mục đang giữ (kể cả mục cũ của "heap")
+def _counting_open(make, counters):
+    def make_open(kind, n):
+        pq = make(kind, n)
+        push, pop = pq.push, pq.pop
+
+        def counted_push(item):
+            push(item)
+            counters._push(len(pq))
+
+        def counted_pop():
+            item = pop()
+            counters._pop()
+            return item
+        pq.push, pq.pop = counted_push, counted_pop
+        return pq
+    return make_open
+
+# steps[mask[u]] của Grid.adjacency(): mỗi lần tra là một lần hỏi danh sách ô kề
+class _CountingSteps:
+    def __init__(self, steps, counters):
+        self.steps = steps
+        self.c = counters
+
+    def __getitem__(self, m):
+        c = self.c
+        c.neighbors += 1
+        c._pending = False
+        return self.steps[m]
+
+    def __len__(self):
+        return len(self.steps)
+
+@contextmanager
+def counting(counters):
+    replace = {"heapq": lambda _: _CountingHeap(counters), "deque": lambda _: _counting_deque(counters),
+               "make_open": lambda make: _counting_open(make, counters)}
+    saved = [(m, name, getattr(m, name)) for m in _modules for name in replace if hasattr(m, name)]
+    saved.append((Grid, "adjacency", Grid.adjacency))
+    adjacency = Grid.adjacency
+
+    def counted(grid):
+        mask, steps = adjacency(grid)
+        return mask, _CountingSteps(steps, counters)
+    try:
+        for m, name, value in saved[:-1]:
+            setattr(m, name, replace[name](value))
+        Grid.adjacency = counted
+        yield counters
+    finally:
+        for obj, name, value in saved:
+            setattr(obj, name, value)
+
+# ----------------- Đo một lần chạy -----------------
+# Trả về (kết quả của func, Counters). memory: đo bộ nhớ đỉnh; profile: giữ `top` hàm có tottime lớn nhất.
+def measure(func, start, goal, grid, kwargs=None, memory=True, profile=False, top=15):
+    c = Counters()
+    prof = cProfile.Profile() if profile else None
+    traced = memory and not tracemalloc.is_tracing()
+    if traced: tracemalloc.start()
+    elif memory: tracemalloc.reset_peak()
+    try:
+        with counting(c):
+            if prof: prof.enable()
+            try:
+                result = func(start, goal, grid, grid.weight, grid.rows, grid.cols, **(kwargs or {}))
+            finally:
+                if prof: prof.disable()
+        if memory: c.peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        if traced: tracemalloc.stop()
+    if prof: c.profile = profile_rows(prof, top)
+    return result, c
+
+def profile_rows(prof, top=15):
+    stats = pstats.Stats(prof)
+    rows = []
+    for (file, line, name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({"func": f"{name} ({os.path.basename(file)}:{line})", "calls": ncalls,
+                     "tottime": round(tottime, 6), "cumtime": round(cumtime, 6)})
+    rows.sort(key=lambda r: r["tottime"], reverse=True)
+    return rows[:top]
+
+# ----------------- Xuất JSON -----------------
+# results: {tên thuật toán: {"path", "visited", "time", "cost", "metrics"?, "status"?}}
+def export_json(path, results, **meta):
+    out = {"created": time.strftime("%Y-%m-%d %H:%M:%S"), **meta, "results": {}}
+    for name, res in results.items():
+        out["results"][name] = {
+            "visited": res.get("visited", 0), "time_s": res.get("time", 0.0),
+            "steps": len(res.get("path", [])), "cost": res.get("cost", 0),
+            "status": res.get("status"), **(res.get("metrics") or {}),
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2, ensure_ascii=False)
+        f.write("\n")
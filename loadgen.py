@@ -0,0 +1,141 @@
+# loadgen.py
+# Tạo tải cục bộ cho server.py và đo độ trễ / thông lượng:
+#   python loadgen.py --port 8765 --clients 16 --requests 2000 --algos A*,JPS --hot 0.3 --deltas 0.01
+#   python loadgen.py --serve 300x300 --workers 2 --clients 8     (tự chạy server trong cùng tiến trình)
+# Mỗi client là một kết nối TCP gửi lần lượt từng yêu cầu (vòng kín: gửi, chờ trả lời, gửi tiếp).
+# --hot: tỷ lệ yêu cầu lấy từ vài cặp start/goal cố định => nhiều truy vấn giống nhau cùng lúc (đo gộp);
+# --deltas: tỷ lệ yêu cầu là delta đổi một ô nước <-> bão (bản đồ đổi phiên bản giữa các truy vấn).
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from benchmark import percentile
+from grid import WATER, STORM
+
+async def _call(reader, writer, msg):
+    writer.write(json.dumps(msg).encode() + b"\n")
+    await writer.drain()
+    line = await reader.readline()
+    if not line: raise ConnectionError("server đóng kết nối")
+    return json.loads(line)
+
+def workload(cells, n, algos, hot, hot_pairs, deltas, seed):
+    rng = random.Random(seed)
+    pair = lambda: (rng.choice(cells), rng.choice(cells))
+    hot_set = [pair() for _ in range(hot_pairs)]
+    for k in range(n):
+        if rng.random() < deltas:
+            r, c = rng.choice(cells)
+            cell = [r, c, STORM, rng.randint(2, 5)] if rng.random() < 0.5 else [r, c, WATER]
+            yield {"id": k, "op": "delta", "cells": [cell]}
+        else:
+            start, goal = rng.choice(hot_set) if rng.random() < hot else pair()
+            yield {"id": k, "op": "search", "algo": rng.choice(algos), "start": start, "goal": goal}
+
+async def run_load(host, port, clients, requests, algos, hot=0.2, hot_pairs=4, deltas=0.0, seed=0):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+    info = await _call(reader, writer, {"op": "info"})
+    unknown = [a for a in algos if a not in info["algos"]]
+    if unknown: raise SystemExit(f"server không có thuật toán: {', '.join(unknown)}")
+    cells = (await _call(reader, writer, {"op": "sample", "n": 512, "seed": seed}))["cells"]
+    writer.close()
+    await writer.wait_closed()
+    queue = asyncio.Queue()
+    for msg in workload(cells, requests, algos, hot, hot_pairs, deltas, seed):
+        queue.put_nowait(msg)
+    latencies = {"search": [], "delta": []}
+    counts = {"ok": 0, "errors": 0, "batched": 0, "found": 0}
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+        try:
+            while not queue.empty():
+                msg = queue.get_nowait()
+                t0 = time.perf_counter()
+                reply = await _call(reader, writer, msg)
+                latencies[msg["op"]].append(time.perf_counter() - t0)
+                if not reply.get("ok"):
+                    counts["errors"] += 1
+                    continue
+                counts["ok"] += 1
+                counts["batched"] += bool(reply.get("batched"))
+                counts["found"] += bool(reply.get("path"))
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    wall = time.perf_counter() - t0
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+    stats = await _call(reader, writer, {"op": "stats"})
+    writer.close()
+    await writer.wait_closed()
+    out = {"rows": info["rows"], "cols": info["cols"], "clients": clients, "requests": requests,
+           "algos": algos, "wall_s": wall, "throughput_rps": requests / wall, **counts,
+           "server_searches": stats.get("searches")}
+    for op, values in latencies.items():
+        if values:
+            out[f"{op}_ms"] = {"n": len(values), "mean": 1000 * statistics.mean(values),
+                               "p50": 1000 * percentile(values, 0.5), "p95": 1000 * percentile(values, 0.95),
+                               "p99": 1000 * percentile(values, 0.99), "max": 1000 * max(values)}
+    return out
+
+# Chạy server.PlanServer ngay trong tiến trình này (cổng ngẫu nhiên) rồi tạo tải
+async def run_with_server(size, layout, seed, workers, **kwargs):
+    import server
+    plan = server.PlanServer(server.load_grid(None, size, layout, seed), workers)
+    try:
+        listener = await plan.start("127.0.0.1", 0)
+        async with listener:
+            port = listener.sockets[0].getsockname()[1]
+            out = await run_load("127.0.0.1", port, seed=seed, **kwargs)
+            await plan.wait_idle()
+            return out
+    finally:
+        plan.close()
+
+def report(out):
+    print(f"{out['rows']}x{out['cols']}, {out['clients']} client, {out['requests']} yêu cầu "
+          f"({', '.join(out['algos'])}) trong {out['wall_s']:.2f}s => {out['throughput_rps']:.1f} yêu cầu/s")
+    print(f"  thành công {out['ok']}, lỗi {out['errors']}, có đường {out['found']}, "
+          f"gộp {out['batched']} (server tìm thật {out['server_searches']} lần)")
+    for op in ("search", "delta"):
+        lat = out.get(f"{op}_ms")
+        if lat:
+            print(f"  {op:6s} n={lat['n']:5d}  mean={lat['mean']:7.2f}ms  p50={lat['p50']:7.2f}ms  "
+                  f"p95={lat['p95']:7.2f}ms  p99={lat['p99']:7.2f}ms  max={lat['max']:7.2f}ms")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Tạo tải cho server.py, đo độ trễ và thông lượng")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--serve", metavar="RxC", help="tự chạy server với bản đồ sinh ngẫu nhiên cỡ RxC")
+    ap.add_argument("--layout", default="noise", help="bố cục map_gen khi --serve")
+    ap.add_argument("--workers", type=int, help="số tiến trình tìm kiếm khi --serve")
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=500)
+    ap.add_argument("--algos", default="A*", help="thuật toán, phân tách bằng dấu phẩy")
+    ap.add_argument("--hot", type=float, default=0.2, help="tỷ lệ truy vấn lặp lại từ vài cặp cố định")
+    ap.add_argument("--hot-pairs", type=int, default=4)
+    ap.add_argument("--deltas", type=float, default=0.0, help="tỷ lệ yêu cầu là delta bản đồ")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", action="store_true", help="in kết quả dạng JSON")
+    args = ap.parse_args(argv)
+    load = dict(clients=args.clients, requests=args.requests, algos=[a.strip() for a in args.algos.split(",")],
+                hot=args.hot, hot_pairs=args.hot_pairs, deltas=args.deltas)
+    if args.serve:
+        out = asyncio.run(run_with_server(args.serve, args.layout, args.seed, args.workers, **load))
+    else:
+        out = asyncio.run(run_load(args.host, args.port, seed=args.seed, **load))
+    if args.json:
+        json.dump(out, sys.stdout, indent=2)
+        print()
+    else:
+        report(out)
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,51 @@
 # main.py
-import pygame, sys, random
+import time
+_T0 = time.perf_counter()   # mốc đo thời gian khởi động (xem startup)
+import pygame, sys, random, json
 from config import *
-import algorithms as algo
+import resources
+from grid import Grid
+import map_gen
+import map_io
+import searchers
+import reachability
+import instrument
+import open_list
+from algorithms import SearchStepper
+from path_service import PathService
+from compare_runner import CompareRunner
+import route_planner
+import multi_agent
 from ui_components import DropdownMenu
+from renderer import GridRenderer
+from camera import Camera
 
 
 # ----------------- Khởi tạo Pygame & Màn hình -----------------
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("📦 Robot Giao Hàng - Pathfinding Visualizer")
-clock = pygame.time.Clock()
-
-# ----------------- Tải ảnh -----------------
-def load_and_scale_image(file_name, size):
-    try:
-        img = pygame.image.load(file_name).convert_alpha()
-        return pygame.transform.scale(img, size)
-    except pygame.error as e:
-        print(f"Lỗi tải ảnh {file_name}: {e}. Sử dụng màu mặc định thay thế.")
-        return None
-
-WALL_IMAGE = load_and_scale_image("tuong.png", (CELL, CELL))
-ROBOT_IMAGE = load_and_scale_image("robot.png", (CELL, CELL))
-CUSTOMER_IMAGE = load_and_scale_image("khachhang.png", (CELL, CELL))
-DUONGDI_IMAGE = load_and_scale_image("duongdi.png", (CELL, CELL))
+# Cửa sổ được tạo trong init_display(): tiến trình con của CompareRunner (spawn) import lại module
+# này và không được mở cửa sổ. Import không gọi pygame.init() hay tải font/ảnh (resources.py tạo khi
+# dùng lần đầu), nên tiến trình con chỉ tốn thời gian import.
+screen = clock = renderer = camera = None
+startup = {}          # thời gian khởi động (ms): import, cửa sổ + ảnh + font, khung hình đầu
+
+def init_display():
+    global screen, clock, renderer, camera
+    pygame.display.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("📦 Robot Giao Hàng - Pathfinding Visualizer")
+    clock = pygame.time.Clock()
+    camera = Camera((BASE_X, 0, WIDTH - BASE_X, HEIGHT), MAP_ROWS, MAP_COLS)
+    renderer = GridRenderer(grid, camera)
 
 # ----------------- Trạng thái game -----------------
 start = None
 goal = None
-tile = [[0 for _ in range(COLS)] for _ in range(ROWS)]
-weight = [[1 for _ in range(COLS)] for _ in range(ROWS)]
+customers = []        # các khách hàng thêm (ngoài goal) cho lộ trình nhiều điểm
+route = None          # kết quả route_planner.plan_route gần nhất
+map_seed = None       # seed của bản đồ sinh gần nhất (hiện trên panel để tạo lại đúng bản đồ đó)
+message = None        # thông báo lưu/tải bản đồ (kể cả lỗi) hiện trên panel
+fleet = None          # đội robot: {"paths": đường đi theo thời gian, "goals": [...], "t": thời điểm hiện tại}
+grid = Grid(MAP_ROWS, MAP_COLS)
 current_path = []
 show_visited_set = set()
 visited_animation_list = []
@@ -36,7 +53,8 @@ all_paths_results = {}
 animating_path = False
 moving_robot = False
 animation_index = 0
-robot_pos_pixel = None
+stepper = None        # SearchStepper khi đang tìm dần (1. Duyệt ô)
+robot_pos = None      # vị trí robot theo ô (số thực khi đang di chuyển)
 path_index = 0
 move_progress = 0.0
 last_cost = 0.0
@@ -44,157 +62,308 @@ last_time = 0.0
 visited_count = 0
 results_table = {}
 show_table = False
+metrics_mode = None   # đo chi tiết (instrument): None tắt, "count" bộ đếm + bộ nhớ, "profile" thêm cProfile
+last_metrics = None   # bộ đếm của lần chạy "1."/"2." gần nhất khi đang đo
+open_kind = OPEN_LIST # open list của UCS/A* (đổi bằng menu "8.")
+beam_width = BEAM_WIDTH # beam width của Beam (đổi bằng menu "9.")
+beam_anytime = False  # Beam nới rộng beam (x2) tới khi tìm được đường
 selected_algo = "A*"
+compare_runner = CompareRunner(timeout=10.0)
 
-SEARCHERS = {
-    "BFS": algo.bfs_search, "DFS": algo.dfs_search, "UCS": algo.ucs_search,
-    "A*": algo.astar_search, "Greedy": algo.greedy_search, "Beam": algo.beam_search,
-    "IDS": algo.ids_search
-}
+SEARCHERS = dict(searchers.SEARCHERS)
+STEPPERS = searchers.STEPPERS
+path_service = PathService(grid)
+SEARCHERS["UCS (Cache)"] = reachability.Guarded(path_service.search)
 
 # ----------------- Logic Game & Map -----------------
-def get_pixel_coords(r, c):
-    return BASE_X + c * CELL, r * CELL
+# Số ô hiện thêm mỗi khung hình: bản đồ lớn duyệt nhanh hơn (~10 giây để phủ hết bản đồ)
+def anim_cells():
+    return max(ANIM_CELLS, len(grid) // (FPS * 10))
+
+# Robot/khách hàng vẽ ở tâm ô, không nhỏ hơn vài pixel khi zoom xa
+def marker_rect(r, c):
+    size = max(6, int(camera.scale))
+    cx, cy = camera.cell_center(r, c)
+    return pygame.Rect(int(cx - size / 2), int(cy - size / 2), size, size)
 
 def reset_map():
-    global tile, weight, start, goal, current_path, show_visited_set, last_cost, last_time, visited_count, results_table, visited_animation_list, all_paths_results, animating_path, moving_robot, robot_pos_pixel, path_index, move_progress, show_table
-    tile = [[0 for _ in range(COLS)] for _ in range(ROWS)]
-    weight = [[1 for _ in range(COLS)] for _ in range(ROWS)]
+    global start, goal, current_path, show_visited_set, last_cost, last_time, visited_count, results_table, visited_animation_list, all_paths_results, animating_path, moving_robot, robot_pos, path_index, move_progress, show_table, stepper, route, fleet, map_seed, last_metrics
+    compare_runner.cancel()
+    grid.fill(0, 1)
     start = None
     goal = None
+    customers.clear()
+    route = fleet = map_seed = None
     current_path = []
     show_visited_set.clear()
     visited_animation_list.clear()
     all_paths_results.clear()
     animating_path = False
+    stepper = None
     moving_robot = False
-    robot_pos_pixel = None
+    robot_pos = None
     path_index = 0
     move_progress = 0.0
     last_cost = 0.0
     last_time = 0.0
     visited_count = 0
+    last_metrics = None
     results_table.clear()
     show_table = False
 
-def generate_random_map(density_wall=0.2, density_storm=0.1):
-    global start, goal, robot_pos_pixel
+# layout: một bố cục trong map_gen.LAYOUTS; start/goal luôn cùng thành phần liên thông
+def generate_random_map(layout="noise", seed=None):
+    global start, goal, robot_pos, map_seed
     reset_map()
-    for r in range(ROWS):
-        for c in range(COLS):
-            if r==0 or c==0 or r==ROWS-1 or c==COLS-1:
-                tile[r][c] = 1
-                weight[r][c] = 999
-                continue
-    for r in range(1, ROWS-1):
-        for c in range(1, COLS-1):
-            rnd = random.random()
-            if rnd < density_wall:
-                tile[r][c] = 1; weight[r][c] = 999
-            elif rnd < density_wall + density_storm:
-                tile[r][c] = 3; weight[r][c] = random.choice([3,4,5])
-    
-    all_water_tiles = [(r, c) for r in range(ROWS) for c in range(COLS) if tile[r][c] == 0]
-    if len(all_water_tiles) >= 2:
-        start, goal = random.sample(all_water_tiles, 2)
+    map_seed = random.randrange(1 << 31) if seed is None else seed
+    _, start, goal = map_gen.generate(grid.rows, grid.cols, layout, seed=map_seed, grid=grid)
+    robot_pos = start
+
+# Lưu/tải bản đồ ở MAP_FILE (map_io). File .gmap được mmap: bản đồ lớn mở ngay, các thuật toán
+# chạy thẳng trên bộ đệm đã map. Bản đồ khác kích thước thì dựng lại camera/renderer/cache.
+def save_map():
+    global message
+    try:
+        map_io.write_map(MAP_FILE, grid, start, goal)
+    except OSError as e:
+        message = f"Lỗi lưu bản đồ: {e}"
     else:
-        start, goal = (1, 1), (ROWS-2, COLS-2)
-    
-    tile[start[0]][start[1]] = 0; weight[start[0]][start[1]] = 1
-    tile[goal[0]][goal[1]] = 0; weight[goal[0]][goal[1]] = 1
-    robot_pos_pixel = get_pixel_coords(start[0], start[1])
+        message = f"Đã lưu {MAP_FILE}"
+
+def load_map():
+    global message
+    try:
+        new, s, g = map_io.read_map(MAP_FILE)
+    except (OSError, ValueError) as e:
+        message = f"Lỗi tải bản đồ: {e}"
+        return
+    message = f"Đã tải {MAP_FILE}"
+    use_grid(new, s, g)
+
+# Kích thước tiếp theo trong MAP_SIZES, bản đồ mới sinh ngẫu nhiên
+def cycle_map_size():
+    global message
+    sizes = list(MAP_SIZES)
+    k = sizes.index((grid.rows, grid.cols)) + 1 if (grid.rows, grid.cols) in sizes else 0
+    rows, cols = sizes[k % len(sizes)]
+    use_grid(Grid(rows, cols))
+    generate_random_map()
+    message = f"Bản đồ {rows}x{cols}"
+
+def use_grid(new, s=None, g=None):
+    global grid, camera, renderer, path_service, start, goal, robot_pos
+    reset_map()
+    grid = new
+    path_service = PathService(grid)
+    SEARCHERS["UCS (Cache)"] = reachability.Guarded(path_service.search)
+    camera = Camera(camera.view, grid.rows, grid.cols)
+    renderer = GridRenderer(grid, camera)
+    start, goal, robot_pos = s, g, s
+
+# Tham số riêng của từng thuật toán khi gọi từ UI
+def algo_kwargs(name):
+    if name == "Beam": return {"beam_width": beam_width, "anytime": beam_anytime}
+    if name in ("UCS", "A*"): return {"open_list": open_kind}
+    return {}
+
+def cycle_open_list():
+    global open_kind
+    kinds = list(open_list.KINDS)
+    open_kind = kinds[(kinds.index(open_kind) + 1) % len(kinds)]
+
+def cycle_beam_width():
+    global beam_width
+    widths = sorted(set(BEAM_SWEEP) | {beam_width})
+    beam_width = widths[(widths.index(beam_width) + 1) % len(widths)]
+
+# Beam với từng width trong BEAM_SWEEP (và bản anytime từ width nhỏ nhất) trên cùng start/goal,
+# A* làm mốc chi phí tối ưu: bảng so sánh cho thấy thời gian đổi lấy chất lượng đường đi
+def sweep_searchers():
+    beam = SEARCHERS["Beam"]
+    funcs = {"A*": SEARCHERS["A*"]}
+    kwargs = {"A*": algo_kwargs("A*")}
+    for w in BEAM_SWEEP:
+        funcs[f"Beam w={w}"] = beam
+        kwargs[f"Beam w={w}"] = {"beam_width": w}
+    funcs["Beam anytime"] = beam
+    kwargs["Beam anytime"] = {"beam_width": min(BEAM_SWEEP), "anytime": True}
+    return funcs, kwargs
+
+# ----------------- Đo chi tiết -----------------
+METRICS_MODES = [None, "count", "profile"]
+METRICS_NAMES = {None: "Tắt", "count": "Bộ đếm", "profile": "Bộ đếm + cProfile"}
+
+def cycle_metrics():
+    global metrics_mode
+    metrics_mode = METRICS_MODES[(METRICS_MODES.index(metrics_mode) + 1) % len(METRICS_MODES)]
+
+# Xuất bảng so sánh (nếu có) hoặc lần chạy gần nhất ra METRICS_FILE
+def export_metrics():
+    results = results_table
+    if not results and (current_path or last_metrics):
+        results = {selected_algo: {"path": current_path, "visited": visited_count, "time": last_time,
+                                   "cost": last_cost, "metrics": last_metrics}}
+    instrument.export_json(METRICS_FILE, results, rows=grid.rows, cols=grid.cols, seed=map_seed,
+                           start=start, goal=goal, mode=metrics_mode)
 
 # ----------------- Animation logic -----------------
+def start_robot(path):
+    global moving_robot, path_index, move_progress, robot_pos
+    path_index, move_progress = 0, 0.0
+    robot_pos = path[0] if path else start
+    moving_robot = len(path) > 1
+
+# Đội robot: robot chính (nếu đã có start/goal) + các robot ngẫu nhiên trên ô nước,
+# đường đi không va chạm lập bằng WHCA* (multi_agent)
+def spawn_fleet(n):
+    free = [(r, c) for r in range(grid.rows) for c in range(grid.cols) if grid.tile_at(r, c) != 1]
+    starts, goals = ([start], [goal]) if start and goal else ([], [])
+    taken = set(starts) | set(goals)
+    pool = [p for p in free if p not in taken]
+    k = min(n - len(starts), len(pool) // 2)
+    picked = random.sample(pool, 2 * k)
+    starts += picked[:k]
+    goals += picked[k:]
+    return {"paths": multi_agent.plan_paths(grid, starts, goals), "goals": goals, "t": 0.0}
+
+def fleet_positions():
+    t = fleet["t"]
+    k, frac = int(t), t - int(t)
+    out = []
+    for path in fleet["paths"]:
+        (r0, c0), (r1, c1) = path[min(k, len(path) - 1)], path[min(k + 1, len(path) - 1)]
+        out.append((r0 + (r1 - r0) * frac, c0 + (c1 - c0) * frac))
+    return out
+
 def animate_robot_movement():
-    global moving_robot, path_index, move_progress, robot_pos_pixel
+    global moving_robot, path_index, move_progress, robot_pos
     if not current_path or len(current_path) < 2 or path_index >= len(current_path) - 1:
         moving_robot = False
         return
         
     start_r, start_c = current_path[path_index]
     end_r, end_c = current_path[path_index + 1]
-    start_x, start_y = get_pixel_coords(start_r, start_c)
-    end_x, end_y = get_pixel_coords(end_r, end_c)
     
     move_progress += MOVE_SPEED * 60 / FPS
     if move_progress >= 1.0:
         path_index += 1
         move_progress = 0.0
-        robot_pos_pixel = (end_x, end_y)
+        robot_pos = (end_r, end_c)
         if path_index >= len(current_path) - 1:
             moving_robot = False
             return
 
-    current_x = start_x + (end_x - start_x) * move_progress
-    current_y = start_y + (end_y - start_y) * move_progress
-    robot_pos_pixel = (current_x, current_y)
+    current_r = start_r + (end_r - start_r) * move_progress
+    current_c = start_c + (end_c - start_c) * move_progress
+    robot_pos = (current_r, current_c)
 
 # ----------------- Drawing Functions -----------------
 def draw_ui():
     pygame.draw.rect(screen, UI_BG, (0,0, PANEL_W, HEIGHT))
-    screen.blit(bigfont.render("Robot Giao Hàng", True, TEXT), (12, -2))
+    screen.blit(resources.bigfont.render("Robot Giao Hàng", True, TEXT), (12, -2))
     
     y_stats = HEIGHT - 150
     pygame.draw.line(screen, TABLE_BORDER, (10, y_stats - 10), (PANEL_W - 10, y_stats - 10), 1)
 
-    screen.blit(font.render(f"Thuật toán: {selected_algo}", True, TEXT), (12, y_stats))
-    screen.blit(font.render(f"Đã duyệt: {visited_count}", True, TEXT), (12, y_stats + 20))
-    screen.blit(font.render(f"Thời gian: {last_time:.4f}s", True, TEXT), (12, y_stats + 40))
-    screen.blit(font.render(f"Số bước: {len(current_path)}", True, TEXT), (12, y_stats + 60))
-    screen.blit(font.render(f"Chi phí: {last_cost:.2f}", True, TEXT), (12, y_stats + 80))
+    algo_text = f"{selected_algo} ({open_kind})" if selected_algo in ("UCS", "A*") else selected_algo
+    if selected_algo == "Beam": algo_text = f"Beam (w={beam_width}{', anytime' if beam_anytime else ''})"
+    screen.blit(resources.font.render(f"Thuật toán: {algo_text}", True, TEXT), (12, y_stats))
+    if map_seed is not None:
+        seed_text = resources.font.render(f"Seed: {map_seed}", True, (150,150,150))
+        screen.blit(seed_text, (PANEL_W - 12 - seed_text.get_width(), y_stats))
+    screen.blit(resources.font.render(f"Đã duyệt: {visited_count}", True, TEXT), (12, y_stats + 20))
+    screen.blit(resources.font.render(f"Thời gian: {last_time:.4f}s", True, TEXT), (12, y_stats + 40))
+    screen.blit(resources.font.render(f"Số bước: {len(current_path)}", True, TEXT), (12, y_stats + 60))
+    screen.blit(resources.font.render(f"Chi phí: {last_cost:.2f}", True, TEXT), (12, y_stats + 80))
+    if compare_runner.running:
+        screen.blit(resources.font.render(f"Đang so sánh: {len(results_table)}/{compare_runner.total}", True, TEXT), (12, y_stats - 30))
+    elif fleet:
+        arrived = sum(p[-1] == g for p, g in zip(fleet["paths"], fleet["goals"]))
+        screen.blit(resources.font.render(f"Đội robot: {arrived}/{len(fleet['goals'])} tới nơi, t = {int(fleet['t'])}", True, TEXT), (12, y_stats - 30))
+    elif route:
+        text = f"Lộ trình: {len(route['order']) - 1} điểm ({route['method']})"
+        if route["unreachable"]: text += f", {len(route['unreachable'])} không tới được"
+        screen.blit(resources.font.render(text, True, TEXT), (12, y_stats - 30))
+    elif message:
+        screen.blit(resources.font.render(message, True, TEXT), (12, y_stats - 30), (0, 0, PANEL_W - 24, 20))
     
-    screen.blit(font.render("R-Click: Start/Goal | L-Click: Terrain", True, (150,150,150)), (12, HEIGHT - 20))
+    draw_metrics_panel(y_stats - 60)
+    screen.blit(resources.font.render(f"Zoom: {camera.scale:g} px/ô | Lăn chuột, kéo chuột giữa", True, (150,150,150)), (12, HEIGHT - 40))
+    screen.blit(resources.font.render("R-Click: Start/Goal/Khách | L-Click: Terrain", True, (150,150,150)), (12, HEIGHT - 20))
+
+# Panel bộ đếm của lần chạy gần nhất, vẽ từ dưới lên, kết thúc ở y_bottom
+def draw_metrics_panel(y_bottom):
+    if not metrics_mode and not last_metrics: return
+    gray = (150, 150, 150)
+    lines = [(f"Đo chi tiết: {METRICS_NAMES[metrics_mode]}", TEXT)]
+    if last_metrics:
+        m = last_metrics
+        open_max = "-" if m["peak_open"] is None else m["peak_open"]
+        lines += [(f"Push / Pop: {m['pushes']} / {m['pops']}", TEXT),
+                  (f"Pop bỏ qua (cũ): {m['stale']}", TEXT),
+                  (f"Hỏi ô kề: {m['neighbors']}", TEXT),
+                  (f"Open list tối đa: {open_max}", TEXT),
+                  (f"Bộ nhớ đỉnh: {m['peak_kb']} KB", TEXT)]
+        for row in m.get("profile", [])[:3]:
+            lines.append((f"{row['tottime'] * 1000:.1f}ms {row['func']}", gray))
+    y = y_bottom - 18 * len(lines)
+    pygame.draw.line(screen, TABLE_BORDER, (10, y - 6), (PANEL_W - 10, y - 6), 1)
+    screen.set_clip((0, 0, PANEL_W - 8, HEIGHT))     # tên hàm cProfile dài: cắt ở mép panel
+    for text, color in lines:
+        screen.blit(resources.font.render(text, True, color), (12, y))
+        y += 18
+    screen.set_clip(None)
 
 def draw_grid():
-    for r in range(ROWS):
-        for c in range(COLS):
-            x, y = get_pixel_coords(r, c)
-            rect = pygame.Rect(x,y,CELL,CELL)
-            t = tile[r][c]
-            
-            if t == 1:
-                if WALL_IMAGE: screen.blit(WALL_IMAGE, rect)
-                else: pygame.draw.rect(screen, WALL_COLOR, rect)
-            elif t == 3:
-                pygame.draw.rect(screen, STORM, rect)
-            else:
-                if DUONGDI_IMAGE: screen.blit(DUONGDI_IMAGE, rect)
-                else: pygame.draw.rect(screen, BG_OCEAN, rect)
-            
-            pygame.draw.rect(screen, BLACK, rect, 1)
-            if weight[r][c] > 1 and t != 1:
-                txt = font.render(str(weight[r][c]), True, WHITE)
-                screen.blit(txt, (x+4, y+4))
-
-    if show_visited_set:
-        for v in show_visited_set:
-            if v == start or v == goal: continue
-            x, y = get_pixel_coords(v[0], v[1])
-            s = pygame.Surface((CELL,CELL), pygame.SRCALPHA)
-            s.fill((*VISITED_COLOR, 90))
-            screen.blit(s, (x,y))
+    renderer.draw(screen, show_visited_set, skip=(start, goal))
+    screen.set_clip(camera.view)
+    width = 4 if camera.scale >= 12 else 2
 
     if current_path and len(current_path) >= 2:
         path_color = PATH_COLORS.get(selected_algo, WHITE)
-        points = [(BASE_X + c*CELL + CELL//2, r*CELL + CELL//2) for r,c in current_path]
-        pygame.draw.lines(screen, path_color, False, points, 4)
+        points = [camera.cell_center(r, c) for r,c in current_path]
+        pygame.draw.lines(screen, path_color, False, points, width)
 
     if all_paths_results:
         for algo_name, res in all_paths_results.items():
             path = res.get('path', [])
             if path and len(path) > 1:
                 path_color = PATH_COLORS.get(algo_name, WHITE)
-                points = [(BASE_X + c*CELL + CELL//2, r*CELL + CELL//2) for r,c in path]
-                pygame.draw.lines(screen, path_color, False, points, 2)
+                points = [camera.cell_center(r, c) for r,c in path]
+                pygame.draw.lines(screen, path_color, False, points, max(1, width // 2))
     
-    if goal:
-        x, y = get_pixel_coords(goal[0], goal[1])
-        if CUSTOMER_IMAGE: screen.blit(CUSTOMER_IMAGE, (x,y))
-        else: pygame.draw.rect(screen, GOAL_COLOR, (x+3,y+3,CELL-6,CELL-6), border_radius=6)
+    for cell in ([goal] if goal else []) + customers:
+        rect = marker_rect(*cell)
+        img = renderer.sprite("customer", rect.w)
+        if img: screen.blit(img, rect)
+        else: pygame.draw.rect(screen, GOAL_COLOR, rect.inflate(-rect.w // 8, -rect.h // 8), border_radius=rect.w // 4)
+
+    # Số thứ tự giao hàng cạnh mỗi khách hàng
+    if route:
+        for k, cell in enumerate(route["order"][1:], 1):
+            rect = marker_rect(*cell)
+            screen.blit(resources.font.render(str(k), True, WHITE), (rect.right - 4, rect.y - 6))
     
-    if start and robot_pos_pixel:
-        if ROBOT_IMAGE: screen.blit(ROBOT_IMAGE, (robot_pos_pixel))
-        else: pygame.draw.rect(screen, START_COLOR, (*robot_pos_pixel, CELL, CELL), border_radius=6)
+    if fleet:
+        for i, (path, cell, pos) in enumerate(zip(fleet["paths"], fleet["goals"], fleet_positions())):
+            color = FLEET_COLORS[i % len(FLEET_COLORS)]
+            if len(path) > 1:
+                pygame.draw.lines(screen, color, False, [camera.cell_center(r, c) for r, c in path], 1)
+            pygame.draw.rect(screen, color, marker_rect(*cell), 2)
+            rect = marker_rect(*pos)
+            img = renderer.sprite("robot", rect.w)
+            if img: screen.blit(img, rect)
+            else: pygame.draw.rect(screen, START_COLOR, rect, border_radius=rect.w // 4)
+            pygame.draw.rect(screen, color, rect, 1)
+        screen.set_clip(None)
+        return
+
+    if start and robot_pos:
+        rect = marker_rect(*robot_pos)
+        img = renderer.sprite("robot", rect.w)
+        if img: screen.blit(img, rect)
+        else: pygame.draw.rect(screen, START_COLOR, rect, border_radius=rect.w // 4)
+    screen.set_clip(None)
 
 def draw_results_table():
     if not show_table: return
@@ -203,31 +372,46 @@ def draw_results_table():
     pygame.draw.rect(screen, TABLE_BG, table_rect, border_radius=10)
     pygame.draw.rect(screen, TABLE_BORDER, table_rect, 2, border_radius=10)
 
-    headers = ["Thuật toán", "Đã duyệt", "Thời gian (s)", "Số bước", "Chi phí"]
-    col_widths = [table_rect.width * 0.25, table_rect.width * 0.15, table_rect.width * 0.2, table_rect.width * 0.15, table_rect.width * 0.15]
+    headers = ["Thuật toán", "Đã duyệt", "So với A*", "Thời gian (s)", "Số bước", "Chi phí"]
+    widths = (0.2, 0.13, 0.14, 0.18, 0.12, 0.12)
+    # Có bộ đếm (chạy khi bật đo chi tiết): thêm cột, thu hẹp các cột cũ
+    with_metrics = any(res.get("metrics") for res in results_table.values())
+    if with_metrics:
+        headers += ["Push", "Pop", "Bỏ qua", "Ô kề", "Open", "KB"]
+        widths = (0.14, 0.08, 0.08, 0.1, 0.07, 0.07, 0.08, 0.08, 0.07, 0.08, 0.07, 0.07)
+    col_widths = [table_rect.width * w for w in widths]
+    base_visited = results_table.get("A*", {}).get("visited", 0)
+    base_cost = results_table.get("A*", {}).get("cost", 0)   # chi phí tối ưu: đo chất lượng đường đi
     
     y = table_rect.y + 10
     x_start = table_rect.x + 10
     
     x = x_start
     for i, header in enumerate(headers):
-        screen.blit(headerfont.render(header, True, TEXT), (x, y))
+        screen.blit(resources.headerfont.render(header, True, TEXT), (x, y))
         x += col_widths[i]
 
     y += 30
     pygame.draw.line(screen, TABLE_BORDER, (table_rect.x + 10, y - 5), (table_rect.right - 10, y - 5), 1)
     
     for algo_name, res in results_table.items():
+        status = res.get("status")
         data = [
             algo_name,
             str(res.get("visited", 0)),
-            f'{res.get("time", 0.0):.4f}',
+            f'{res.get("visited", 0) / base_visited:.2f}x' if base_visited else "-",
+            status if status else f'{res.get("time", 0.0):.4f}',
             str(len(res.get("path", []))),
-            f'{res.get("cost", 0.0):.2f}'
+            f'{res.get("cost", 0.0):.2f}' + (f' ({res["cost"] / base_cost:.2f}x)'
+                                             if base_cost and res.get("path") and algo_name != "A*" else "")
         ]
+        if with_metrics:
+            m = res.get("metrics") or {}
+            data += ["-" if m.get(k) is None else str(m[k]) for k in ("pushes", "pops", "stale", "neighbors", "peak_open")]
+            data.append("-" if m.get("peak_kb") is None else f'{m["peak_kb"]:.0f}')
         x = x_start
         for i, item in enumerate(data):
-            screen.blit(font.render(item, True, TEXT), (x, y))
+            screen.blit(resources.font.render(item, True, TEXT), (x, y))
             x += col_widths[i]
         y += 25
 
@@ -243,29 +427,66 @@ FUNC_MENU = DropdownMenu(
     (PADDING, 20 + BTN_H + 4 + PADDING, PANEL_W - 2 * PADDING, BTN_H + 4), 
     "Chọn Chức Năng", 
     ["1. Duyệt ô (Run)", "2. Di chuyển Robot", "3. Chạy tất cả & So sánh", "4. Xem bảng so sánh",
-     "---", "Random Map", "Reset Map", "Xóa kết quả"], 
+     "5. Giao nhiều điểm", "6. Nhiều robot (WHCA*)", "---", "Random Map", "Map mê cung", "Map nhà kho",
+     "Map hang động", "Kích thước map", "Reset Map", "Lưu bản đồ", "Tải bản đồ", "---", "7. Đo chi tiết",
+     "8. Open list UCS/A*", "9. Beam width", "Beam anytime", "Quét beam width", "Xuất số liệu (JSON)",
+     "Xóa kết quả"], 
     "func"
 )
 
 # ----------------- Main loop -----------------
-def main():
-    global selected_algo, current_path, show_visited_set, visited_animation_list, all_paths_results, last_cost, last_time, visited_count, show_table, animating_path, moving_robot, animation_index, start, goal, robot_pos_pixel, results_table
+# once=True (python main.py --startup): vẽ một khung hình, in thời gian khởi động dạng JSON rồi thoát
+def main(once=False):
+    global selected_algo, current_path, show_visited_set, visited_animation_list, all_paths_results, last_cost, last_time, visited_count, show_table, animating_path, moving_robot, animation_index, start, goal, robot_pos, results_table, stepper, route, fleet, last_metrics, beam_anytime
 
+    t0 = time.perf_counter()
+    init_display()
     reset_map()
+    startup["display_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    t0 = time.perf_counter()
     running = True
+    last_sig = last_robot = None
+    dragging = False
 
     while running:
         clock.tick(FPS)
+        had_event = False
         for event in pygame.event.get():
+            if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL, pygame.WINDOWEXPOSED):
+                had_event = True
             if event.type == pygame.QUIT:
                 running = False
             
             elif event.type == pygame.KEYDOWN:
+                step = camera.view[2] // 4
                 if event.key == pygame.K_ESCAPE:
                     show_table = False
+                elif event.key == pygame.K_LEFT: camera.pan(-step, 0)
+                elif event.key == pygame.K_RIGHT: camera.pan(step, 0)
+                elif event.key == pygame.K_UP: camera.pan(0, -step)
+                elif event.key == pygame.K_DOWN: camera.pan(0, step)
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS): camera.zoom(1)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS): camera.zoom(-1)
+                elif event.key == pygame.K_HOME: camera.fit()
+
+            # Zoom quanh con trỏ, kéo bằng chuột giữa
+            elif event.type == pygame.MOUSEWHEEL:
+                mx, my = pygame.mouse.get_pos()
+                if camera.contains(mx, my) and not show_table:
+                    camera.zoom(event.y, mx, my)
+
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 2:
+                dragging = False
+
+            elif event.type == pygame.MOUSEMOTION and dragging:
+                camera.pan(-event.rel[0], -event.rel[1])
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mx, my = event.pos
+                if event.button == 2 and camera.contains(mx, my):
+                    dragging = True
+                    continue
+                if event.button not in (1, 3): continue
                 
                 if mx < PANEL_W:
                     menu_clicked, item_text = ALGO_MENU.handle_click((mx, my))
@@ -274,43 +495,63 @@ def main():
                         if menu_clicked == "algo":
                             selected_algo = item_text
                             current_path, show_visited_set, last_cost, last_time, visited_count = [], set(), 0.0, 0.0, 0
+                            last_metrics = None
+                            animating_path, stepper = False, None
 
                     menu_clicked, item_text = FUNC_MENU.handle_click((mx, my))
                     if menu_clicked:
                         ALGO_MENU.is_open = False
                         if menu_clicked == "func":
                             show_table = animating_path = moving_robot = False
+                            stepper = route = fleet = None
+                            compare_runner.cancel()
                             all_paths_results.clear()
 
-                            if item_text in ["1. Duyệt ô (Run)", "2. Di chuyển Robot"]:
+                            # Khi đo chi tiết, chạy hết một lần qua instrument rồi phát lại các ô đã duyệt
+                            if item_text == "1. Duyệt ô (Run)" and selected_algo in STEPPERS and not metrics_mode:
+                                if start and goal:
+                                    # Tìm dần trong ngân sách thời gian mỗi khung hình, đường đi hiện khi xong
+                                    stepper = SearchStepper(STEPPERS[selected_algo], start, goal, grid, grid.weight,
+                                                            grid.rows, grid.cols, batch=min(anim_cells(), 256),
+                                                            **algo_kwargs(selected_algo))
+                                    current_path, visited_animation_list, visited_count, last_time, last_cost = [], [], 0, 0.0, 0
+                                    show_visited_set.clear()
+                                    robot_pos = start
+                                    animating_path = True
+
+                            elif item_text in ["1. Duyệt ô (Run)", "2. Di chuyển Robot"]:
                                 if start and goal:
                                     search_func = SEARCHERS[selected_algo]
-                                    if selected_algo == "Beam":
-                                        path, visited_list, visited_c, time_t, cost_t = search_func(start, goal, tile, weight, ROWS, COLS, beam_width=8)
+                                    # Di chuyển robot chỉ cần đường đi và chi phí: bỏ ghi danh sách ô đã duyệt
+                                    record = item_text == "1. Duyệt ô (Run)"
+                                    kwargs = dict(algo_kwargs(selected_algo), record=record)
+                                    if metrics_mode:
+                                        result, counters = instrument.measure(search_func, start, goal, grid, kwargs,
+                                                                              profile=metrics_mode == "profile")
+                                        last_metrics = counters.as_dict()
                                     else:
-                                        path, visited_list, visited_c, time_t, cost_t = search_func(start, goal, tile, weight, ROWS, COLS)
+                                        result = search_func(start, goal, grid, grid.weight, grid.rows, grid.cols, **kwargs)
+                                        last_metrics = None
+                                    path, visited_list, visited_c, time_t, cost_t = result
                                     
                                     current_path, visited_animation_list, visited_count, last_time, last_cost = path, visited_list, visited_c, time_t, cost_t
                                     show_visited_set.clear()
-                                    if start: robot_pos_pixel = get_pixel_coords(start[0], start[1])
+                                    robot_pos = start
 
                                     if item_text == "2. Di chuyển Robot" and current_path:
-                                        moving_robot = True
-                                        show_visited_set.update(visited_list)
+                                        start_robot(current_path)
                                     elif item_text == "1. Duyệt ô (Run)":
                                         animating_path = True
                                         animation_index = 0
 
                             elif item_text == "3. Chạy tất cả & So sánh" or item_text == "4. Xem bảng so sánh":
                                 if start and goal:
+                                    # Chạy song song; kết quả được điền dần vào results_table trong vòng lặp
                                     results_table = {}
-                                    for name, func in SEARCHERS.items():
-                                        if name == "Beam":
-                                            p, vl, vc, tt, ct = func(start, goal, tile, weight, ROWS, COLS, beam_width=8)
-                                        else:
-                                            p, vl, vc, tt, ct = func(start, goal, tile, weight, ROWS, COLS)
-                                        results_table[name] = {"path": p, "visited": vc, "time": tt, "cost": ct}
-                                    
+                                    compare_runner.start(grid, start, goal, SEARCHERS,
+                                                         kwargs={name: algo_kwargs(name) for name in SEARCHERS},
+                                                         metrics=metrics_mode)
+
                                     if item_text == "3. Chạy tất cả & So sánh":
                                         all_paths_results = results_table
                                         current_path = []
@@ -318,45 +559,107 @@ def main():
                                     else: # Xem bảng
                                         show_table = True
 
+                            elif item_text == "5. Giao nhiều điểm":
+                                # Sắp thứ tự goal + các khách hàng thêm, robot đi theo đường nối các chặng
+                                stops = ([goal] if goal else []) + customers
+                                if start and stops:
+                                    route = route_planner.plan_route(grid, start, stops, executor=route_planner.executor())
+                                    current_path, last_cost, visited_count = route["path"], route["cost"], 0
+                                    last_time = route["matrix_s"] + route["order_s"]
+                                    show_visited_set.clear()
+                                    start_robot(current_path)
+
+                            elif item_text == "6. Nhiều robot (WHCA*)":
+                                current_path, last_cost, visited_count = [], 0, 0
+                                show_visited_set.clear()
+                                t0 = time.perf_counter()
+                                fleet = spawn_fleet(FLEET_SIZE)
+                                last_time = time.perf_counter() - t0
+
                             elif item_text == "Random Map": generate_random_map()
+                            elif item_text == "Map mê cung": generate_random_map("maze")
+                            elif item_text == "Map nhà kho": generate_random_map("warehouse")
+                            elif item_text == "Map hang động": generate_random_map("cave")
+                            elif item_text == "Kích thước map": cycle_map_size()
                             elif item_text == "Reset Map": reset_map()
+                            elif item_text == "Lưu bản đồ": save_map()
+                            elif item_text == "Tải bản đồ": load_map()
+                            elif item_text == "7. Đo chi tiết": cycle_metrics()
+                            elif item_text == "8. Open list UCS/A*": cycle_open_list()
+                            elif item_text == "9. Beam width": cycle_beam_width()
+                            elif item_text == "Beam anytime": beam_anytime = not beam_anytime
+                            elif item_text == "Quét beam width":
+                                if start and goal:
+                                    results_table = {}
+                                    funcs, kwargs = sweep_searchers()
+                                    compare_runner.start(grid, start, goal, funcs, kwargs=kwargs, metrics=metrics_mode)
+                                    show_table = True
+                            elif item_text == "Xuất số liệu (JSON)": export_metrics()
                             elif item_text == "Xóa kết quả":
                                 current_path, show_visited_set, visited_animation_list, all_paths_results = [], set(), [], {}
-                                last_cost, last_time, visited_count = 0.0, 0.0, 0
+                                last_cost, last_time, visited_count, last_metrics = 0.0, 0.0, 0, None
 
                 elif not show_table and not animating_path and not moving_robot:
                     ALGO_MENU.is_open = FUNC_MENU.is_open = False
-                    col, row = (mx - BASE_X) // CELL, my // CELL
+                    row, col = camera.screen_to_cell(mx, my)
                     
-                    if 0 <= row < ROWS and 0 <= col < COLS:
+                    if grid.in_bounds(row, col):
+                        compare_runner.cancel()
+                        route = fleet = None
                         current_path, show_visited_set, visited_animation_list, all_paths_results, last_cost, last_time, visited_count = [], set(), [], {}, 0.0, 0.0, 0
                         
                         pos = (row, col)
                         if event.button == 1:
-                            if pos != start and pos != goal:
-                                current_tile = tile[row][col]
-                                if current_tile == 1: tile[row][col], weight[row][col] = 0, 1
-                                elif current_tile == 0: tile[row][col], weight[row][col] = 3, 3
-                                else: tile[row][col], weight[row][col] = 1, 999
+                            if pos != start and pos != goal and pos not in customers:
+                                current_tile = grid.tile_at(row, col)
+                                if current_tile == 1: grid.set_cell(row, col, 0, 1)
+                                elif current_tile == 0: grid.set_cell(row, col, 3, 3)
+                                else: grid.set_cell(row, col, 1, 999)
                         elif event.button == 3:
                             if not start:
                                 start = pos
-                                tile[row][col], weight[row][col] = 0, 1
-                                robot_pos_pixel = get_pixel_coords(row, col)
+                                grid.set_cell(row, col, 0, 1)
+                                robot_pos = pos
                             elif not goal and pos != start:
                                 goal = pos
-                                tile[row][col], weight[row][col] = 0, 1
-                            elif pos == start: start, robot_pos_pixel = None, None
+                                grid.set_cell(row, col, 0, 1)
+                            elif pos == start: start, robot_pos = None, None
                             elif pos == goal: goal = None
+                            elif pos in customers: customers.remove(pos)
+                            else:
+                                customers.append(pos)
+                                grid.set_cell(row, col, 0, 1)
+
+        if compare_runner.running:
+            for name, res in compare_runner.poll():
+                results_table[name] = res
 
         if moving_robot: animate_robot_movement()
+        if fleet and fleet["t"] < max((len(p) for p in fleet["paths"]), default=1) - 1:
+            fleet["t"] += MOVE_SPEED * 60 / FPS
+            renderer.mark_all()
         
-        if animating_path and visited_animation_list:
+        if stepper:
+            cells = stepper.advance(STEP_BUDGET, anim_cells())
+            visited_count += len(cells)
+            for cell in cells:
+                if cell not in show_visited_set:
+                    show_visited_set.add(cell)
+                    renderer.add_visited(cell, skip=(start, goal))
+            if stepper.done:
+                current_path, last_cost, visited_count = stepper.result
+                last_time = stepper.elapsed
+                animating_path, stepper = False, None
+
+        elif animating_path and visited_animation_list:
             if animation_index < len(visited_animation_list):
                 # Tăng tốc độ animation
                 for _ in range(5):
                     if animation_index < len(visited_animation_list):
-                        show_visited_set.add(visited_animation_list[animation_index])
+                        cell = visited_animation_list[animation_index]
+                        if cell not in show_visited_set:
+                            show_visited_set.add(cell)
+                            renderer.add_visited(cell, skip=(start, goal))
                         animation_index += 1
             else:
                 animating_path = False
@@ -374,10 +677,34 @@ def main():
             FUNC_MENU.draw(screen, None)
 
         draw_results_table()
-        pygame.display.flip()
 
+        # Chỉ đẩy các vùng thay đổi lên màn hình: panel luôn cập nhật, cả màn hình khi có click/phím
+        # hoặc đường đi/bảng kết quả đổi, ô robot cũ và mới khi robot di chuyển
+        renderer.mark((0, 0, PANEL_W, HEIGHT))
+        sig = (len(current_path), selected_algo, len(all_paths_results), len(results_table), show_table, start, goal)
+        if had_event or sig != last_sig:
+            renderer.mark_all()
+        if robot_pos != last_robot:
+            for p in (last_robot, robot_pos):
+                if p: renderer.mark(marker_rect(*p).inflate(2, 2).clip(camera.view))
+        last_sig, last_robot = sig, robot_pos
+        rects = renderer.flush()
+        if rects is None: pygame.display.flip()
+        else: pygame.display.update(rects)
+        if "first_frame_ms" not in startup:
+            # Khung hình đầu gồm cả tạo font và atlas ảnh (resources)
+            startup["first_frame_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            startup["total_ms"] = round((time.perf_counter() - _T0) * 1000, 1)
+            if once:
+                print(json.dumps(startup))
+                running = False
+
+    compare_runner.close()
+    route_planner.shutdown()
     pygame.quit()
     sys.exit()
 
+startup["import_ms"] = round((time.perf_counter() - _T0) * 1000, 1)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(once="--startup" in sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,180 @@
+# map_gen.py
+import random
+from grid import Grid, WALL, STORM, WALL_WEIGHT
+
+try:
+    import numpy as np
+except ImportError:  # không có NumPy: chỉ có random_map (bản lặp từng ô)
+    np = None
+
+try:
+    from scipy import ndimage
+except ImportError:  # không có SciPy: gán nhãn bằng union-find NumPy (components)
+    ndimage = None
+
+# ----------------- Bản đồ ngẫu nhiên -----------------
+# Cùng logic với nút "Random Map": viền là tường, mỗi ô bên trong là tường (density_wall),
+# bão với chi phí 3/4/5 (density_storm) hoặc nước; start/goal là hai ô nước ngẫu nhiên.
+# seed cố định => bản đồ lặp lại được. Truyền grid để ghi đè lên lưới có sẵn.
+def random_map(rows, cols, density_wall=0.2, density_storm=0.1, seed=None, grid=None):
+    rng = random.Random(seed)
+    if grid is None:
+        grid = Grid(rows, cols)
+    else:
+        grid.fill(0, 1)
+    for r in range(rows):
+        for c in range(cols):
+            if r==0 or c==0 or r==rows-1 or c==cols-1:
+                grid.set_cell(r, c, 1, 999)
+    for r in range(1, rows-1):
+        for c in range(1, cols-1):
+            rnd = rng.random()
+            if rnd < density_wall:
+                grid.set_cell(r, c, 1, 999)
+            elif rnd < density_wall + density_storm:
+                grid.set_cell(r, c, 3, rng.choice([3,4,5]))
+
+    all_water_tiles = [grid.pos(i) for i, t in enumerate(grid.tile) if t == 0]
+    if len(all_water_tiles) >= 2:
+        start, goal = rng.sample(all_water_tiles, 2)
+    else:
+        start, goal = (1, 1), (rows-2, cols-2)
+
+    grid.set_cell(start[0], start[1], 0, 1)
+    grid.set_cell(goal[0], goal[1], 0, 1)
+    return grid, start, goal
+
+# ----------------- Bố cục có cấu trúc (NumPy) -----------------
+# Mỗi bố cục nhận rng (np.random.Generator) và trả về mảng bool rows x cols: True là tường.
+def noise(rng, rows, cols, wall=0.2):
+    return rng.random((rows, cols), np.float32) < wall
+
+# Mê cung sidewinder trên các ô lẻ (2i+1, 2j+1): hàng đầu là một hành lang, mỗi hàng sau chia thành
+# các đoạn ngẫu nhiên đi sang phải, mỗi đoạn mở lên trên ở một ô ngẫu nhiên. loops: tỷ lệ vách
+# giữa hai ô bị phá thêm để có nhiều đường đi.
+def maze(rng, rows, cols, loops=0.05):
+    walls = np.ones((rows, cols), bool)
+    h, w = (rows - 1) // 2, (cols - 1) // 2
+    if h < 1 or w < 1: return walls
+    walls[1:2 * h:2, 1:2 * w:2] = False
+    east = rng.random((h, w)) < 0.5
+    east[0] = True
+    east[:, -1] = False
+    walls[1:2 * h:2, 2:2 * w:2][east[:, :-1]] = False
+    if h > 1:
+        # Đoạn kết thúc ở ô không đi sang phải (ô cuối mỗi hàng luôn vậy nên đoạn không vắt qua hàng)
+        end = np.flatnonzero(~east[1:].ravel())
+        first = np.concatenate(([0], end[:-1] + 1))
+        pick = first + (rng.random(end.size) * (end - first + 1)).astype(np.int64)
+        i, j = np.divmod(pick, w)
+        walls[2 * i + 2, 2 * j + 1] = False
+    for v in (walls[1:2 * h:2, 2:2 * w:2], walls[2:2 * h:2, 1:2 * w:2]):
+        v &= rng.random(v.shape, np.float32) >= loops
+    return walls
+
+# Nhà kho: kệ rộng 2 ô xen lối đi rộng 2 ô, cứ block hàng có một lối ngang rộng 2 ô;
+# clutter: tỷ lệ ô lối đi bị hàng hoá chắn
+def warehouse(rng, rows, cols, block=10, clutter=0.02):
+    r, c = np.ogrid[:rows, :cols]
+    shelf = ((c - 2) % 4 < 2) & (c >= 2) & (c < cols - 2) & (r >= 2) & (r < rows - 2) & ((r - 2) % (block + 2) < block)
+    return shelf | (rng.random((rows, cols), np.float32) < clutter)
+
+# Hang động: tự động hoá ô (cellular automata), ô thành tường nếu >= 5 trong 3 x 3 ô quanh nó là tường
+def cave(rng, rows, cols, fill=0.45, steps=4):
+    walls = rng.random((rows, cols), np.float32) < fill
+    for _ in range(steps):
+        p = np.pad(walls, 1, constant_values=True).astype(np.uint8)
+        h = p[:, :-2] + p[:, 1:-1] + p[:, 2:]
+        walls = (h[:-2] + h[1:-1] + h[2:]) >= 5
+    return walls
+
+LAYOUTS = {"noise": noise, "maze": maze, "warehouse": warehouse, "cave": cave}
+
+# ----------------- Thành phần liên thông -----------------
+# 4-liên thông trên ô mở: mỗi hàng chia thành các đoạn liên tục, hai đoạn chồng nhau ở hai hàng kề
+# được nối bằng union-find vector hoá (móc gốc lớn vào gốc nhỏ, nén đường đi bằng parent = parent[parent]).
+# Trả về (run, first, length, root): run[r, c] là số thứ tự đoạn chứa ô (vô nghĩa ở tường),
+# first / length là ô đầu (chỉ số phẳng) và độ dài mỗi đoạn, root là nhãn thành phần của mỗi đoạn.
+def components(open_):
+    rows, cols = open_.shape
+    left = np.zeros_like(open_)
+    left[:, 1:] = open_[:, :-1]
+    right = np.zeros_like(open_)
+    right[:, :-1] = open_[:, 1:]
+    head = open_ & ~left
+    run = np.cumsum(head, dtype=np.int32).reshape(rows, cols) - 1
+    first = np.flatnonzero(head)
+    length = np.flatnonzero(open_ & ~right) - first + 1
+    parent = np.arange(first.size, dtype=np.int32)
+    # Mỗi khoảng chồng giữa hai đoạn chỉ lấy một cặp (ô đầu khoảng)
+    both = open_[:-1] & open_[1:]
+    pair = both.copy()
+    pair[:, 1:] &= ~both[:, :-1] | head[:-1, 1:] | head[1:, 1:]
+    idx = np.flatnonzero(pair)
+    flat = run.ravel()
+    a, b = flat[idx], flat[idx + cols]
+    while True:
+        diff = a != b
+        if not diff.any(): break
+        a, b = a[diff], b[diff]
+        parent[np.maximum(a, b)] = np.minimum(a, b)
+        _compress(parent)
+        a, b = parent[a], parent[b]
+    return run, first, length, parent
+
+# Nén đường đi tại chỗ: chỉ các phần tử chưa trỏ thẳng vào gốc tiếp tục nhảy
+def _compress(parent):
+    todo = np.flatnonzero(parent != parent[parent])
+    while todo.size:
+        parent[todo] = parent[parent[todo]]
+        todo = todo[parent[todo] != parent[parent[todo]]]
+
+# Nhãn thành phần cho từng ô (mảng phẳng, -1 ở tường). Có SciPy thì dùng ndimage.label (một lượt
+# quét bằng C, cấu trúc mặc định là 4-liên thông): nhãn đánh theo thứ tự quét hàng như gốc union-find.
+def label_components(open_):
+    if ndimage is not None:
+        labels, _ = ndimage.label(open_)
+        return labels.ravel().astype(np.int32) - 1
+    run, _, _, root = components(open_)
+    if not root.size: return np.full(open_.size, -1)
+    labels = root[run.ravel()]
+    labels[~open_.ravel()] = -1
+    return labels
+
+# ----------------- Sinh bản đồ -----------------
+# Viền là tường, bão (chi phí 3/4/5) rải trên ô mở với tỷ lệ storm; start/goal là hai ô ngẫu nhiên
+# của thành phần liên thông lớn nhất => luôn tới được nhau (None nếu bản đồ có ít hơn 2 ô mở).
+# seed cố định => lặp lại được. Truyền grid (cùng kích thước) để ghi đè lên lưới có sẵn.
+def generate(rows, cols, layout="noise", seed=None, storm=0.1, grid=None, **params):
+    if np is None:
+        if layout != "noise": raise RuntimeError(f"bố cục {layout!r} cần NumPy")
+        return random_map(rows, cols, params.get("wall", 0.2), storm, seed=seed, grid=grid)
+    rng = np.random.default_rng(seed)
+    walls = LAYOUTS[layout](rng, rows, cols, **params)
+    walls[[0, -1], :] = True
+    walls[:, [0, -1]] = True
+    # Chi phí bão 3/4/5 lấy từ cùng số ngẫu nhiên: u < storm thì u / storm phân bố đều trên [0, 1)
+    u = rng.random((rows, cols), np.float32)
+    storms = ~walls & (u < storm)
+    tile = walls.view(np.uint8) * np.uint8(WALL) | storms.view(np.uint8) * np.uint8(STORM)
+    weight = walls.view(np.uint8) * np.uint16(WALL_WEIGHT - 1) + np.uint16(1)
+    weight += storms.view(np.uint8) * ((u * np.float32(3 / max(storm, 1e-9))).astype(np.uint16) + np.uint16(2))
+
+    # Hai ô ngẫu nhiên (khác nhau) trong thành phần lớn nhất: ô thứ k theo thứ tự quét hàng, nên
+    # cùng seed cho cùng start/goal dù nhãn đến từ SciPy hay union-find
+    labels = label_components(~walls)
+    start = goal = None
+    sizes = np.bincount(labels + 1)[1:]
+    if sizes.size and sizes.max() >= 2:
+        cells = np.flatnonzero(labels == sizes.argmax())
+        s, g = cells[rng.choice(cells.size, 2, replace=False)]
+        tile.flat[[s, g]] = 0
+        weight.flat[[s, g]] = 1
+        start, goal = divmod(int(s), cols), divmod(int(g), cols)
+
+    if grid is None:
+        grid = Grid(rows, cols)
+    np.frombuffer(grid.tile, np.uint8)[:] = tile.ravel()
+    np.frombuffer(grid.weight, np.uint16)[:] = weight.ravel()
+    grid.invalidate()
+    return grid, start, goal
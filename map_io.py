@@ -0,0 +1,185 @@
+# map_io.py
+# Lưu / tải bản đồ:
+#   - nhị phân (.gmap): header 24 byte + mặt tile (1 byte/ô) + mặt weight (uint16 little-endian, 2 byte/ô).
+#     Tải bằng mmap (ACCESS_COPY: sửa trong UI không ghi ngược ra file) nên bản đồ hàng triệu ô mở
+#     tức thì; Grid dùng thẳng các memoryview trên vùng map làm tile/weight => mọi thuật toán
+#     (kể cả bản NumPy qua np.frombuffer) chạy trực tiếp trên bộ đệm đã map, không sao chép.
+#   - văn bản (.txt): dòng "rows cols", sau đó mỗi hàng một dòng ký tự:
+#       '.' nước (chi phí 1), '#' tường, '1'..'9' bão với chi phí đó, '~' bão chi phí khác,
+#       'S' / 'G' start / goal (ô nước, chỉ khi tự viết tay);
+#     chi phí không suy ra được từ ký tự (nước != 1, '~', tường != 999) ghi thêm ở cuối dạng "r c weight".
+#     export_text giữ nguyên ký tự ô của start / goal và ghi chúng ở cuối dạng "S r c" / "G r c"
+#     (start / goal nằm trên ô bão hay tường vẫn chuyển đổi qua lại không mất loại ô).
+#     Dòng bắt đầu bằng ';' là chú thích.
+#   python map_io.py convert map.txt map.gmap | python map_io.py random 4000x4000 big.gmap --layout maze --seed 1
+import argparse
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from grid import Grid, WATER, WALL, STORM, WALL_WEIGHT
+import map_gen
+
+MAGIC = b"GMAP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIii")     # magic, version, (dự trữ), rows, cols, start, goal (-1: không có)
+TEXT_TILES = {'.': WATER, '#': WALL, '~': STORM, 'S': WATER, 'G': WATER}
+
+# Vị trí mặt weight: căn chẵn để cast('H') trên vùng map
+def _weight_offset(n):
+    return HEADER.size + n + (HEADER.size + n) % 2
+
+# Ghi ra file tạm cùng thư mục rồi os.replace() đè lên path: không cắt ngắn file đang được mmap
+# (grid vừa load() từ chính path vẫn đọc bản cũ), và lỗi giữa chừng không làm hỏng file cũ.
+def _write_atomic(path, write, mode="wb", **kw):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp-", suffix=".map")
+    try:
+        with os.fdopen(fd, mode, **kw) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+# ----------------- Nhị phân -----------------
+def save(path, grid, start=None, goal=None):
+    n = len(grid)
+    sid = grid.idx(*start) if start else -1
+    gid = grid.idx(*goal) if goal else -1
+    weight = array('H', grid.weight)
+    if sys.byteorder == "big": weight.byteswap()
+
+    def write(f):
+        f.write(HEADER.pack(MAGIC, VERSION, 0, grid.rows, grid.cols, sid, gid))
+        f.write(memoryview(grid.tile).cast('B'))
+        f.write(bytes(_weight_offset(n) - HEADER.size - n))
+        f.write(weight.tobytes())
+    _write_atomic(path, write)
+
+# Trả về (grid, start, goal). use_mmap=False đọc hết file vào mảng riêng.
+def load(path, use_mmap=True):
+    with open(path, "rb") as f:
+        head = f.read(HEADER.size)
+        if len(head) < HEADER.size: raise ValueError(f"{path}: file quá ngắn")
+        magic, version, _, rows, cols, sid, gid = HEADER.unpack(head)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: không phải bản đồ GMAP v{VERSION}")
+        n = rows * cols
+        off = _weight_offset(n)
+        if use_mmap and sys.byteorder == "little":
+            buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY))
+            if len(buf) < off + 2 * n: raise ValueError(f"{path}: thiếu dữ liệu")
+            tile, weight = buf[HEADER.size:HEADER.size + n], buf[off:off + 2 * n].cast('H')
+        else:
+            data = head + f.read()
+            if len(data) < off + 2 * n: raise ValueError(f"{path}: thiếu dữ liệu")
+            tile, weight = array('B', data[HEADER.size:HEADER.size + n]), array('H')
+            weight.frombytes(data[off:off + 2 * n])
+            if sys.byteorder == "big": weight.byteswap()
+    grid = Grid(rows, cols, tile, weight)
+    pos = lambda i: grid.pos(i) if 0 <= i < n else None
+    return grid, pos(sid), pos(gid)
+
+# ----------------- Văn bản -----------------
+def export_text(path, grid, start=None, goal=None):
+    cols, tile, weight = grid.cols, grid.tile, grid.weight
+    lines, extra = [f"{grid.rows} {cols}"], []
+    for r in range(grid.rows):
+        row = []
+        for c in range(cols):
+            i = r * cols + c
+            t, w = tile[i], weight[i]
+            if t == WALL: ch = '#'
+            elif t == STORM: ch = str(w) if 1 <= w <= 9 else '~'
+            else: ch = '.'
+            row.append(ch)
+            if (ch == '.' and w != 1) or ch == '~' or (ch == '#' and w != WALL_WEIGHT):
+                extra.append(f"{r} {c} {w}")
+        lines.append("".join(row))
+    extra += [f"{name} {p[0]} {p[1]}" for name, p in (("S", start), ("G", goal)) if p]
+    _write_atomic(path, lambda f: f.write("\n".join(lines + extra) + "\n"), "w", encoding="utf-8")
+
+def import_text(path):
+    with open(path, encoding="utf-8") as f:
+        lines = [ln.rstrip("\r\n") for ln in f if ln.strip() and not ln.startswith(";")]
+    try:
+        rows, cols = map(int, lines[0].split())
+    except (IndexError, ValueError):
+        raise ValueError(f"{path}: dòng đầu phải là 'rows cols'") from None
+    if len(lines) < rows + 1: raise ValueError(f"{path}: cần {rows} hàng bản đồ")
+    grid = Grid(rows, cols)
+    tile, weight = grid.tile, grid.weight
+    start = goal = None
+    for r, line in enumerate(lines[1:rows + 1]):
+        if len(line) != cols: raise ValueError(f"{path}: hàng {r} có {len(line)} ô, cần {cols}")
+        for c, ch in enumerate(line):
+            i = r * cols + c
+            if ch in TEXT_TILES:
+                tile[i] = TEXT_TILES[ch]
+                if ch == '#': weight[i] = WALL_WEIGHT
+                elif ch == '~': weight[i] = 3
+                elif ch == 'S': start = (r, c)
+                elif ch == 'G': goal = (r, c)
+            elif ch.isdigit() and ch != '0':
+                tile[i], weight[i] = STORM, int(ch)
+            else:
+                raise ValueError(f"{path}: ký tự lạ {ch!r} ở ({r}, {c})")
+    for line in lines[rows + 1:]:
+        name, *rest = line.split()
+        try:
+            if name in ("S", "G"):
+                r, c = map(int, rest)
+                if name == "S": start = (r, c)
+                else: goal = (r, c)
+            else:
+                r, c, w = map(int, line.split())
+                weight[r * cols + c] = w
+        except ValueError:
+            raise ValueError(f"{path}: dòng lạ {line!r}, cần 'r c weight' hoặc 'S r c' / 'G r c'") from None
+    grid.invalidate()
+    return grid, start, goal
+
+# Chọn định dạng theo đuôi file
+def read_map(path, use_mmap=True):
+    return import_text(path) if path.endswith(".txt") else load(path, use_mmap)
+
+def write_map(path, grid, start=None, goal=None):
+    (export_text if path.endswith(".txt") else save)(path, grid, start, goal)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Lưu / chuyển đổi bản đồ (.gmap nhị phân, .txt văn bản)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    cv = sub.add_parser("convert", help="chuyển đổi giữa .txt và .gmap")
+    cv.add_argument("src")
+    cv.add_argument("dst")
+    rd = sub.add_parser("random", help="tạo bản đồ ngẫu nhiên có seed (dữ liệu benchmark cố định)")
+    rd.add_argument("size", help="RxC, ví dụ 2000x3000")
+    rd.add_argument("dst")
+    rd.add_argument("--walls", type=float, default=0.2)
+    rd.add_argument("--storms", type=float, default=0.1)
+    rd.add_argument("--seed", type=int, default=0)
+    rd.add_argument("--layout", choices=list(map_gen.LAYOUTS), help="bố cục map_gen.generate (mặc định random_map)")
+    info = sub.add_parser("info", help="in kích thước và start/goal")
+    info.add_argument("src")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "convert":
+        write_map(args.dst, *read_map(args.src))
+    elif args.cmd == "random":
+        r, _, c = args.size.lower().partition("x")
+        rows, cols = int(r), int(c or r)
+        if args.layout:
+            params = {"wall": args.walls} if args.layout == "noise" else {}
+            made = map_gen.generate(rows, cols, args.layout, args.seed, args.storms, **params)
+        else:
+            made = map_gen.random_map(rows, cols, args.walls, args.storms, seed=args.seed)
+        write_map(args.dst, *made)
+    else:
+        grid, start, goal = read_map(args.src)
+        walls = bytes(grid.tile).count(WALL)
+        print(f"{grid.rows}x{grid.cols}, {walls} tường, start={start}, goal={goal}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# multi_agent.py
+import sys
+import time
+import heapq
+import random
+import argparse
+from array import array
+from path_service import distance_field
+
+INF = float('inf')
+
+# ----------------- Bảng đặt chỗ không gian - thời gian -----------------
+# Mỗi bước thời gian mọi robot cùng đi một ô hoặc đứng yên. Đường đi theo thời gian là danh sách ô,
+# phần tử thứ k là vị trí ở thời điểm t0 + k.
+# cells: (ô, t) -> robot; edges: (u, v, t) -> robot đi u -> v trong khoảng t -> t + 1;
+# parked: ô -> (t, robot) robot đỗ ở ô từ thời điểm t trở đi.
+# Robot -1 là ràng buộc cấm (CBS) chứ không phải một robot thật.
+class Reservations:
+    def __init__(self):
+        self.cells = {}
+        self.edges = {}
+        self.parked = {}
+        self.latest = {}    # ô -> thời điểm cuối cùng bị giữ
+
+    # Robot `agent` có đi được u -> v trong khoảng t -> t + 1 không (v == u là đứng chờ)
+    def free(self, u, v, t, agent):
+        owner = self.cells.get((v, t + 1))
+        if owner is not None and owner != agent: return False
+        p = self.parked.get(v)
+        if p is not None and p[1] != agent and p[0] <= t + 1: return False
+        owner = self.edges.get((v, u, t))
+        return owner is None or owner == agent or u == v
+
+    # Ô không còn bị robot khác giữ sau thời điểm t: robot dừng hẳn ở đó được
+    def clear_after(self, cell, t):
+        return self.latest.get(cell, -1) <= t
+
+    def hold(self, cell, t, agent):
+        self.cells[(cell, t)] = agent
+        if t > self.latest.get(cell, -1): self.latest[cell] = t
+
+    def reserve(self, agent, path, t0=0, park=False):
+        for k, cell in enumerate(path):
+            self.hold(cell, t0 + k, agent)
+            if k: self.edges[(path[k - 1], cell, t0 + k - 1)] = agent
+        if park and path:
+            self.parked[path[-1]] = (t0 + len(path) - 1, agent)
+            self.latest[path[-1]] = INF
+
+# Heuristic: chi phí thật tới goal trên bản đồ (bỏ qua robot khác), -1 nếu không tới được
+def heuristic(grid, goal):
+    dist, _ = distance_field(grid, goal, reverse=True)
+    return dist if isinstance(dist, array) else array('i', bytes(dist))
+
+# ----------------- Space-time A* -----------------
+# Trạng thái (ô, t); đứng chờ tốn 1, đi vào ô tốn weight của ô như các thuật toán một robot.
+# window: dừng ở độ sâu window (WHCA*), phần còn lại ước lượng bằng h; không có window thì chỉ
+# kết thúc tại goal khi không còn robot nào giữ goal về sau.
+def space_time_astar(grid, start, goal, h, res, agent, t0=0, window=None, horizon=None):
+    if h[start] < 0: return None
+    mask, steps = grid.adjacency()
+    wt = grid.weight
+    if horizon is None:
+        horizon = t0 + 2 * h[start] + 2 * (grid.rows + grid.cols)
+    best = {(start, t0): 0}
+    parent = {(start, t0): None}
+    heap = [(h[start], -t0, start)]
+    while heap:
+        f, nt, u = heapq.heappop(heap)
+        t = -nt
+        g = best[(u, t)]
+        if f > g + h[u]: continue
+        if (u == goal and res.clear_after(goal, t)) or (window and t - t0 >= window):
+            path = []
+            key = (u, t)
+            while key is not None:
+                path.append(key[0])
+                key = parent[key]
+            path.reverse()
+            return path
+        if t >= horizon: continue
+        for v in (u, *(u + d for d in steps[mask[u]])):
+            if not res.free(u, v, t, agent): continue
+            ng = g + (1 if v == u else wt[v])
+            key = (v, t + 1)
+            if ng < best.get(key, INF):
+                best[key] = ng
+                parent[key] = (u, t)
+                heapq.heappush(heap, (ng + h[v], -(t + 1), v))
+    return None
+
+# Xung đột đầu tiên giữa các đường đi (robot đứng yên ở ô cuối sau khi tới):
+# ("vertex", i, j, ô, t) hoặc ("edge", i, j, u, v, t) với i đi u -> v còn j đi v -> u; None nếu không có
+def find_conflict(paths):
+    length = max((len(p) for p in paths), default=0)
+    at = lambda p, t: p[min(t, len(p) - 1)]
+    for t in range(length):
+        seen = {}
+        for i, p in enumerate(paths):
+            if not p: continue
+            cell = at(p, t)
+            if cell in seen: return ("vertex", seen[cell], i, cell, t)
+            seen[cell] = i
+        if t == 0: continue
+        moves = {}
+        for i, p in enumerate(paths):
+            if not p: continue
+            u, v = at(p, t - 1), at(p, t)
+            if u != v:
+                if (v, u) in moves: return ("edge", moves[(v, u)], i, v, u, t - 1)
+                moves[(u, v)] = i
+    return None
+
+def path_cost(grid, path):
+    wt = grid.weight
+    end = len(path)
+    while end > 1 and path[end - 1] == path[end - 2]:
+        end -= 1
+    return sum(1 if a == b else wt[b] for a, b in zip(path[:end - 1], path[1:end]))
+
+# ----------------- Cooperative A* / WHCA* -----------------
+# Lập kế hoạch lần lượt theo thứ tự ưu tiên, mỗi robot đặt chỗ đường của mình trước robot sau.
+# Trước khi lập, ô hiện tại của mọi robot được giữ ở t0 + 1 để robot ưu tiên cao không đâm vào
+# robot chưa lập. Robot không tìm được đường đứng yên.
+def cooperative_plan(grid, positions, goals, hs, order=None, t0=0, window=None):
+    res = Reservations()
+    for i, p in enumerate(positions):
+        res.hold(p, t0 + 1, i)
+    paths = [None] * len(positions)
+    failed = []
+    for i in order or range(len(positions)):
+        path = space_time_astar(grid, positions[i], goals[i], hs[i], res, i, t0, window)
+        if path is None:
+            failed.append(i)
+            path = [positions[i]]
+        reached = path[-1] == goals[i]
+        res.reserve(i, path, t0, park=reached)
+        paths[i] = path
+    return paths, failed
+
+# Chạy WHCA*: mỗi chu kỳ lập kế hoạch window bước, thực hiện window // 2 bước rồi lập lại,
+# robot bị kẹt được ưu tiên ở chu kỳ sau. Nếu hai đường vẫn xung đột thì cả đội chỉ đi tới trước
+# bước xung đột, nên đường đi thực tế luôn không va chạm.
+# step_hook(k, positions) được gọi sau mỗi bước (dùng cho mô phỏng giao hàng liên tục).
+def run_windowed(grid, positions, goals, window=16, max_steps=None, hs=None, step_hook=None):
+    n = len(positions)
+    positions = list(positions)
+    hs = hs or [heuristic(grid, g) for g in goals]
+    trails = [[p] for p in positions]
+    max_steps = max_steps or 4 * (grid.rows + grid.cols) + 8 * n
+    priority = list(range(n))
+    t = 0
+    while t < max_steps and (step_hook or any(p != g for p, g in zip(positions, goals))):
+        paths, failed = cooperative_plan(grid, positions, goals, hs, priority, t, window)
+        priority = failed + [i for i in priority if i not in failed]
+        conflict = find_conflict(paths)
+        run = max(1, window // 2)
+        if conflict is not None:
+            # chỉ số thời gian trong paths tính từ t: va chạm ô ở bước k -> đi được k - 1 bước
+            run = min(run, conflict[-1] - 1 if conflict[0] == "vertex" else conflict[-1])
+        if run <= 0:
+            # Xung đột ngay bước đầu: mọi robot chờ một nhịp, đổi thứ tự ưu tiên
+            priority = priority[1:] + priority[:1]
+            for trail in trails:
+                trail.append(trail[-1])
+            t += 1
+            continue
+        for k in range(1, run + 1):
+            for i, path in enumerate(paths):
+                positions[i] = path[min(k, len(path) - 1)]
+                trails[i].append(positions[i])
+            t += 1
+            if step_hook: step_hook(t, positions)
+            if t >= max_steps: break
+    return trails
+
+# ----------------- Conflict-Based Search -----------------
+# Tìm kiếm hai tầng: tầng trên là cây ràng buộc theo tổng chi phí, tầng dưới là space-time A*
+# của từng robot với các ràng buộc cấm. Tối ưu nhưng bùng nổ khi nhiều robot: dừng sau max_nodes.
+def _constrained(grid, i, start, goal, h, constraints):
+    res = Reservations()
+    for c in constraints:
+        if c[0] == "vertex":
+            res.hold(c[1], c[2], -1)
+        else:
+            _, u, v, t = c
+            res.edges[(v, u, t)] = -1   # free() coi như có robot đi v -> u: cấm u -> v tại t
+    return space_time_astar(grid, start, goal, h, res, i)
+
+def cbs(grid, starts, goals, hs=None, max_nodes=2000):
+    n = len(starts)
+    hs = hs or [heuristic(grid, g) for g in goals]
+    paths = []
+    for i in range(n):
+        p = _constrained(grid, i, starts[i], goals[i], hs[i], ())
+        if p is None: return None
+        paths.append(p)
+    counter = 0
+    heap = [(sum(path_cost(grid, p) for p in paths), counter, [() for _ in range(n)], paths)]
+    while heap and counter < max_nodes:
+        cost, _, cons, paths = heapq.heappop(heap)
+        conflict = find_conflict(paths)
+        if conflict is None: return paths
+        if conflict[0] == "vertex":
+            _, i, j, cell, t = conflict
+            branches = ((i, ("vertex", cell, t)), (j, ("vertex", cell, t)))
+        else:
+            _, i, j, u, v, t = conflict
+            branches = ((i, ("edge", v, u, t)), (j, ("edge", u, v, t)))
+        for agent, c in branches:
+            new_cons = list(cons)
+            new_cons[agent] = cons[agent] + (c,)
+            p = _constrained(grid, agent, starts[agent], goals[agent], hs[agent], new_cons[agent])
+            if p is None: continue
+            new_paths = list(paths)
+            new_paths[agent] = p
+            counter += 1
+            heapq.heappush(heap, (sum(path_cost(grid, q) for q in new_paths), counter, new_cons, new_paths))
+    return None
+
+# Đường đi theo thời gian (danh sách ô (r, c)) cho mọi robot.
+# mode: "whca" (mặc định), "ca" (cooperative A* không giới hạn cửa sổ) hoặc "cbs" (lùi về WHCA*
+# nếu vượt max_nodes).
+def plan_paths(grid, starts, goals, mode="whca", window=16, max_nodes=2000):
+    s = [grid.idx(*p) for p in starts]
+    g = [grid.idx(*p) for p in goals]
+    hs = [heuristic(grid, x) for x in g]
+    trails = None
+    if mode == "cbs":
+        trails = cbs(grid, s, g, hs, max_nodes)
+    elif mode == "ca":
+        paths, failed = cooperative_plan(grid, s, g, hs)
+        if not failed and find_conflict(paths) is None:
+            trails = paths
+    if trails is None:
+        trails = run_windowed(grid, s, g, window, hs=hs)
+    cols = grid.cols
+    return [[divmod(i, cols) for i in trail] for trail in trails]
+
+# ----------------- Mô phỏng giao hàng -----------------
+# n robot nhận đơn liên tục: tới khách hàng thì tính một lần giao và nhận khách mới ngẫu nhiên
+# cùng vùng liên thông. speed: số ô mỗi giây (UI: MOVE_SPEED * FPS = 3 ô/giây).
+def throughput(grid, n_robots, steps=600, window=16, seed=0, speed=3.0):
+    rnd = random.Random(seed)
+    mask, _ = grid.adjacency()
+    free = [i for i in range(len(grid)) if grid.tile[i] != 1 and mask[i]]
+    if len(free) < 2 * n_robots: raise ValueError("bản đồ quá nhỏ cho số robot này")
+    cache = {}
+
+    def h_of(goal):
+        if goal not in cache:
+            if len(cache) > 4 * n_robots: cache.clear()
+            cache[goal] = heuristic(grid, goal)
+        return cache[goal]
+
+    def new_goal(pos, taken):
+        while True:
+            goal = rnd.choice(free)
+            if goal != pos and goal not in taken and h_of(goal)[pos] >= 0: return goal
+
+    positions = rnd.sample(free, n_robots)
+    goals = []
+    for p in positions:
+        goals.append(new_goal(p, set(goals) | set(positions)))
+    hs = [h_of(g) for g in goals]
+    done = [0]
+
+    def on_step(t, pos):
+        for i, p in enumerate(pos):
+            if p == goals[i]:
+                done[0] += 1
+                goals[i] = new_goal(p, set(goals) | set(pos))
+                hs[i] = h_of(goals[i])
+
+    t0 = time.perf_counter()
+    run_windowed(grid, positions, goals, window, max_steps=steps, hs=hs, step_hook=on_step)
+    minutes = steps / speed / 60
+    return {"robots": n_robots, "steps": steps, "deliveries": done[0],
+            "per_minute": done[0] / minutes, "wall_s": time.perf_counter() - t0}
+
+def main(argv=None):
+    import map_gen
+    ap = argparse.ArgumentParser(description="Mô phỏng giao hàng nhiều robot (WHCA*), không cần pygame")
+    ap.add_argument("--size", default="40x60", help="RxC")
+    ap.add_argument("--robots", default="5,10,20", help="số robot, phân tách bằng dấu phẩy")
+    ap.add_argument("--steps", type=int, default=600)
+    ap.add_argument("--window", type=int, default=16)
+    ap.add_argument("--walls", type=float, default=0.15)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    rows, _, cols = args.size.lower().partition("x")
+    grid, _, _ = map_gen.random_map(int(rows), int(cols or rows), args.walls, 0.05, seed=args.seed)
+    print("robots,deliveries,per_minute,wall_s")
+    for n in (int(x) for x in args.robots.split(",")):
+        r = throughput(grid, n, args.steps, args.window, args.seed)
+        print(f"{n},{r['deliveries']},{r['per_minute']:.1f},{r['wall_s']:.2f}")
+        sys.stdout.flush()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# open_list.py
+# Open list dùng chung cho UCS / A* (algorithms.ucs_steps, astar_steps), chọn bằng tên:
+#   "heap"    heapq với mục trùng: mỗi lần g giảm đẩy thêm một mục, mục cũ bị bỏ khi pop (closed[u]),
+#   "indexed" heap nhị phân có chỉ mục theo ô: giảm khoá tại chỗ, mỗi ô nhiều nhất một mục,
+#   "bucket"  hàng đợi theo thùng (Dial): một thùng cho mỗi giá trị khoá nguyên, các khoá đang có
+#             thùng nằm trong một heap nhỏ; giảm khoá = chuyển ô sang thùng khác.
+# Giao diện chung: push((key, node)) chèn hoặc giảm khoá (bản "heap" luôn chèn), pop() -> (key, node)
+# nhỏ nhất, IndexError khi rỗng (giống heapq), len() là số mục đang giữ.
+import heapq
+from array import array
+from functools import partial
+
+class LazyHeap:
+    def __init__(self, n):
+        self.items = []
+        self.push = partial(heapq.heappush, self.items)
+        self.pop = partial(heapq.heappop, self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+class IndexedHeap:
+    def __init__(self, n):
+        self.keys = []              # keys[i], nodes[i]: mục thứ i của heap
+        self.nodes = []
+        self.pos = array('i', [-1]) * n
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def push(self, item):
+        key, v = item
+        keys, nodes, pos = self.keys, self.nodes, self.pos
+        i = pos[v]
+        if i < 0:
+            i = len(nodes)
+            keys.append(key)
+            nodes.append(v)
+        elif key >= keys[i]:
+            return
+        while i:
+            p = (i - 1) >> 1
+            if keys[p] <= key: break
+            u = nodes[p]
+            keys[i], nodes[i], pos[u] = keys[p], u, i
+            i = p
+        keys[i], nodes[i], pos[v] = key, v, i
+
+    def pop(self):
+        keys, nodes, pos = self.keys, self.nodes, self.pos
+        key, v = keys[0], nodes[0]
+        last_key, last = keys.pop(), nodes.pop()
+        pos[v] = -1
+        n = len(nodes)
+        if n:
+            i = 0
+            while True:
+                c = 2 * i + 1
+                if c >= n: break
+                if c + 1 < n and keys[c + 1] < keys[c]: c += 1
+                if keys[c] >= last_key: break
+                u = nodes[c]
+                keys[i], nodes[i], pos[u] = keys[c], u, i
+                i = c
+            keys[i], nodes[i], pos[last] = last_key, last, i
+        return key, v
+
+# Khoá phải là số nguyên (chi phí ô là uint16 nên g và f = g + manhattan luôn nguyên).
+# Số khoá khác nhau cùng lúc trong hàng đợi nhỏ (cỡ chi phí ô lớn nhất), nên heap khoá rất nhỏ.
+class BucketQueue:
+    def __init__(self, n):
+        self.buckets = {}           # khoá -> tập ô
+        self.keys = []              # heap các khoá có thùng (thùng rỗng được bỏ khi pop gặp)
+        self.where = array('q', [-1]) * n
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, item):
+        key, v = item
+        where, buckets = self.where, self.buckets
+        old = where[v]
+        if old < 0:
+            self.size += 1
+        elif key >= old:
+            return
+        else:
+            buckets[old].discard(v)
+        where[v] = key
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = bucket = set()
+            heapq.heappush(self.keys, key)
+        bucket.add(v)
+
+    def pop(self):
+        keys, buckets = self.keys, self.buckets
+        while True:
+            key = keys[0]
+            bucket = buckets[key]
+            if bucket: break
+            heapq.heappop(keys)
+            del buckets[key]
+        v = bucket.pop()
+        self.where[v] = -1
+        self.size -= 1
+        return key, v
+
+KINDS = {"heap": LazyHeap, "indexed": IndexedHeap, "bucket": BucketQueue}
+
+def make(kind, n):
+    try:
+        return KINDS[kind](n)
+    except KeyError:
+        raise ValueError(f"open list không hợp lệ: {kind!r} (chọn {', '.join(KINDS)})") from None
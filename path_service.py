@@ -0,0 +1,94 @@
+# path_service.py
+import time
+from collections import OrderedDict
+import algorithms as algo
+import wavefront
+from grid import as_grid
+
+# Trường khoảng cách một nguồn (dist, parent): bản NumPy theo bucket nếu có, không thì Dijkstra thường
+def distance_field(grid, root, reverse=False):
+    if wavefront.HAVE_NUMPY:
+        dist, parent, _ = wavefront.dijkstra_field(grid, root, reverse=reverse)
+        return dist, parent
+    return algo.dijkstra_field(grid, root, reverse=reverse)
+
+# ----------------- Dịch vụ nhiều truy vấn -----------------
+# Giữ các trường khoảng cách/parent một nguồn trên cùng một bản đồ:
+#  - trường theo đích (reverse): mọi robot đi tới cùng khách hàng chỉ cần lần theo parent,
+#  - trường theo điểm xuất phát: dùng lại nếu đã có cho start.
+# Cache LRU, tự xoá khi grid.version đổi (chỉ khi địa hình/chi phí thật sự bị sửa).
+class PathService:
+    def __init__(self, grid, capacity=32):
+        self.grid = grid
+        self.capacity = capacity
+        self.fields = OrderedDict()    # (ô gốc, reverse) -> (dist, parent)
+        self.version = grid.version
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self):
+        if self.grid.version != self.version:
+            self.fields.clear()
+            self.version = self.grid.version
+
+    def _build(self, root, reverse):
+        return distance_field(self.grid, root, reverse)
+
+    def field(self, root, reverse=True):
+        self._check_version()
+        key = (root, reverse)
+        entry = self.fields.get(key)
+        if entry is not None:
+            self.fields.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = self._build(root, reverse)
+        self.fields[key] = entry
+        if len(self.fields) > self.capacity:
+            self.fields.popitem(last=False)
+        return entry
+
+    # Trả về (path, cost) với path là danh sách (r, c); ([], 0) nếu không tới được
+    def query(self, start, goal):
+        self._check_version()
+        grid = self.grid
+        s, g = grid.idx(*start), grid.idx(*goal)
+        if (s, False) in self.fields and (g, True) not in self.fields:
+            dist, parent = self.field(s, reverse=False)
+            cost = dist[g]
+            if cost < 0: return [], 0
+            ids = wavefront.walk(parent, g)
+            ids.reverse()
+        else:
+            dist, parent = self.field(g, reverse=True)
+            cost = dist[s]
+            if cost < 0: return [], 0
+            ids = wavefront.walk(parent, s)
+        return [grid.pos(i) for i in ids], int(cost)
+
+    def clear(self):
+        self.fields.clear()
+
+    # Cùng chữ ký và bộ kết quả với các hàm trong SEARCHERS (không có danh sách ô duyệt).
+    # Bản đồ truyền vào khác self.grid (vd. bản đồ vừa tải, benchmark) thì dùng dịch vụ riêng của nó.
+    def search(self, start, goal, tile, weight, rows, cols, record=True):
+        if not start or not goal: return [], [], 0, 0, 0
+        grid = as_grid(tile, weight, rows, cols)
+        service = self if grid is self.grid else service_for(grid, self.capacity)
+        t0 = time.perf_counter()
+        path, cost = service.query(start, goal)
+        t = time.perf_counter() - t0
+        return path, [], 0, t, cost
+
+# Vài dịch vụ gần nhất theo grid (cache các trường của mỗi bản đồ tự xoá theo grid.version)
+_services = OrderedDict()
+
+def service_for(grid, capacity=32, keep=4):
+    entry = _services.get(id(grid))
+    if entry is None or entry[0] is not grid:
+        entry = _services[id(grid)] = (grid, PathService(grid, capacity))
+        if len(_services) > keep:
+            _services.popitem(last=False)
+    _services.move_to_end(id(grid))
+    return entry[1]
@@ -0,0 +1,188 @@
+# reachability.py
+import time
+from array import array
+from collections import OrderedDict, deque
+from grid import Grid, WALL, changed_cells
+import map_gen
+
+# ----------------- Chỉ mục thành phần liên thông -----------------
+# label[i]: nhãn thành phần của ô mở i (-1 ở tường); các nhãn gộp với nhau bằng union-find (parent),
+# nên hai ô tới được nhau <=> find(label[a]) == find(label[b]), kiểm tra O(1) (gần như).
+# Cập nhật theo grid.version (so với bản chụp tile, chi phí không ảnh hưởng):
+#  - ô mở ra: gộp nhãn của các ô kề, không cần duyệt lại,
+#  - ô thành tường: nếu các ô kề còn mở vẫn nối với nhau qua vòng 8 ô quanh nó thì thành phần không
+#    thể bị tách => chỉ xoá nhãn; ngược lại đánh dấu dirty và gán nhãn lại toàn bộ ở lần hỏi sau
+#    (NumPy qua map_gen.label_components nếu có, không thì BFS).
+class ComponentIndex:
+    def __init__(self, grid, rebuild_ratio=1 / 64):
+        self.grid = grid
+        self.rebuild_ratio = rebuild_ratio
+        self.label = None
+        self.parent = None
+        self.tile = None
+        self.version = None
+        self.dirty = True
+        self.rebuilds = 0
+
+    # --- Union-find trên nhãn ---
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def _union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            if a < b: a, b = b, a
+            self.parent[a] = b
+        return b
+
+    # --- Gán nhãn toàn bộ ---
+    def rebuild(self):
+        grid = self.grid
+        if map_gen.np is not None:
+            np = map_gen.np
+            tile = np.frombuffer(grid.tile, np.uint8).reshape(grid.rows, grid.cols)
+            labels = map_gen.label_components(tile != WALL).astype(np.int32)
+            self.label = array('i', labels.tobytes())
+            count = int(labels.max()) + 1 if labels.size else 0
+        else:
+            self.label, count = self._bfs_labels()
+        self.parent = array('i', range(count))
+        self.dirty = False
+        self.rebuilds += 1
+
+    def _bfs_labels(self):
+        grid = self.grid
+        tile = grid.tile
+        mask, steps = grid.adjacency()
+        label = array('i', [-1]) * len(grid)
+        count = 0
+        for i in range(len(grid)):
+            if tile[i] == WALL or label[i] >= 0: continue
+            label[i] = count
+            queue = deque([i])
+            while queue:
+                u = queue.popleft()
+                for d in steps[mask[u]]:
+                    v = u + d
+                    if label[v] < 0:
+                        label[v] = count
+                        queue.append(v)
+            count += 1
+        return label, count
+
+    # --- Cập nhật theo các ô đổi ---
+    def _open(self, i):
+        root = -1
+        for j in self._around(i):
+            if self.label[j] >= 0:
+                root = self.label[j] if root < 0 else self._union(root, self.label[j])
+        if root < 0:
+            root = len(self.parent)
+            self.parent.append(root)
+        self.label[i] = root
+
+    def _around(self, i):
+        grid = self.grid
+        cols, tile = grid.cols, grid.tile
+        r, c = divmod(i, cols)
+        if r > 0 and tile[i - cols] != WALL: yield i - cols
+        if r + 1 < grid.rows and tile[i + cols] != WALL: yield i + cols
+        if c > 0 and tile[i - 1] != WALL: yield i - 1
+        if c + 1 < cols and tile[i + 1] != WALL: yield i + 1
+
+    # Thành ô tường có thể tách thành phần không: các ô kề (4 hướng) còn mở phải nằm trên cùng một
+    # cung liên tục các ô mở của vòng 8 ô quanh i (hai ô liên tiếp trên vòng luôn kề cạnh nhau)
+    def _may_split(self, i):
+        grid = self.grid
+        rows, cols, tile = grid.rows, grid.cols, grid.tile
+        r, c = divmod(i, cols)
+        ring = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+        free = [0 <= r + dr < rows and 0 <= c + dc < cols and tile[(r + dr) * cols + c + dc] != WALL
+                for dr, dc in ring]
+        sides = [k for k in (0, 2, 4, 6) if free[k]]
+        if len(sides) <= 1: return False
+        if all(free): return False
+        # Đi vòng từ một ô tường: mỗi cung mở mới có id riêng
+        k0 = free.index(False)
+        arc, arcs = -1, [0] * 8
+        for step in range(1, 9):
+            k = (k0 + step) % 8
+            if free[k]:
+                if not free[(k - 1) % 8]: arc += 1
+                arcs[k] = arc
+        return len({arcs[k] for k in sides}) > 1
+
+    def sync(self):
+        grid = self.grid
+        if grid.version == self.version and not self.dirty: return
+        if self.label is None or self.dirty or self.tile is None or len(self.tile) != len(grid):
+            self.rebuild()
+        else:
+            changed = changed_cells(self.tile, grid.tile)
+            flips = [i for i in changed if (self.tile[i] == WALL) != (grid.tile[i] == WALL)]
+            if len(flips) > self.rebuild_ratio * len(grid):
+                self.rebuild()
+            else:
+                closed = [i for i in flips if grid.tile[i] == WALL]
+                for i in closed:
+                    self.label[i] = -1
+                # Kiểm tra từng ô chỉ đúng khi các ô vừa đóng không nằm trong vòng 8 ô của nhau
+                near = {i + dr * grid.cols + dc for i in closed for dr in (-1, 0, 1) for dc in (-1, 0, 1)}
+                if len(closed) > 1 and len(near) < 9 * len(closed) or any(self._may_split(i) for i in closed):
+                    self.rebuild()
+                else:
+                    for i in flips:
+                        if grid.tile[i] != WALL: self._open(i)
+        self.tile = array('B', grid.tile)
+        self.version = grid.version
+
+    # --- Truy vấn ---
+    # False chỉ khi chắc chắn không tới được: goal là tường, hoặc start/goal khác thành phần
+    def reachable(self, s, g):
+        if s == g: return True
+        self.sync()
+        if self.grid.tile[g] == WALL: return False
+        ls, lg = self.label[s], self.label[g]
+        if ls < 0: return True      # start trên tường: để thuật toán tự quyết
+        return self.find(ls) == self.find(lg)
+
+# ----------------- Chặn truy vấn không tới được -----------------
+# Vài chỉ mục gần nhất theo grid (benchmark/tiến trình con luân phiên nhiều bản đồ)
+_indexes = OrderedDict()
+
+def index_for(grid, capacity=4):
+    entry = _indexes.get(id(grid))
+    if entry is None or entry[0] is not grid:
+        entry = _indexes[id(grid)] = (grid, ComponentIndex(grid))
+        if len(_indexes) > capacity:
+            _indexes.popitem(last=False)
+    _indexes.move_to_end(id(grid))
+    return entry[1]
+
+def reset():
+    _indexes.clear()
+
+# Bọc một hàm trong SEARCHERS: kiểm tra chỉ mục trước, trả về "không có đường" ngay nếu start/goal
+# khác thành phần. Là lớp (không phải closure) để vẫn pickle được cho CompareRunner; __self__ giữ
+# theo hàm gốc để hàm có trạng thái (phương thức) vẫn được chạy tại chỗ.
+class Guarded:
+    def __init__(self, func):
+        self.func = func
+        self.__name__ = getattr(func, "__name__", type(func).__name__)
+
+    @property
+    def __self__(self):
+        return getattr(self.func, "__self__", None)
+
+    def __call__(self, start, goal, tile, weight, rows, cols, **kwargs):
+        if start and goal and isinstance(tile, Grid):
+            t0 = time.perf_counter()
+            if not index_for(tile).reachable(tile.idx(*start), tile.idx(*goal)):
+                return [], [], 0, time.perf_counter() - t0, 0
+        return self.func(start, goal, tile, weight, rows, cols, **kwargs)
@@ -0,0 +1,257 @@
+# renderer.py
+import math
+from array import array
+from collections import OrderedDict
+import pygame
+from grid import changed_cells
+from config import BLACK, WHITE, WALL_COLOR, STORM, BG_OCEAN, VISITED_COLOR
+import resources
+
+try:
+    import numpy as np
+except ImportError:  # không có NumPy: vẽ từng ô / lấy mẫu một ô cho mỗi pixel
+    np = None
+
+CHUNK_PX = 256      # kích thước (pixel) mục tiêu của một mảnh (chunk) đã vẽ sẵn
+BUCKET = 64         # ô đã duyệt được gom theo khối BUCKET x BUCKET ô
+VISITED_RGBA = (*VISITED_COLOR, 90)
+
+# ----------------- Vẽ lưới theo mảnh qua camera -----------------
+# Bản đồ được cắt thành các mảnh span x span ô; mỗi mảnh (địa hình và lớp ô đã duyệt) được vẽ một lần
+# cho mỗi mức zoom và giữ trong cache LRU, chỉ các mảnh nhìn thấy mới được vẽ/blit.
+# Theo mức zoom (pixel/ô): >= 8 vẽ ảnh + viền + số chi phí, 1..8 tô màu phẳng,
+# < 1 mỗi pixel gộp một khối ô (tỷ lệ tường/bão pha màu khi có NumPy).
+# Địa hình chỉ vẽ lại các mảnh chứa ô đổi (so với bản chụp tile/weight).
+# dirty: các vùng màn hình đổi trong khung hình, dùng cho pygame.display.update.
+class GridRenderer:
+    def __init__(self, grid, camera, max_chunks=192):
+        self.grid = grid
+        self.camera = camera
+        # Màu phẳng khi zoom xa lấy theo màu trung bình của ảnh để không đổi tông khi zoom
+        self.colors = {0: self._average("road", BG_OCEAN), 1: self._average("wall", WALL_COLOR), 3: STORM}
+        self.max_chunks = max_chunks
+        self.terrain = OrderedDict()    # (level, cr, cc, span) -> Surface
+        self.overlays = OrderedDict()   # (level, cr, cc, span) -> Surface hoặc None
+        self.glyphs = {}
+        self.version = None
+        self.tile = None
+        self.weight = None
+        self.buckets = {}               # (r // BUCKET, c // BUCKET) -> [(r, c), ...]
+        self.vis_src = None
+        self.vis_len = 0
+        self.view_key = None
+        self.dirty = []
+        self.full = True
+
+    # --- Vùng bẩn ---
+    def mark(self, rect):
+        self.dirty.append(pygame.Rect(rect))
+
+    def mark_all(self):
+        self.full = True
+
+    def mark_cell(self, r, c):
+        cam = self.camera
+        x, y = cam.cell_to_screen(r, c)
+        s = max(1, math.ceil(cam.scale))
+        rect = pygame.Rect(int(x), int(y), s + 1, s + 1).clip(cam.view)
+        if rect.w and rect.h: self.dirty.append(rect)
+
+    # None nghĩa là cập nhật cả màn hình
+    def flush(self):
+        rects = None if self.full else self.dirty
+        self.dirty = []
+        self.full = False
+        return rects
+
+    # --- Tài nguyên theo kích thước ô ---
+    def glyph(self, w):
+        g = self.glyphs.get(w)
+        if g is None:
+            g = self.glyphs[w] = resources.font.render(str(w), True, WHITE)
+        return g
+
+    def sprite(self, name, size=None):
+        return resources.sprite(name, size or max(1, int(self.camera.scale)))
+
+    def _average(self, name, default):
+        img = resources.originals().get(name)
+        return tuple(pygame.transform.average_color(img)[:3]) if img else default
+
+    def span(self):
+        s = self.camera.scale
+        return max(8, 2 ** int(math.log2(CHUNK_PX / s)))
+
+    # --- Cache LRU ---
+    def _cached(self, cache, key, build):
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        surf = cache[key] = build()
+        if len(cache) > self.max_chunks:
+            cache.popitem(last=False)
+        return surf
+
+    # --- Địa hình ---
+    def _build_terrain(self, cr, cc, span):
+        grid = self.grid
+        r0, c0 = cr * span, cc * span
+        r1, c1 = min(grid.rows, r0 + span), min(grid.cols, c0 + span)
+        surf = pygame.Surface(self._chunk_size(r1 - r0, c1 - c0))
+        s = self.camera.scale
+        if s >= 8:
+            self._draw_detail(surf, r0, r1, c0, c1, int(s))
+        elif np is not None:
+            k = max(1, int(round(1 / s)))
+            colors = self._block_colors(r0, r1, c0, c1, k)
+            if s > 1:
+                colors = colors.repeat(int(s), axis=0).repeat(int(s), axis=1)
+            pygame.surfarray.blit_array(surf, colors.transpose(1, 0, 2))
+        else:
+            self._draw_sampled(surf, r0, r1, c0, c1, s)
+        return surf
+
+    # Kích thước pixel của mảnh h x w ô (mảnh ở mép bản đồ nhỏ hơn)
+    def _chunk_size(self, h, w):
+        s = self.camera.scale
+        if s >= 1: return int(w * s), int(h * s)
+        k = int(round(1 / s))
+        return -(-w // k), -(-h // k)
+
+    def _draw_detail(self, surf, r0, r1, c0, c1, s):
+        tile, weight, cols = self.grid.tile, self.grid.weight, self.grid.cols
+        wall_img, road_img = self.sprite("wall", s), self.sprite("road", s)
+        labels = s >= 20
+        for r in range(r0, r1):
+            for c in range(c0, c1):
+                i = r * cols + c
+                rect = pygame.Rect((c - c0) * s, (r - r0) * s, s, s)
+                t = tile[i]
+                if t == 1:
+                    if wall_img: surf.blit(wall_img, rect)
+                    else: surf.fill(self.colors[1], rect)
+                elif t == 3:
+                    surf.fill(STORM, rect)
+                else:
+                    if road_img: surf.blit(road_img, rect)
+                    else: surf.fill(self.colors[0], rect)
+                if s >= 12: pygame.draw.rect(surf, BLACK, rect, 1)
+                w = weight[i]
+                if labels and w > 1 and t != 1:
+                    surf.blit(self.glyph(w), (rect.x + 4, rect.y + 4))
+
+    # Màu cho từng khối k x k ô: pha màu theo tỷ lệ tường / bão trong khối
+    def _block_colors(self, r0, r1, c0, c1, k):
+        grid = self.grid
+        tile = np.frombuffer(grid.tile, dtype=np.uint8).reshape(grid.rows, grid.cols)[r0:r1, c0:c1]
+        h, w = -(-tile.shape[0] // k), -(-tile.shape[1] // k)
+        pad = np.zeros((h * k, w * k), np.uint8)
+        pad[:tile.shape[0], :tile.shape[1]] = tile
+        blocks = pad.reshape(h, k, w, k)
+        fw = (blocks == 1).mean(axis=(1, 3))[..., None]
+        fs = (blocks == 3).mean(axis=(1, 3))[..., None]
+        pal = self.colors
+        colors = np.array(pal[0]) * (1 - fw - fs) + np.array(pal[1]) * fw + np.array(pal[3]) * fs
+        return colors.astype(np.uint8)
+
+    def _draw_sampled(self, surf, r0, r1, c0, c1, s):
+        tile, cols = self.grid.tile, self.grid.cols
+        k = max(1, int(round(1 / s)))
+        size = max(1, int(s))
+        for r in range(r0, r1, k):
+            for c in range(c0, c1, k):
+                color = self.colors.get(tile[r * cols + c], self.colors[0])
+                surf.fill(color, (((c - c0) // k) * size, ((r - r0) // k) * size, size, size))
+
+    def sync(self):
+        grid = self.grid
+        if grid.version == self.version: return
+        if self.tile is None or len(self.tile) != len(grid):
+            self.terrain.clear()
+            self.mark_all()
+        else:
+            changed = set(changed_cells(self.tile, grid.tile)) | set(changed_cells(self.weight, grid.weight))
+            if len(changed) > 1024:
+                self.terrain.clear()
+                self.mark_all()
+            else:
+                for i in changed:
+                    r, c = divmod(i, grid.cols)
+                    for key in [k for k in self.terrain if k[1] == r // k[3] and k[2] == c // k[3]]:
+                        del self.terrain[key]
+                    self.mark_cell(r, c)
+        self.tile, self.weight = array('B', grid.tile), array('H', grid.weight)
+        self.version = grid.version
+
+    # --- Ô đã duyệt ---
+    def set_visited(self, cells, skip=()):
+        self.buckets = {}
+        for rc in cells:
+            if rc in skip: continue
+            self.buckets.setdefault((rc[0] // BUCKET, rc[1] // BUCKET), []).append(rc)
+        self.overlays.clear()
+        self.vis_src, self.vis_len = cells, len(cells)
+        self.mark_all()
+
+    def add_visited(self, rc, skip=()):
+        self.vis_len += 1
+        if rc in skip: return
+        r, c = rc
+        self.buckets.setdefault((r // BUCKET, c // BUCKET), []).append(rc)
+        span = self.span()
+        key = (self.camera.level, r // span, c // span, span)
+        if key in self.overlays:
+            surf = self.overlays[key]
+            if surf is None:
+                del self.overlays[key]
+            else:
+                self._stamp(surf, rc, key[1] * span, key[2] * span)
+        self.mark_cell(r, c)
+
+    def _stamp(self, surf, rc, r0, c0):
+        s = self.camera.scale
+        if s >= 1:
+            si = int(s)
+            surf.fill(VISITED_RGBA, ((rc[1] - c0) * si, (rc[0] - r0) * si, si, si))
+        else:
+            k = int(round(1 / s))
+            surf.fill(VISITED_RGBA, ((rc[1] - c0) // k, (rc[0] - r0) // k, 1, 1))
+
+    def _build_overlay(self, cr, cc, span):
+        r0, c0 = cr * span, cc * span
+        surf = None
+        b0r, b0c = r0 // BUCKET, c0 // BUCKET
+        nb = max(1, span // BUCKET)
+        for br in range(b0r, b0r + nb):
+            for bc in range(b0c, b0c + nb):
+                for rc in self.buckets.get((br, bc), ()):
+                    if not (r0 <= rc[0] < r0 + span and c0 <= rc[1] < c0 + span): continue
+                    if surf is None:
+                        h, w = min(span, self.grid.rows - r0), min(span, self.grid.cols - c0)
+                        surf = pygame.Surface(self._chunk_size(h, w), pygame.SRCALPHA)
+                    self._stamp(surf, rc, r0, c0)
+        return surf
+
+    # Vẽ các mảnh nhìn thấy; tự dựng lại lớp ô đã duyệt nếu tập này bị thay/xoá ở nơi khác
+    def draw(self, screen, visited, skip=()):
+        cam = self.camera
+        self.sync()
+        if visited is not self.vis_src or len(visited) != self.vis_len:
+            self.set_visited(visited, skip)
+        view_key = (cam.level, cam.x, cam.y)
+        if view_key != self.view_key:
+            self.view_key = view_key
+            self.mark_all()
+        span = self.span()
+        r0, r1, c0, c1 = cam.visible_cells()
+        screen.set_clip(cam.view)
+        for cr in range(r0 // span, (r1 - 1) // span + 1):
+            for cc in range(c0 // span, (c1 - 1) // span + 1):
+                key = (cam.level, cr, cc, span)
+                x, y = cam.cell_to_screen(cr * span, cc * span)
+                pos = (int(round(x)), int(round(y)))
+                screen.blit(self._cached(self.terrain, key, lambda: self._build_terrain(cr, cc, span)), pos)
+                if self.buckets:
+                    ov = self._cached(self.overlays, key, lambda: self._build_overlay(cr, cc, span))
+                    if ov is not None: screen.blit(ov, pos)
+        screen.set_clip(None)
@@ -0,0 +1,58 @@
+# resources.py
+# Tài nguyên vẽ, tạo khi dùng lần đầu (import module này không khởi tạo gì):
+#   resources.font / bigfont / headerfont   font theo config.FONTS (chỉ pygame.font.init(), không pygame.init()),
+#   atlas(size)                              ảnh config.IMAGES đã thu nhỏ về size x size, cache theo size.
+# Ảnh gốc được đọc một lần và mọi cỡ đều thu từ ảnh gốc; cần cửa sổ đã mở (convert_alpha).
+import pygame
+from config import FONTS, IMAGES
+
+_fonts = {}
+_originals = None
+_atlas = {}
+
+# ----------------- Font -----------------
+def get_font(name):
+    f = _fonts.get(name)
+    if f is None:
+        if not pygame.font.get_init(): pygame.font.init()
+        family, size, bold = FONTS[name]
+        f = _fonts[name] = pygame.font.SysFont(family, size, bold=bold)
+    return f
+
+# resources.font ... (PEP 562): tra font khi truy cập thuộc tính
+def __getattr__(name):
+    if name in FONTS: return get_font(name)
+    raise AttributeError(f"module 'resources' has no attribute {name!r}")
+
+# ----------------- Ảnh -----------------
+def _load(file_name):
+    try:
+        return pygame.image.load(file_name).convert_alpha()
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"Lỗi tải ảnh {file_name}: {e}. Sử dụng màu mặc định thay thế.")
+        return None
+
+def originals():
+    global _originals
+    if _originals is None:
+        _originals = {name: _load(file_name) for name, file_name in IMAGES.items()}
+    return _originals
+
+# {tên: Surface size x size hoặc None}; ảnh quá nhỏ (< 4 px) không vẽ được nên là None
+def atlas(size):
+    sheet = _atlas.get(size)
+    if sheet is None:
+        sheet = _atlas[size] = {
+            name: pygame.transform.smoothscale(img, (size, size)) if img and size >= 4 else None
+            for name, img in originals().items()}
+    return sheet
+
+def sprite(name, size):
+    return atlas(size).get(name)
+
+# Bỏ cache (ví dụ sau khi đóng cửa sổ)
+def clear():
+    global _originals
+    _fonts.clear()
+    _atlas.clear()
+    _originals = None
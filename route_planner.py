@@ -0,0 +1,200 @@
+# route_planner.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import algorithms as algo
+from compare_runner import share_grid, attach_grid, mp_context
+from path_service import distance_field
+
+INF = float('inf')
+
+# ----------------- Ma trận chi phí -----------------
+# matrix[i][j] = chi phí ngắn nhất từ điểm i tới điểm j (INF nếu không tới được).
+# Mỗi điểm nguồn chỉ chạy một trường Dijkstra toàn bản đồ rồi đọc chi phí tới mọi điểm còn lại.
+# Chi phí không đối xứng: đi a -> b tính weight[b], không tính weight[a].
+def _row(grid, source, targets):
+    dist, _ = distance_field(grid, source)
+    return [int(dist[t]) if dist[t] >= 0 else INF for t in targets]
+
+def _rows(shm_name, rows, cols, sources, targets):
+    grid = attach_grid(shm_name, rows, cols)
+    return [_row(grid, s, targets) for s in sources]
+
+# Pool dùng chung giữa các lần lập lộ trình (UI truyền executor=executor()): tạo tiến trình con qua
+# forkserver / spawn tốn hơn cả tính ma trận trên bản đồ vừa phải, nên chỉ tạo một lần
+_pool = None
+
+def executor(workers=None):
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=mp_context())
+    return _pool
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+# Bản đồ lớn và nhiều điểm: chia nguồn thành các lô, mỗi lô một tác vụ trên ProcessPoolExecutor,
+# bản đồ gửi qua vùng nhớ chung và tiến trình con tạo qua mp_context() (như CompareRunner)
+def cost_matrix(grid, stops, workers=None, parallel_min_cells=40_000, executor=None):
+    ids = [grid.idx(*p) for p in stops]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(ids) < 3 or len(grid) < parallel_min_cells:
+        return [_row(grid, s, ids) for s in ids]
+    size = -(-len(ids) // (workers * 2))
+    batches = [ids[k:k + size] for k in range(0, len(ids), size)]
+    shm = share_grid(grid)
+    pool = executor or ProcessPoolExecutor(max_workers=workers, mp_context=mp_context())
+    try:
+        futures = [pool.submit(_rows, shm.name, grid.rows, grid.cols, b, ids) for b in batches]
+        return [row for fut in futures for row in fut.result()]
+    finally:
+        if executor is None: pool.shutdown()
+        shm.close()
+        shm.unlink()
+
+# ----------------- Thứ tự giao hàng -----------------
+# tour là danh sách chỉ số điểm bắt đầu từ 0 (vị trí robot); closed=True nghĩa là quay về điểm 0.
+def tour_cost(matrix, tour, closed=False):
+    cost = sum(matrix[a][b] for a, b in zip(tour, tour[1:]))
+    return cost + matrix[tour[-1]][0] if closed and len(tour) > 1 else cost
+
+# Quy hoạch động Held-Karp trên tập con: O(2^n * n^2), chính xác, chỉ dùng khi ít điểm
+def held_karp(matrix, closed=False):
+    n = len(matrix)
+    if n <= 2: return list(range(n))
+    m = n - 1
+    full = (1 << m) - 1
+    best = [[INF] * m for _ in range(1 << m)]   # best[mask][j]: từ 0 qua các điểm trong mask, dừng ở j + 1
+    back = [[-1] * m for _ in range(1 << m)]
+    for j in range(m):
+        best[1 << j][j] = matrix[0][j + 1]
+    for mask in range(1, full + 1):
+        row = best[mask]
+        for j in range(m):
+            c = row[j]
+            if c == INF: continue
+            dj = matrix[j + 1]
+            rest = full ^ mask
+            while rest:
+                low = rest & -rest
+                i = low.bit_length() - 1
+                nc = c + dj[i + 1]
+                nm = mask | low
+                if nc < best[nm][i]:
+                    best[nm][i] = nc
+                    back[nm][i] = j
+                rest ^= low
+    end = min(range(m), key=lambda j: best[full][j] + (matrix[j + 1][0] if closed else 0))
+    tour = []
+    mask, j = full, end
+    while j >= 0:
+        tour.append(j + 1)
+        mask, j = mask ^ (1 << j), back[mask][j]
+    tour.append(0)
+    tour.reverse()
+    return tour
+
+def nearest_neighbor(matrix):
+    left = set(range(1, len(matrix)))
+    tour = [0]
+    while left:
+        row = matrix[tour[-1]]
+        nxt = min(left, key=lambda j: row[j])
+        left.remove(nxt)
+        tour.append(nxt)
+    return tour
+
+# 2-opt cho chi phí không đối xứng: đảo đoạn t[i..j]; tổng chi phí xuôi/ngược của đoạn lấy từ
+# mảng cộng dồn nên mỗi nước thử là O(1). Cải thiện đầu tiên được áp dụng ngay rồi tính lại.
+def two_opt(matrix, tour, closed=False):
+    t = tour + [0] if closed else tour[:]
+    n = len(t)
+    last = n - 2 if closed else n - 1
+    improved = True
+    while improved:
+        improved = False
+        fwd, bwd = [0] * n, [0] * n
+        for k in range(1, n):
+            fwd[k] = fwd[k - 1] + matrix[t[k - 1]][t[k]]
+            bwd[k] = bwd[k - 1] + matrix[t[k]][t[k - 1]]
+        for i in range(1, last):
+            a, ti = t[i - 1], t[i]
+            for j in range(i + 1, last + 1):
+                tj = t[j]
+                old = matrix[a][ti] + fwd[j] - fwd[i]
+                new = matrix[a][tj] + bwd[j] - bwd[i]
+                if j + 1 < n:
+                    b = t[j + 1]
+                    old += matrix[tj][b]
+                    new += matrix[ti][b]
+                if new < old:
+                    t[i:j + 1] = t[i:j + 1][::-1]
+                    improved = True
+                    break
+            if improved: break
+    return t[:-1] if closed else t
+
+# Or-opt: chuyển một đoạn 1..3 điểm liên tiếp (giữ chiều) sang vị trí khác trong tour
+def or_opt(matrix, tour, closed=False):
+    t = tour[:]
+    improved = True
+    while improved:
+        improved = False
+        n = len(t)
+        for seg in (1, 2, 3):
+            for i in range(1, n - seg + 1):
+                s0, s1 = t[i], t[i + seg - 1]
+                p = t[i - 1]
+                nx = t[i + seg] if i + seg < n else (0 if closed else None)
+                gain = matrix[p][s0] + (matrix[s1][nx] - matrix[p][nx] if nx is not None else 0)
+                rest = t[:i] + t[i + seg:]
+                for k in range(len(rest)):
+                    if k == i - 1: continue
+                    a = rest[k]
+                    b = rest[k + 1] if k + 1 < len(rest) else (0 if closed else None)
+                    add = matrix[a][s0] + (matrix[s1][b] - matrix[a][b] if b is not None else 0)
+                    if add < gain:
+                        t = rest[:k + 1] + t[i:i + seg] + rest[k + 1:]
+                        improved = True
+                        break
+                if improved: break
+            if improved: break
+    return t
+
+def order_stops(matrix, closed=False, exact_limit=12):
+    if len(matrix) - 1 <= exact_limit:
+        return held_karp(matrix, closed), "Held-Karp"
+    tour = nearest_neighbor(matrix)
+    while True:
+        cost = tour_cost(matrix, tour, closed)
+        tour = or_opt(matrix, two_opt(matrix, tour, closed), closed)
+        if tour_cost(matrix, tour, closed) >= cost: break
+    return tour, "2-opt + Or-opt"
+
+# ----------------- Lộ trình giao hàng -----------------
+# Trả về dict: order (các điểm theo thứ tự đi, bắt đầu từ start), path (đường đi nối các chặng),
+# cost, unreachable (khách hàng không tới được), method, matrix_s / order_s (thời gian từng giai đoạn).
+def plan_route(grid, start, customers, closed=False, workers=None, exact_limit=12, executor=None):
+    customers = [c for c in dict.fromkeys(customers) if c != start]
+    t0 = time.perf_counter()
+    matrix = cost_matrix(grid, [start] + customers, workers, executor=executor)
+    t1 = time.perf_counter()
+    keep = [0] + [j for j in range(1, len(matrix)) if matrix[0][j] < INF]
+    unreachable = [customers[j - 1] for j in range(1, len(matrix)) if matrix[0][j] == INF]
+    sub = [[matrix[a][b] for b in keep] for a in keep]
+    tour, method = order_stops(sub, closed, exact_limit)
+    stops = [start] + customers
+    order = [stops[keep[k]] for k in tour]
+    t2 = time.perf_counter()
+
+    legs = list(zip(order, order[1:] + [start] if closed else order[1:]))
+    path, cost = [start], 0
+    for a, b in legs:
+        leg, _, _, _, leg_cost = algo.astar_search(a, b, grid, grid.weight, grid.rows, grid.cols, record=False)
+        path.extend(leg[1:])
+        cost += leg_cost
+    return {"order": order, "path": path, "cost": cost, "unreachable": unreachable, "method": method,
+            "matrix_s": t1 - t0, "order_s": t2 - t1}
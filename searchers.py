@@ -0,0 +1,30 @@
+# searchers.py
+import algorithms as algo
+import wavefront
+import hpa
+import reachability
+
+# ----------------- Danh sách thuật toán -----------------
+# Không phụ thuộc pygame: main.py, benchmark.py và tiến trình con đều dùng chung.
+SEARCHERS = {
+    "BFS": algo.bfs_search, "DFS": algo.dfs_search, "UCS": algo.ucs_search,
+    "A*": algo.astar_search, "Greedy": algo.greedy_search, "Beam": algo.beam_search,
+    "IDS": algo.ids_search, "D* Lite": algo.dstar_lite_search,
+    "JPS": algo.jps_search, "Bi-BFS": algo.bidirectional_bfs_search,
+    "Bi-UCS": algo.bidirectional_ucs_search, "Bi-A*": algo.bidirectional_astar_search,
+    "IDA*": algo.idastar_search, "HPA*": hpa.hpa_search
+}
+if wavefront.HAVE_NUMPY:
+    SEARCHERS["BFS (NumPy)"] = wavefront.bfs_wavefront
+    SEARCHERS["UCS (NumPy)"] = wavefront.dijkstra_wavefront
+
+# Mọi thuật toán đều hỏi chỉ mục thành phần liên thông trước: start/goal khác thành phần (hay goal là
+# tường) thì trả về "không có đường" ngay thay vì duyệt hết vùng của start
+SEARCHERS = {name: reachability.Guarded(func) for name, func in SEARCHERS.items()}
+
+# Phiên bản generator (algo.SearchStepper) để UI vẽ dần khi đang tìm; thuật toán không có ở đây
+# được chạy hết rồi phát lại danh sách ô đã duyệt
+STEPPERS = {
+    "BFS": algo.bfs_steps, "DFS": algo.dfs_steps, "UCS": algo.ucs_steps,
+    "A*": algo.astar_steps, "Greedy": algo.greedy_steps
+}
@@ -0,0 +1,307 @@
+# server.py
+# Dịch vụ tìm đường cho robot từ xa (không cần pygame):
+#   python server.py --map map.gmap --port 8765 --workers 4
+#   python server.py --random 500x500 --layout warehouse --seed 1
+# Giao thức: mỗi dòng một JSON trên TCP (kết nối giữ nguyên, gửi nhiều yêu cầu), hoặc HTTP
+# (POST thân JSON, GET /info, GET /stats; mỗi kết nối một yêu cầu). "id" được trả lại nguyên vẹn.
+#   {"op": "search", "algo": "A*", "start": [r, c], "goal": [r, c], "kwargs": {...}}
+#       -> {"ok": true, "path": [[r, c], ...], "cost", "visited", "search_s", "version", "batched"}
+#   {"op": "delta", "cells": [[r, c, tile], [r, c, tile, weight], ...]}   (weight mặc định theo tile)
+#       -> {"ok": true, "changed", "version"}
+#   {"op": "info"} | {"op": "stats"} | {"op": "sample", "n": 10, "seed": 0}  (n ô không phải tường)
+#   lỗi -> {"ok": false, "error": "..."}
+# Bản đồ nằm trong vùng nhớ chung (compare_runner.share_grid); các tìm kiếm chạy trên
+# ProcessPoolExecutor. Các truy vấn giống hệt nhau (cùng thuật toán, start, goal, kwargs và phiên bản
+# bản đồ) đang chờ kết quả được gộp thành một lần tìm. Delta chờ các tìm kiếm đang chạy xong rồi mới
+# ghi (tìm kiếm mới chờ delta), nên tiến trình con không bao giờ đọc bản đồ đang sửa dở.
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from grid import Grid, WATER, WALL, STORM, WALL_WEIGHT
+from compare_runner import share_grid, attach_grid, mp_context
+from searchers import SEARCHERS
+import map_gen
+import map_io
+
+DEFAULT_WEIGHT = {WATER: 1, WALL: WALL_WEIGHT, STORM: 3}
+MAX_LINE = 1 << 20      # độ dài tối đa một dòng / thân yêu cầu (byte)
+
+# ----------------- Tiến trình con -----------------
+# Mỗi tiến trình giữ bản chụp tile của phiên bản đã thấy: khi phiên bản đổi chỉ sửa chỉ mục kề theo
+# các ô khác (Grid.refresh); version của grid được đặt bằng phiên bản của server để các bộ đệm
+# theo version (D* Lite, HPA*, chỉ mục liên thông) tự cập nhật.
+_seen = {}
+
+def _sync(shm_name, rows, cols, version):
+    grid = attach_grid(shm_name, rows, cols)
+    if grid.version != version:
+        old = _seen.get(shm_name)
+        if old is None: grid.invalidate()
+        else: grid.refresh(old)
+        grid.version = version
+        _seen.clear()
+        _seen[shm_name] = array('B', grid.tile)
+    return grid
+
+def _search(name, shm_name, rows, cols, version, start, goal, kwargs):
+    grid = _sync(shm_name, rows, cols, version)
+    path, _, visited_c, t, cost = SEARCHERS[name](start, goal, grid, grid.weight, rows, cols, record=False, **kwargs)
+    return {"path": [list(p) for p in path], "cost": cost, "visited": visited_c, "search_s": t}
+
+class RequestError(ValueError):
+    pass
+
+# ----------------- Server -----------------
+class PlanServer:
+    def __init__(self, grid, workers=None):
+        n = len(grid)
+        self.shm = share_grid(grid)
+        tile, raw = self.shm.buf[:n], self.shm.buf[n:3 * n]
+        self.views = [tile, raw.cast('H'), raw]      # phải release() trước khi đóng vùng nhớ chung
+        self.grid = Grid(grid.rows, grid.cols, self.views[0], self.views[1])
+        # Không fork: tiến trình con sẽ giữ bản sao socket của các kết nối đang mở (xem mp_context)
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=mp_context())
+        self.pending = {}           # khoá truy vấn -> future của lần tìm đang chạy
+        self.active = 0             # số tìm kiếm đang đọc bản đồ
+        self.writing = False
+        self.gate = None            # asyncio.Condition, tạo trong vòng lặp sự kiện
+        self.conns = set()          # task của các kết nối đang mở
+        self.leaving = set()        # task trả chỗ đọc của các tìm kiếm vừa xong
+        self.stats = {"requests": 0, "searches": 0, "batched": 0, "deltas": 0, "errors": 0,
+                      "latency_s": 0.0, "connections": 0}
+
+    # --- Cổng đọc / ghi: delta được ưu tiên, tìm kiếm mới chờ delta đang đợi ---
+    async def _enter(self):
+        async with self.gate:
+            await self.gate.wait_for(lambda: not self.writing)
+            self.active += 1
+
+    async def _leave(self):
+        async with self.gate:
+            self.active -= 1
+            self.gate.notify_all()
+
+    # Chỗ đọc gắn với future của tiến trình con, không với task đang chờ nó: client ngắt kết nối hay
+    # task bị huỷ thì tiến trình con vẫn đang đọc bản đồ, nên chỉ trả chỗ khi future xong
+    def _release(self, fut):
+        task = asyncio.ensure_future(self._leave())
+        self.leaving.add(task)
+        task.add_done_callback(self.leaving.discard)
+
+    # --- Các thao tác ---
+    def _cell(self, value, what):
+        try:
+            r, c = (int(x) for x in value)
+        except (TypeError, ValueError):
+            raise RequestError(f"{what} phải là [hàng, cột]") from None
+        if not self.grid.in_bounds(r, c): raise RequestError(f"{what} {[r, c]} nằm ngoài bản đồ")
+        return r, c
+
+    async def search(self, msg):
+        name = msg.get("algo", "A*")
+        if name not in SEARCHERS: raise RequestError(f"không có thuật toán {name!r}")
+        start, goal = self._cell(msg.get("start"), "start"), self._cell(msg.get("goal"), "goal")
+        kwargs = msg.get("kwargs") or {}
+        if not isinstance(kwargs, dict): raise RequestError("kwargs phải là object")
+        kwargs.pop("record", None)
+        await self._enter()
+        try:
+            version = self.grid.version
+            key = (name, start, goal, json.dumps(kwargs, sort_keys=True), version)
+            fut = self.pending.get(key)
+            batched = fut is not None
+            if batched:
+                self.stats["batched"] += 1
+            else:
+                self.stats["searches"] += 1
+                fut = asyncio.get_running_loop().run_in_executor(
+                    self.pool, _search, name, self.shm.name, self.grid.rows, self.grid.cols, version,
+                    start, goal, kwargs)
+                self.pending[key] = fut
+                fut.add_done_callback(lambda _: self.pending.pop(key, None))
+        except BaseException:
+            await self._leave()
+            raise
+        fut.add_done_callback(self._release)
+        result = await asyncio.shield(fut)
+        return dict(result, version=version, batched=batched)
+
+    async def delta(self, msg):
+        cells = msg.get("cells")
+        if not isinstance(cells, list): raise RequestError("cells phải là danh sách [r, c, tile(, weight)]")
+        edits = []
+        for cell in cells:
+            if not isinstance(cell, list) or len(cell) not in (3, 4): raise RequestError(f"ô không hợp lệ: {cell!r}")
+            r, c = self._cell(cell[:2], "ô")
+            t = cell[2]
+            if t not in DEFAULT_WEIGHT: raise RequestError(f"tile phải là một trong {sorted(DEFAULT_WEIGHT)}")
+            w = cell[3] if len(cell) == 4 else DEFAULT_WEIGHT[t]
+            if not isinstance(w, int) or not 1 <= w <= 0xFFFF: raise RequestError(f"weight không hợp lệ: {w!r}")
+            edits.append((r, c, t, w))
+        async with self.gate:
+            await self.gate.wait_for(lambda: not self.writing)
+            self.writing = True
+            try:
+                await self.gate.wait_for(lambda: self.active == 0)
+                before = self.grid.version
+                for r, c, t, w in edits:
+                    self.grid.set_cell(r, c, t, w)
+                version = self.grid.version
+            finally:
+                self.writing = False
+                self.gate.notify_all()
+        self.stats["deltas"] += 1
+        return {"changed": version - before, "version": version}
+
+    def info(self, msg):
+        return {"rows": self.grid.rows, "cols": self.grid.cols, "version": self.grid.version,
+                "algos": list(SEARCHERS)}
+
+    def sample(self, msg):
+        n = min(int(msg.get("n", 1)), 10_000)
+        rng = random.Random(msg.get("seed"))
+        tile, size = self.grid.tile, len(self.grid)
+        out = []
+        for _ in range(100 * n):
+            if len(out) >= n: break
+            i = rng.randrange(size)
+            if tile[i] != WALL: out.append(list(self.grid.pos(i)))
+        return {"cells": out}
+
+    async def dispatch(self, msg):
+        t0 = time.perf_counter()
+        self.stats["requests"] += 1
+        reply = {"id": msg.get("id")} if isinstance(msg, dict) and "id" in msg else {}
+        try:
+            if not isinstance(msg, dict): raise RequestError("yêu cầu phải là object JSON")
+            op = msg.get("op", "search")
+            if op == "search": out = await self.search(msg)
+            elif op == "delta": out = await self.delta(msg)
+            elif op == "info": out = self.info(msg)
+            elif op == "sample": out = self.sample(msg)
+            elif op == "stats": out = dict(self.stats, pending=len(self.pending), version=self.grid.version)
+            else: raise RequestError(f"không có thao tác {op!r}")
+            reply.update(ok=True, **out)
+        except Exception as e:
+            self.stats["errors"] += 1
+            reply.update(ok=False, error=str(e) if isinstance(e, RequestError) else f"{type(e).__name__}: {e}")
+        self.stats["latency_s"] += time.perf_counter() - t0
+        return reply
+
+    # --- Kết nối ---
+    async def handle(self, reader, writer):
+        self.stats["connections"] += 1
+        conn = asyncio.current_task()
+        self.conns.add(conn)
+        try:
+            first = await reader.readline()
+            if first.startswith((b"GET ", b"POST ")):
+                await self._http(first, reader, writer)
+                return
+            # Mỗi yêu cầu một task: các yêu cầu trên cùng kết nối chạy song song, trả lời theo thứ tự xong
+            lock = asyncio.Lock()
+            tasks = set()
+            line = first
+            while line:
+                if line.strip():
+                    task = asyncio.create_task(self._line(line, writer, lock))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                line = await reader.readline()
+            if tasks: await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self.conns.discard(conn)
+            writer.close()
+
+    # Chờ các kết nối đã bị client đóng xử lý xong (tránh huỷ chúng giữa chừng khi dừng vòng lặp)
+    async def wait_idle(self, timeout=1.0):
+        if self.conns:
+            await asyncio.wait(list(self.conns), timeout=timeout)
+
+    async def _line(self, line, writer, lock):
+        try:
+            msg = json.loads(line)
+        except json.JSONDecodeError as e:
+            reply = {"ok": False, "error": f"JSON không hợp lệ: {e}"}
+        else:
+            reply = await self.dispatch(msg)
+        async with lock:
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+
+    async def _http(self, first, reader, writer):
+        method, path = first.decode("latin-1").split()[:2]
+        length = 0
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b"\n", b""): break
+            name, _, value = header.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length": length = int(value)
+        if length > MAX_LINE:
+            status, reply = "413 Payload Too Large", {"ok": False, "error": "thân yêu cầu quá lớn"}
+        else:
+            body = await reader.readexactly(length) if length else b""
+            try:
+                msg = json.loads(body) if method == "POST" else {"op": path.strip("/") or "info"}
+            except json.JSONDecodeError as e:
+                status, reply = "400 Bad Request", {"ok": False, "error": f"JSON không hợp lệ: {e}"}
+            else:
+                reply = await self.dispatch(msg)
+                status = "200 OK" if reply["ok"] else "400 Bad Request"
+        data = json.dumps(reply).encode()
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.gate = asyncio.Condition()
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.grid = None
+        for view in self.views:
+            view.release()
+        self.shm.close()
+        self.shm.unlink()
+
+# Bản đồ từ file (map_io) hoặc sinh theo seed (map_gen)
+def load_grid(path=None, size=None, layout="noise", seed=0):
+    if path: return map_io.read_map(path)[0]
+    r, _, c = (size or "200x200").lower().partition("x")
+    return map_gen.generate(int(r), int(c or r), layout, seed=seed)[0]
+
+async def serve(server, host, port):
+    listener = await server.start(host, port)
+    addr = listener.sockets[0].getsockname()
+    print(f"Phục vụ bản đồ {server.grid.rows}x{server.grid.cols} tại {addr[0]}:{addr[1]}", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Server tìm đường JSON (TCP/HTTP) cho robot từ xa")
+    ap.add_argument("--map", help="bản đồ .gmap/.txt (map_io)")
+    ap.add_argument("--random", default="200x200", help="RxC khi không có --map")
+    ap.add_argument("--layout", choices=list(map_gen.LAYOUTS), default="noise")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, help="số tiến trình tìm kiếm (mặc định số CPU)")
+    args = ap.parse_args(argv)
+    server = PlanServer(load_grid(args.map, args.random, args.layout, args.seed), args.workers)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # ui_components.py
 import pygame
-from config import BUTTON_ACTIVE, BUTTON_BG, TEXT, PADDING, BTN_H, font
+from config import BUTTON_ACTIVE, BUTTON_BG, TEXT, PADDING, BTN_H, HEIGHT
+import resources
 
 class Button:
     def __init__(self, rect, text, action=None, is_toggle=False):
@@ -12,7 +13,7 @@ class Button:
     def draw(self, surf, current_algo=None):
         bg_color = BUTTON_ACTIVE if self.active or (current_algo and self.text == current_algo) else BUTTON_BG
         pygame.draw.rect(surf, bg_color, self.rect, border_radius=6)
-        txt = font.render(self.text, True, TEXT)
+        txt = resources.font.render(self.text, True, TEXT)
         tw, th = txt.get_size()
         surf.blit(txt, (self.rect.x + (self.rect.width-tw)//2, self.rect.y + (self.rect.height-th)//2))
     def is_clicked(self, pos):
@@ -28,19 +29,25 @@ class DropdownMenu:
         y_start = top_button_rect[1] + top_button_rect[3] + PADDING
         width = top_button_rect[2]
         x = top_button_rect[0]
-        
+
+        # Chia thành nhiều cột nếu danh sách dài hơn chiều cao cửa sổ
+        per_col = max(1, (HEIGHT - y_start) // (BTN_H + PADDING))
+        n_cols = (len(items) + per_col - 1) // per_col
+        col_w = (width - (n_cols - 1) * PADDING) // max(1, n_cols)
+
         for i, item_text in enumerate(items):
-            rect = (x, y_start + i * (BTN_H + PADDING), width, BTN_H)
+            col, row = divmod(i, per_col)
+            rect = (x + col * (col_w + PADDING), y_start + row * (BTN_H + PADDING), col_w, BTN_H)
             self.items.append(Button(rect, item_text, action=item_text))
 
     def draw(self, surf, current_algo):
         if self.is_open:
             first_item = self.items[0].rect
-            last_item = self.items[-1].rect
+            bounds = first_item.unionall([item.rect for item in self.items])
             menu_rect = pygame.Rect(
-                first_item.x, first_item.y - PADDING, 
-                first_item.width, 
-                last_item.bottom - first_item.top + PADDING*2
+                bounds.x, bounds.y - PADDING,
+                bounds.width,
+                bounds.height + PADDING*2
             )
             pygame.draw.rect(surf, BUTTON_BG, menu_rect, border_radius=6)
             
@@ -0,0 +1,142 @@
+# wavefront.py
+import time
+from grid import as_grid, DOWN, UP, RIGHT, LEFT
+
+try:
+    import numpy as np
+except ImportError:  # NumPy là tuỳ chọn: không có thì main.py không đăng ký các thuật toán này
+    np = None
+
+HAVE_NUMPY = np is not None
+
+# ----------------- Mảng NumPy trên Grid -----------------
+# Mở rộng cả frontier một lần: mỗi hướng là một phép lọc theo bit trong mask kề (grid.adjacency()).
+def _planes(grid):
+    mask, _ = grid.adjacency()
+    m = np.frombuffer(mask, dtype=np.uint8)
+    w = np.frombuffer(grid.weight, dtype=np.uint16).astype(np.int32)
+    cols = grid.cols
+    dirs = ((DOWN, cols), (UP, -cols), (RIGHT, 1), (LEFT, -1))
+    return m, w, dirs
+
+def _expand(front, m, dirs):
+    mf = m[front]
+    us, vs = [], []
+    for bit, d in dirs:
+        u = front[(mf & bit) != 0]
+        us.append(u)
+        vs.append(u + d)
+    return np.concatenate(us), np.concatenate(vs)
+
+# ----------------- Trường khoảng cách -----------------
+# dist[i] = số bước từ source (-1 nếu không tới được), parent[i] = ô trước đó.
+# order là danh sách các lớp (mảng chỉ số) theo thứ tự được phát hiện.
+# Một ô được nhiều ô của lớp trước cùng phát hiện: ghi parent[v] = u (lần ghi sau thắng) rồi chỉ giữ
+# các cặp có parent[v] == u — mỗi v còn đúng một cặp vì (u, hướng) không lặp, khỏi cần np.unique.
+def _first(parent, u, v):
+    parent[v] = u
+    keep = parent[v] == u
+    return u[keep], v[keep]
+
+def bfs_field(grid, source, goal=None):
+    m, _, dirs = _planes(grid)
+    n = len(grid)
+    dist = np.full(n, -1, np.int32)
+    parent = np.full(n, -1, np.int32)
+    dist[source] = 0
+    front = np.array([source], np.int64)
+    order = [front]
+    depth = 0
+    while front.size:
+        if goal is not None and dist[goal] >= 0: break
+        u, v = _expand(front, m, dirs)
+        new = dist[v] < 0
+        _, v = _first(parent, u[new], v[new])
+        depth += 1
+        dist[v] = depth
+        front = v
+        order.append(v)
+    return dist, parent, order
+
+# Dijkstra theo bucket (Dial): trọng số là số nguyên nhỏ (1/3/4/5) nên mọi ô trong bucket d
+# đều đã tối ưu và được chốt cùng lúc. Các ô vừa được giảm chi phí chia vào bucket một lượt bằng
+# argsort/split theo chi phí mới; một ô chỉ vào mỗi bucket một lần (chỉ giảm chặt mới được thêm),
+# bản cũ ở bucket lớn hơn bị bỏ khi lấy ra vì dist đã nhỏ hơn.
+# reverse=True: dist[i] = chi phí đi từ i tới source (chi phí là trọng số ô bước vào),
+# parent[i] trỏ về phía source — dùng cho trường khoảng cách theo đích.
+def dijkstra_field(grid, source, goal=None, reverse=False):
+    m, w, dirs = _planes(grid)
+    n = len(grid)
+    INF = np.iinfo(np.int32).max
+    dist = np.full(n, INF, np.int32)
+    parent = np.full(n, -1, np.int32)
+    done = np.zeros(n, bool)
+    dist[source] = 0
+    buckets = {0: [np.array([source], np.int64)]}
+    order = []
+    while buckets:
+        d = min(buckets)
+        u = np.concatenate(buckets.pop(d))
+        u = u[(dist[u] == d) & ~done[u]]
+        if u.size == 0: continue
+        done[u] = True
+        order.append(u)
+        if goal is not None and done[goal]: break
+        uu, v = _expand(u, m, dirs)
+        nd = d + (w[uu] if reverse else w[v])
+        better = nd < dist[v]
+        uu, v, nd = uu[better], v[better], nd[better]
+        np.minimum.at(dist, v, nd)
+        ok = dist[v] == nd
+        uu, v = _first(parent, uu[ok], v[ok])
+        if not v.size: continue
+        nd = dist[v]
+        by = np.argsort(nd, kind="stable")
+        v, nd = v[by], nd[by]
+        cut = np.flatnonzero(nd[1:] != nd[:-1]) + 1
+        for k, part in zip(nd[np.r_[0, cut]].tolist(), np.split(v, cut)):
+            buckets.setdefault(k, []).append(part)
+    dist[dist == INF] = -1
+    return dist, parent, order
+
+# Đi theo parent từ node về gốc của trường (gốc không có parent)
+def walk(parent, node):
+    ids = [node]
+    cur = int(parent[node])
+    while cur >= 0:
+        ids.append(cur)
+        cur = int(parent[cur])
+    return ids
+
+def _result(grid, s, g, dist, parent, order, t0, record=True):
+    cols, w = grid.cols, grid.weight
+    path, cost = [], 0
+    if dist[g] >= 0:
+        ids = walk(parent, g)
+        ids.reverse()
+        cost = sum(w[i] for i in ids[1:])
+        path = [divmod(i, cols) for i in ids]
+    visited_list = []
+    count = sum(len(layer) for layer in order)
+    if record:
+        r, c = np.divmod(np.concatenate(order), cols)
+        visited_list = list(zip(r.tolist(), c.tolist()))
+    t = time.perf_counter() - t0
+    return path, visited_list, count, t, cost
+
+# --- Search Algorithms (cùng bộ kết quả với algorithms.py) ---
+def bfs_wavefront(start, goal, tile, weight, rows, cols, record=True):
+    if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    t0 = time.perf_counter()
+    s, g = grid.idx(*start), grid.idx(*goal)
+    dist, parent, order = bfs_field(grid, s, g)
+    return _result(grid, s, g, dist, parent, order, t0, record)
+
+def dijkstra_wavefront(start, goal, tile, weight, rows, cols, record=True):
+    if not start or not goal: return [], [], 0, 0, 0
+    grid = as_grid(tile, weight, rows, cols)
+    t0 = time.perf_counter()
+    s, g = grid.idx(*start), grid.idx(*goal)
+    dist, parent, order = dijkstra_field(grid, s, g)
+    return _result(grid, s, g, dist, parent, order, t0, record)